@@ -0,0 +1,40 @@
+"""Session leases for multi-worker deployments.
+
+Revision ID: 0002_session_leases
+Revises: 0001_initial
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0002_session_leases"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "session_leases",
+        sa.Column("thread_id", sa.String(length=128), primary_key=True),
+        sa.Column("owner", sa.String(length=128), nullable=False),
+        sa.Column("acquired_at", sa.DateTime(), nullable=False),
+        sa.Column("heartbeat_at", sa.DateTime(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index(
+        "ix_session_leases_expires_at",
+        "session_leases",
+        ["expires_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_session_leases_expires_at", table_name="session_leases")
+    op.drop_table("session_leases")
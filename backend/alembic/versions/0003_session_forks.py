@@ -0,0 +1,39 @@
+"""Track sessions forked from another session's checkpoint.
+
+Revision ID: 0003_session_forks
+Revises: 0002_session_leases
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0003_session_forks"
+down_revision = "0002_session_leases"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # batch mode so SQLite can add the foreign key (table copy under the hood).
+    with op.batch_alter_table("protocol_sessions") as batch:
+        batch.add_column(sa.Column("parent_session_id", sa.Integer(), nullable=True))
+        batch.add_column(sa.Column("forked_from_checkpoint_id", sa.String(length=128), nullable=True))
+        batch.create_foreign_key(
+            "fk_protocol_sessions_parent_session_id",
+            "protocol_sessions",
+            ["parent_session_id"],
+            ["id"],
+            ondelete="SET NULL",
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("protocol_sessions") as batch:
+        batch.drop_constraint("fk_protocol_sessions_parent_session_id", type_="foreignkey")
+        batch.drop_column("forked_from_checkpoint_id")
+        batch.drop_column("parent_session_id")
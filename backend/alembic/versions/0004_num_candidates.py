@@ -0,0 +1,30 @@
+"""Per-session number of best-of-N draft candidates.
+
+Revision ID: 0004_num_candidates
+Revises: 0003_session_forks
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0004_num_candidates"
+down_revision = "0003_session_forks"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "protocol_sessions",
+        sa.Column("num_candidates", sa.Integer(), nullable=False, server_default="1"),
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("protocol_sessions") as batch:
+        batch.drop_column("num_candidates")
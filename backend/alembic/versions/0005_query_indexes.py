@@ -0,0 +1,44 @@
+"""Indexes for the dashboard, detail-view and runner queries.
+
+Revision ID: 0005_query_indexes
+Revises: 0004_num_candidates
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0005_query_indexes"
+down_revision = "0004_num_candidates"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # selectin loads of session.drafts filter on session_id; ordering by
+    # version_index (and the preview's version 0 lookup) use the second column.
+    op.create_index(
+        "ix_draft_versions_session_id_version_index",
+        "draft_versions",
+        ["session_id", "version_index"],
+    )
+    # selectin loads of session.logs, Last-Event-ID replay (id > ?) and the
+    # latest-event lookup (max(id)) are range reads on (session_id, id).
+    op.create_index("ix_agent_logs_session_id_id", "agent_logs", ["session_id", "id"])
+    # Session listing (newest first) and status-filtered scans (archival).
+    op.create_index(
+        "ix_protocol_sessions_status_created_at",
+        "protocol_sessions",
+        ["status", "created_at"],
+    )
+    op.create_index("ix_protocol_sessions_created_at", "protocol_sessions", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_protocol_sessions_created_at", table_name="protocol_sessions")
+    op.drop_index("ix_protocol_sessions_status_created_at", table_name="protocol_sessions")
+    op.drop_index("ix_agent_logs_session_id_id", table_name="agent_logs")
+    op.drop_index("ix_draft_versions_session_id_version_index", table_name="draft_versions")
@@ -4,10 +4,9 @@ from langgraph.config import get_stream_writer
 from app.core.llm import call_llm
 
 
-def _append_note(state: Dict[str, Any], message: str, agent: str) -> None:
-    notes = list(state.get("notes", []))
-    notes.append(f"[{agent}] {message}")
-    state["notes"] = notes
+def _note(agent: str, message: str) -> str:
+    # Returned under "notes"; the blackboard's reducer appends it.
+    return f"[{agent}] {message}"
 
 
 async def clinical_critic(state: Dict[str, Any]) -> Dict[str, Any]:
@@ -38,8 +37,6 @@ async def clinical_critic(state: Dict[str, Any]) -> Dict[str, Any]:
     except Exception:
         pass
 
-    _append_note(state, f"Empathy score={score:.2f}: {explanation[:200]}", "ClinicalCritic")
-
     stream({
         "agent": "clinical_critic",
         "event": "finish",
@@ -48,5 +45,6 @@ async def clinical_critic(state: Dict[str, Any]) -> Dict[str, Any]:
 
     return {
         "empathy_score": score,
+        "notes": [_note("ClinicalCritic", f"Empathy score={score:.2f}: {explanation[:200]}")],
         "last_agent": "clinical_critic",
     }
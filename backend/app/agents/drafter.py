@@ -3,10 +3,9 @@ from langgraph.config import get_stream_writer
 from app.core.llm import call_llm
 
 
-def _append_note(state: Dict[str, Any], message: str, agent: str) -> None:
-    notes = list(state.get("notes", []))
-    notes.append(f"[{agent}] {message}")
-    state["notes"] = notes
+def _note(agent: str, message: str) -> str:
+    # Returned under "notes"; the blackboard's reducer appends it.
+    return f"[{agent}] {message}"
 
 
 async def drafting_agent(state: Dict[str, Any]) -> Dict[str, Any]:
@@ -43,20 +42,16 @@ async def drafting_agent(state: Dict[str, Any]) -> Dict[str, Any]:
 
     draft = await call_llm(system_prompt, user_prompt)
 
-    draft_versions = list(state.get("draft_versions", []))
-    draft_versions.append(draft)
-
-    _append_note(state, "Produced/updated draft.", "DraftingAgent")
-
     stream({
         "agent": "drafting",
         "event": "finish",
         "draft_preview": draft[:400],
-        "version": len(draft_versions) - 1,
+        "version": len(state.get("draft_versions") or []),
     })
 
     return {
         "current_draft": draft,
-        "draft_versions": draft_versions,
+        "draft_versions": [draft],
+        "notes": [_note("DraftingAgent", "Produced/updated draft.")],
         "last_agent": "drafting",
     }
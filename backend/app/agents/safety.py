@@ -4,10 +4,9 @@ from langgraph.config import get_stream_writer
 from app.core.llm import call_llm
 
 
-def _append_note(state: Dict[str, Any], message: str, agent: str) -> None:
-    notes = list(state.get("notes", []))
-    notes.append(f"[{agent}] {message}")
-    state["notes"] = notes
+def _note(agent: str, message: str) -> str:
+    # Returned under "notes"; the blackboard's reducer appends it.
+    return f"[{agent}] {message}"
 
 
 async def safety_guardian(state: Dict[str, Any]) -> Dict[str, Any]:
@@ -39,8 +38,6 @@ async def safety_guardian(state: Dict[str, Any]) -> Dict[str, Any]:
     except Exception:
         pass
 
-    _append_note(state, f"Safety score={score:.2f}: {explanation[:200]}", "SafetyGuardian")
-
     stream({
         "agent": "safety_guardian",
         "event": "finish",
@@ -49,5 +46,6 @@ async def safety_guardian(state: Dict[str, Any]) -> Dict[str, Any]:
 
     return {
         "safety_score": score,
+        "notes": [_note("SafetyGuardian", f"Safety score={score:.2f}: {explanation[:200]}")],
         "last_agent": "safety_guardian",
     }
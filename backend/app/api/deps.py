@@ -6,7 +6,7 @@ from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.db import get_db
-from app.core.graph import get_graph
+from app.core.graph import get_async_graph
 
 
 async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
@@ -14,5 +14,5 @@ async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
-def get_langgraph():
-    return get_graph()
+async def get_langgraph():
+    return await get_async_graph()
@@ -1,24 +1,24 @@
 from __future__ import annotations
 
-import json
+import hashlib
+import time
 from datetime import datetime
 from typing import AsyncIterator
 
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 import asyncio
-from sqlalchemy import select
-from sse_starlette.sse import EventSourceResponse
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from langgraph.types import Command
-
 from app.api.deps import get_db_session, get_langgraph
-from app.core.graph import new_thread_id, get_graph
+from app.core.graph import NODE_ORDER, fork_write_for, new_thread_id, get_async_graph, reset_list
 from app.core.config import get_settings
 from app.core.llm import call_llm
 from app.core.db import AsyncSessionLocal
+from app.core import archive, export, leases, metrics, querystats, serialization, speculation
+from app.core.serialization import FastJSONResponse
+from app.core.events import STATE_EVENT_TYPES, get_event_hub
 from app.models import ProtocolSession, DraftVersion, AgentLog, SessionStatusEnum
 from app.schemas import (
     AgentLogEntry,
@@ -28,27 +28,61 @@ from app.schemas import (
     CreateProtocolRequest,
     ApproveDraftRequest,
     BlackboardSnapshot,
+    CheckpointInfo,
+    CheckpointPage,
+    ForkSessionRequest,
 )
 
 
 router = APIRouter(prefix="/protocols", tags=["protocols"])
 settings = get_settings()
 
-# In-memory registry of background tasks keyed by session id. This is
-# intentionally simple: tasks are not persisted across process restarts.
-# For production you'd add a process supervisor or persistent job queue.
+# In-memory registry of this worker's background tasks keyed by session id.
+# Tasks are not persisted across process restarts; cross-process exclusion
+# comes from the DB leases in `app.core.leases`, which every run holds.
 BACKGROUND_TASKS: dict[int, asyncio.Task] = {}
 
+# Preview-draft tasks spawned by `create_protocol`, keyed by session id.
+PREVIEW_TASKS: dict[int, asyncio.Task] = {}
+
+# Lease heartbeats (`leases.keep_alive`) of the runs above, keyed by session id.
+LEASE_TASKS: dict[int, asyncio.Task] = {}
+
+
+async def _run_graph(session_id: int, **kwargs) -> None:
+    """Run `_drive_graph` with its SQL cost accounted to the run, not to the
+    request that started it."""
+    with querystats.track_queries(f"run session {session_id}") as stats:
+        try:
+            await _drive_graph(session_id, **kwargs)
+        finally:
+            querystats.report(stats, "run")
+
 
-async def _background_run(session_id: int, initial_state: dict | None) -> None:
-    """Run the LangGraph workflow for a session in the background.
+async def _drive_graph(
+    session_id: int,
+    *,
+    initial_input: dict | None = None,
+    resume_payload: dict | None = None,
+) -> None:
+    """Drive LangGraph for a session and publish its events to the event hub.
 
-    This mirrors the logic in `_graph_stream_to_sse` but writes events to the
-    DB without using SSE. It allows the API to return immediately while the
-    agent graph runs asynchronously.
+    This is the single execution path for a session: `/kickoff`,
+    `/stream/start` and `/stream/resume` all start (at most one of) these
+    runs, and SSE viewers merely subscribe to the session's hub channel.
+    The caller must already hold the session's lease (see `_start_run`);
+    it is released when the run ends.
+
+    - If initial_input is provided, start from scratch.
+    - If resume_payload is provided, continue via Command(resume=...).
+    Always uses the thread_id bound to this session, relying on the
+    SQLite checkpointer to pick up from the previous checkpoint.
     """
+    hub = get_event_hub()
+    status = SessionStatusEnum.ERROR
+    thread_id: str | None = None
     try:
-        graph = get_graph()
+        graph = await get_async_graph()
         async with AsyncSessionLocal() as db:
             # Load session fresh from this DB connection
             result = await db.execute(
@@ -57,65 +91,502 @@ async def _background_run(session_id: int, initial_state: dict | None) -> None:
             session = result.scalar_one_or_none()
             if not session:
                 return
+            thread_id = session.thread_id
 
             session.status = SessionStatusEnum.RUNNING
             await db.commit()
 
-            config = {"configurable": {"thread_id": session.thread_id}}
-            initial_input = initial_state
+            # The deadline bounds this run's provider calls (see app.core.llm);
+            # time spent waiting for a human between runs does not count.
+            config = {
+                "configurable": {
+                    "thread_id": session.thread_id,
+                    "deadline": time.time() + settings.session_deadline_seconds,
+                }
+            }
 
             if initial_input is not None:
-                input_obj = initial_input
+                input_obj: object = initial_input
+            elif resume_payload is not None:
+                payload = dict(resume_payload)
+                speculative = await speculation.claim(session.id, payload.get("approved_draft"))
+                if speculative is not None:
+                    payload["speculative"] = speculative
+                from langgraph.types import Command
+
+                input_obj = Command(resume=payload)
             else:
+                # Resume from latest checkpoint without new input
                 input_obj = None
 
             async for chunk in graph.astream(
                 input_obj,
                 config,
-                stream_mode=["custom", "values", "checkpoints"],
+                # "checkpoints" would repeat every "values" state, doubling
+                # the blackboard traffic; "values" alone is enough.
+                stream_mode=["custom", "values"],
             ):
+                # When using multiple stream modes, chunks are (mode, data)
                 if isinstance(chunk, tuple) and len(chunk) == 2:
                     mode, data = chunk
                 else:
                     mode, data = "values", chunk
 
-                if mode == "custom" and isinstance(data, dict):
-                    await _ingest_custom_event(db, session, data)
+                if mode == "custom":
+                    if isinstance(data, dict):
+                        log_id = await _ingest_custom_event(db, session, data)
+                        hub.publish(session.id, {"id": log_id, "type": "agent_event", "payload": data})
                 elif mode in ("values", "checkpoints"):
                     if isinstance(data, dict):
+                        if "__interrupt__" in data:
+                            # The halt is read from the checkpoint below.
+                            continue
                         state = data.get("values", data)
                     else:
                         state = {"value": data}
                     await _update_session_from_state(db, session, state)
+                    hub.publish(session.id, {"type": "state", "payload": state})
 
-                latest_snapshot = await graph.aget_state(config)
-                if latest_snapshot.interrupts:
-                    session.status = SessionStatusEnum.HALTED_FOR_HUMAN
-                    await db.commit()
-                    break
-
+            # The stream ends when the graph finishes or reaches an interrupt.
+            # Polling the checkpoint after every chunk instead cost a read per
+            # chunk and, on resume, still saw the interrupt being answered.
             final_snapshot = await graph.aget_state(config)
             if final_snapshot.interrupts:
                 session.status = SessionStatusEnum.HALTED_FOR_HUMAN
+                await db.commit()
+                _start_speculation(session, final_snapshot)
+                halt_payload = {
+                    "interrupts": [i.value for i in final_snapshot.interrupts],
+                }
+                log_id = await _record_log(db, session.id, "supervisor", "halt", halt_payload)
+                hub.publish(session.id, {"id": log_id, "type": "halt", "payload": halt_payload})
             elif session.final_protocol:
                 session.status = SessionStatusEnum.COMPLETED
             else:
+                # Execution ended without final_protocol; treat as error state.
                 session.status = SessionStatusEnum.ERROR
             await db.commit()
-    except Exception:
+            status = session.status
+    except asyncio.CancelledError:
+        # Lost lease (see leases.keep_alive) or shutdown. Without this the
+        # row stays RUNNING with no done marker: a zombie session. If another
+        # worker has already taken the thread over, its status is its own.
+        print(f"Graph run cancelled for session {session_id}")
+        try:
+            taken_over = thread_id is not None and await leases.held_elsewhere(thread_id)
+        except Exception:
+            taken_over = False
+        if not taken_over:
+            await _mark_error(session_id)
+        raise
+    except Exception as exc:
+        print(f"Graph run failed for session {session_id}: {exc}")
+        await _mark_error(session_id)
+    finally:
+        # Record the done marker before giving up the lease so viewers on
+        # other workers always see it.
+        done_payload = {"status": status}
+        log_id = None
         try:
             async with AsyncSessionLocal() as db:
-                result = await db.execute(
-                    select(ProtocolSession).where(ProtocolSession.id == session_id)
-                )
-                session = result.scalar_one_or_none()
-                if session:
-                    session.status = SessionStatusEnum.ERROR
-                    await db.commit()
+                log_id = await _record_log(db, session_id, "runner", "done", done_payload)
         except Exception:
             pass
+        if thread_id is not None:
+            try:
+                await leases.release(thread_id)
+            except Exception as exc:
+                print(f"Failed to release lease for session {session_id}: {exc}")
+        hub.publish(session_id, {"id": log_id, "type": "done", "payload": done_payload})
+
+
+async def _mark_error(session_id: int) -> None:
+    try:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(ProtocolSession).where(ProtocolSession.id == session_id)
+            )
+            session = result.scalar_one_or_none()
+            if session:
+                session.status = SessionStatusEnum.ERROR
+                await db.commit()
+    except Exception:
+        pass
+
+
+def _active_run(session_id: int) -> asyncio.Task | None:
+    task = BACKGROUND_TASKS.get(session_id)
+    if task is not None and not task.done():
+        return task
+    return None
+
+
+async def _start_run(session: ProtocolSession, **kwargs) -> asyncio.Task | None:
+    """Start a background graph run unless one is already active.
+
+    Takes the session's DB lease first; returns None if another worker
+    process currently owns the thread.
+    """
+    task = _active_run(session.id)
+    if task is not None:
+        return task
+
+    if not await leases.acquire(session.thread_id):
+        return None
+
+    task = _register_task(session.id, asyncio.create_task(_run_graph(session.id, **kwargs)))
+    heartbeat = asyncio.create_task(leases.keep_alive(session.thread_id, task))
+    LEASE_TASKS[session.id] = heartbeat
+    heartbeat.add_done_callback(
+        lambda t, sid=session.id: LEASE_TASKS.pop(sid, None) if LEASE_TASKS.get(sid) is t else None
+    )
+    return task
+
+
+async def cancel_background_tasks() -> None:
+    """Cancel this worker's runs, previews and lease heartbeats (shutdown).
+
+    Runs go first so each can record its outcome and release its lease
+    before the heartbeats stop.
+    """
+    for group in (BACKGROUND_TASKS, PREVIEW_TASKS, LEASE_TASKS):
+        tasks = list(group.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _register_task(session_id: int, task: asyncio.Task) -> asyncio.Task:
+    BACKGROUND_TASKS[session_id] = task
+    task.add_done_callback(
+        lambda t, sid=session_id: BACKGROUND_TASKS.pop(sid, None)
+        if BACKGROUND_TASKS.get(sid) is t
+        else None
+    )
+    return task
+
+
+async def _replay_logs(
+    session_id: int, status: str, *, speed: float, max_gap: float, start_delay: float
+) -> None:
+    """Re-publish a session's recorded AgentLog events to its hub channel.
+
+    Gaps between events follow their recorded timestamps divided by
+    `speed` (0 = no pauses), each capped at `max_gap` seconds so time spent
+    waiting on a human does not stall the replay. Sessions recorded without
+    a done marker (older exports) get one with their stored `status`, so
+    viewers of the replay always see it end.
+    """
+    hub = get_event_hub()
+    hub.reset(session_id)
+    logs = await _fetch_logs_after(session_id, 0)
+    # Give viewers opening the stream right after the POST time to attach.
+    await asyncio.sleep(start_delay)
+    previous_at = None
+    event: dict | None = None
+    for log in logs:
+        if speed > 0 and previous_at is not None:
+            gap = (log.created_at - previous_at).total_seconds() / speed
+            await asyncio.sleep(min(max(gap, 0.0), max_gap))
+        previous_at = log.created_at
+        event = _log_to_event(log)
+        hub.publish(session_id, event)
+    if event is None or event["type"] != "done":
+        last_id = logs[-1].id if logs else None
+        hub.publish(session_id, {"id": last_id, "type": "done", "payload": {"status": status}})
+    metrics.incr("replay.events", len(logs))
+
+
+# Runner-level log phases that map back onto SSE event types on replay.
+_REPLAY_EVENT_TYPES = {"halt": "halt", "done": "done"}
+
+
+def _log_to_event(log: AgentLog) -> dict:
+    try:
+        data = serialization.loads(log.message)
+    except ValueError:
+        data = {"message": log.message}
+    if not isinstance(data, dict):
+        data = {"value": data}
+
+    event_type = _REPLAY_EVENT_TYPES.get(log.phase) if log.agent_name in ("supervisor", "runner") else None
+    if event_type is not None:
+        return {"id": log.id, "type": event_type, "payload": data}
+    return {"id": log.id, "type": "agent_event", "payload": {"agent": log.agent_name, "event": log.phase, **data}}
+
+
+def _to_sse(event: dict) -> dict:
+    frame = {"data": serialization.dumps({k: v for k, v in event.items() if k != "id"})}
+    if event.get("id") is not None:
+        frame["id"] = str(event["id"])
+    return frame
+
+
+def _last_event_id(request: Request) -> int | None:
+    raw = request.headers.get("last-event-id") or request.query_params.get("last_event_id")
+    if not raw:
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        return None
+
+
+async def _fetch_logs_after(session_id: int, after_id: int) -> list[AgentLog]:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(AgentLog)
+            .where(AgentLog.session_id == session_id, AgentLog.id > after_id)
+            .order_by(AgentLog.id)
+        )
+        return list(result.scalars())
+
+
+async def _latest_log_id(session_id: int) -> int:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(func.max(AgentLog.id)).where(AgentLog.session_id == session_id)
+        )
+        return result.scalar() or 0
 
 
+async def _checkpoint_state_event(thread_id: str, event_id: int | None) -> dict | None:
+    snapshot = await (await get_async_graph()).aget_state({"configurable": {"thread_id": thread_id}})
+    if not snapshot.values:
+        return None
+    return {"id": event_id, "type": "state", "payload": _snapshot_values(snapshot)}
+
+
+async def _replay_outcome(session: ProtocolSession, graph) -> AsyncIterator[dict]:
+    """Where a session's last run left off, for a viewer arriving after it.
+
+    Sends the checkpointed blackboard and then the pending human gate (as
+    `halt`) or a `done` with the session's status, and closes. The frames
+    carry the latest log id so a reconnect has nothing left to replay.
+    """
+    last_id = await _latest_log_id(session.id)
+    snapshot = await graph.aget_state({"configurable": {"thread_id": session.thread_id}})
+    if snapshot.values:
+        yield _to_sse({"id": last_id, "type": "state", "payload": _snapshot_values(snapshot)})
+    if snapshot.interrupts:
+        payload = {"interrupts": [i.value for i in snapshot.interrupts]}
+        yield _to_sse({"id": last_id, "type": "halt", "payload": payload})
+    else:
+        yield _to_sse({"id": last_id, "type": "done", "payload": {"status": session.status}})
+
+
+def _subscribe_sse(
+    session: ProtocolSession,
+    last_event_id: int | None = None,
+    *,
+    remote: bool = False,
+    patches: bool = True,
+) -> AsyncIterator[dict]:
+    """Subscribe to a session's events and relay them to one SSE client.
+
+    Local runs are followed through the in-process hub; the subscription is
+    registered eagerly, before the generator is first iterated, so callers
+    that subscribe right after `_start_run` miss no events. Disconnecting
+    only drops this subscription; the run continues.
+
+    Blackboard updates arrive as one full `state` followed by `state_patch`
+    JSON-Patch deltas, unless `patches=False`.
+
+    With `last_event_id` (a reconnecting browser), persisted events after
+    that id are replayed from `agent_logs` first, then live events follow.
+    With `remote=True` the run belongs to another worker process and events
+    are tailed from `agent_logs` instead of the hub.
+    """
+    if remote:
+        return _tail_remote(session.id, session.thread_id, last_event_id)
+    hub = get_event_hub()
+    sub = hub.subscribe(session.id, replay_state=last_event_id is None, patches=patches)
+    return _relay_events(session, sub, last_event_id)
+
+
+async def _tail_remote(session_id: int, thread_id: str, after_id: int | None) -> AsyncIterator[dict]:
+    """Follow a run owned by another worker by polling `agent_logs`.
+
+    The agent log table doubles as a cross-process notify table: every event
+    a runner publishes is an AgentLog row first, so any worker can relay it.
+    Blackboard state is re-read from the shared checkpoint DB after each batch.
+    """
+    if after_id is None:
+        after_id = await _latest_log_id(session_id)
+        state = await _checkpoint_state_event(thread_id, after_id)
+        if state is not None:
+            yield _to_sse(state)
+
+    while True:
+        logs = await _fetch_logs_after(session_id, after_id)
+        for log in logs:
+            event = _log_to_event(log)
+            after_id = log.id
+            yield _to_sse(event)
+            if event["type"] in ("halt", "done"):
+                return
+        if logs:
+            state = await _checkpoint_state_event(thread_id, after_id)
+            if state is not None:
+                yield _to_sse(state)
+        elif not await leases.held_elsewhere(thread_id):
+            # The owning worker released (or lost) the lease without a done
+            # marker we have not seen yet; nothing more will arrive.
+            return
+        await asyncio.sleep(settings.remote_event_poll_seconds)
+
+
+async def _relay_events(session: ProtocolSession, sub, last_event_id: int | None) -> AsyncIterator[dict]:
+    hub = get_event_hub()
+    session_id = session.id
+    try:
+        if last_event_id is not None:
+            replayed_up_to = last_event_id
+            for log in await _fetch_logs_after(session_id, last_event_id):
+                event = _log_to_event(log)
+                replayed_up_to = log.id
+                yield _to_sse(event)
+                if event["type"] in ("halt", "done") and _active_run(session_id) is None:
+                    return
+
+            if _active_run(session_id) is None:
+                if await leases.held_elsewhere(session.thread_id):
+                    # The run moved to (or lives on) another worker.
+                    async for frame in _tail_remote(session_id, session.thread_id, replayed_up_to):
+                        yield frame
+                # Otherwise nothing live to follow; the client is caught up.
+                return
+
+            # Resync the blackboard once, then continue with live events,
+            # skipping anything the replay already covered. If a state was
+            # published since we subscribed, the buffer already starts with
+            # a full snapshot and later patches build on that instead.
+            state = hub.last_state(session_id)
+            if state is not None and sub.needs_resync:
+                sub.needs_resync = False
+                yield _to_sse(state)
+
+            async for event in sub:
+                event_id = event.get("id")
+                if event.get("type") not in STATE_EVENT_TYPES and event_id is not None and event_id <= replayed_up_to:
+                    continue
+                yield _to_sse(event)
+                if event.get("type") in ("halt", "done"):
+                    break
+            return
+
+        async for event in sub:
+            yield _to_sse(event)
+            if event.get("type") in ("halt", "done"):
+                break
+    finally:
+        hub.unsubscribe(session_id, sub)
+
+
+def _event_source(events: AsyncIterator[dict]):
+    # Imported lazily: sse_starlette is only needed once someone streams.
+    from sse_starlette.sse import EventSourceResponse
+
+    # Periodic comment frames keep proxies and load balancers from timing out
+    # idle streams while the graph waits on the LLM.
+    return EventSourceResponse(events, ping=settings.sse_heartbeat_seconds)
+
+
+def _initial_state(session: ProtocolSession) -> dict:
+    # notes/draft_versions are append-only channels; a restart on the same
+    # thread has to replace them explicitly rather than append to them.
+    return {
+        "intent": session.intent,
+        "iteration": 0,
+        "max_iterations": 3,
+        "num_candidates": session.num_candidates or 1,
+        "notes": reset_list(),
+        "draft_versions": reset_list(),
+    }
+
+
+async def _start_kwargs(session: ProtocolSession, graph) -> dict:
+    """How a fresh `/kickoff` or `/stream/start` should drive the graph.
+
+    A forked session that has not run yet continues from the checkpoint it
+    was forked at instead of starting over; everything else starts fresh.
+    """
+    if session.forked_from_checkpoint_id and session.status == SessionStatusEnum.CREATED:
+        snapshot = await graph.aget_state({"configurable": {"thread_id": session.thread_id}})
+        if snapshot.next and not snapshot.interrupts:
+            return {}
+    return {"initial_input": _initial_state(session)}
+
+
+def _start_speculation(session: ProtocolSession, snapshot) -> None:
+    """Kick off the speculative next pass while the session waits for a human."""
+    values = snapshot.values if isinstance(snapshot.values, dict) else {}
+    try:
+        speculation.maybe_start(session.id, {"intent": session.intent, **values})
+    except Exception as exc:
+        # Speculation is purely an optimization; never fail the run over it.
+        print(f"Could not start speculation for session {session.id}: {exc}")
+
+
+def _placeholder_draft(intent: str) -> str:
+    return f"[Queued draft for intent: {intent}]"
+
+
+async def _generate_preview_draft(session_id: int, intent: str) -> None:
+    """Fill in the placeholder draft of a freshly created session.
+
+    Runs after `create_protocol` has returned. The result is written to the
+    version-0 `DraftVersion` and announced as a `preview/finish` agent event,
+    unless the graph has already produced a real draft in the meantime.
+    """
+    try:
+        draft_text = await call_llm(
+            "You are a CBT protocol designer (brief mode). Produce one short draft.",
+            f"User intent: {intent}\n\nProduce a short, structured CBT exercise in a few lines.",
+            agent="preview",
+        )
+    except Exception as llm_err:
+        print(f"LLM error generating preview draft (keeping placeholder): {llm_err}")
+        return
+
+    placeholder = _placeholder_draft(intent)
+    try:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(DraftVersion).where(
+                    DraftVersion.session_id == session_id,
+                    DraftVersion.version_index == 0,
+                )
+            )
+            draft = result.scalar_one_or_none()
+            if draft is None or draft.content != placeholder:
+                return
+            draft.content = draft_text
+
+            session = await db.get(ProtocolSession, session_id)
+            if session is not None and session.latest_draft == placeholder:
+                session.latest_draft = draft_text
+
+            log = AgentLog(
+                session_id=session_id,
+                agent_name="preview",
+                phase="finish",
+                message=serialization.dumps({"version": 0, "draft_preview": draft_text[:400]}),
+            )
+            db.add(log)
+            await db.commit()
+
+        get_event_hub().publish(
+            session_id,
+            {
+                "id": log.id,
+                "type": "agent_event",
+                "payload": {"agent": "preview", "event": "finish", "version": 0, "draft_preview": draft_text[:400]},
+            },
+        )
+    except Exception as exc:
+        print(f"Failed to store preview draft for session {session_id}: {exc}")
+
 
 async def _load_session(db: AsyncSession, session_id: int) -> ProtocolSession:
     result = await db.execute(
@@ -128,7 +599,7 @@ async def _load_session(db: AsyncSession, session_id: int) -> ProtocolSession:
 
 
 def _session_to_out(session: ProtocolSession) -> ProtocolSessionOut:
-    return ProtocolSessionOut.from_attributes(session)
+    return ProtocolSessionOut.model_validate(session)
 
 
 @router.post("", response_model=ProtocolSessionOut)
@@ -138,8 +609,9 @@ async def create_protocol(
 ):
     """Create a new protocol generation session.
 
-    This only creates DB state. The actual LangGraph execution is driven by
-    the streaming endpoints which use the same thread_id and checkpoint DB.
+    This only creates DB state and returns without waiting on the LLM. The
+    actual LangGraph execution is driven by the streaming endpoints which use
+    the same thread_id and checkpoint DB.
     """
 
     try:
@@ -150,38 +622,33 @@ async def create_protocol(
             thread_id=thread_id,
             status=SessionStatusEnum.CREATED,
             iteration=0,
+            num_candidates=min(payload.num_candidates, settings.max_draft_candidates),
         )
-        db.add(session)
-        await db.commit()
-        await db.refresh(session)
 
-        # Create an immediate placeholder/initial draft so the UI has
-        # something to display right away. If an LLM is configured, try to
-        # generate a quick stub draft; otherwise fall back to a simple
-        # placeholder string. This makes the frontend feel more responsive
-        # when users click Start.
-        try:
-            draft_text = await call_llm(
-                "You are a CBT protocol designer (brief mode). Produce one short draft.",
-                f"User intent: {payload.intent}\n\nProduce a short, structured CBT exercise in a few lines.",
+        # Persist a placeholder draft in the same transaction so the UI has
+        # something to display right away. The LLM preview is generated in the
+        # background and fills this row in later; blocking here made session
+        # creation pay a full provider round-trip (and fail slowly when the
+        # provider was degraded).
+        placeholder = _placeholder_draft(payload.intent)
+        session.latest_draft = placeholder
+        session.drafts.append(
+            DraftVersion(
+                version_index=0,
+                content=placeholder,
+                safety_score=None,
+                empathy_score=None,
             )
-        except Exception as llm_err:
-            print(f"LLM error (using fallback): {llm_err}")
-            draft_text = f"[Queued draft for intent: {payload.intent}]"
-
-        # Persist as an initial draft version
-        draft = DraftVersion(
-            session_id=session.id,
-            version_index=0,
-            content=draft_text,
-            safety_score=None,
-            empathy_score=None,
         )
-        db.add(draft)
-        session.latest_draft = draft_text
+        db.add(session)
         await db.commit()
         await db.refresh(session)
 
+        if settings.preview_draft_enabled:
+            task = asyncio.create_task(_generate_preview_draft(session.id, payload.intent))
+            PREVIEW_TASKS[session.id] = task
+            task.add_done_callback(lambda _t, sid=session.id: PREVIEW_TASKS.pop(sid, None))
+
         return _session_to_out(session)
     except Exception as e:
         print(f"Error creating session: {e}")
@@ -192,18 +659,110 @@ async def create_protocol(
 async def list_sessions(db: AsyncSession = Depends(get_db_session)):
     result = await db.execute(select(ProtocolSession).order_by(ProtocolSession.created_at.desc()))
     sessions = result.scalars().all()
-    return [ProtocolSessionListItem.from_attributes(s) for s in sessions]
+    return [ProtocolSessionListItem.model_validate(s) for s in sessions]
+
+
+# Declared before `/{session_id}` so "export" is not parsed as an id.
+@router.get("/export")
+async def export_sessions(
+    format: str = Query(default="jsonl", description="jsonl or parquet (needs pyarrow)"),
+    status: list[str] = Query(
+        default=[SessionStatusEnum.COMPLETED], description='Statuses to include; "any" for all.'
+    ),
+    created_after: datetime | None = Query(default=None),
+    created_before: datetime | None = Query(default=None),
+    min_safety: float | None = Query(default=None, ge=0.0, le=1.0),
+    min_empathy: float | None = Query(default=None, ge=0.0, le=1.0),
+    include_drafts: bool = Query(default=False),
+    include_logs: bool = Query(default=False),
+    include_archived: bool = Query(default=False),
+    chunk_size: int = Query(default=500, ge=1, le=10000),
+):
+    """Stream every matching session as JSONL or Parquet.
+
+    Rows are paged `chunk_size` at a time, one short read transaction per
+    page, and written out as they are read, so memory use does not grow
+    with the export.
+    """
+    filters = export.ExportFilters(
+        statuses=[] if "any" in status else status,
+        created_after=created_after,
+        created_before=created_before,
+        min_safety=min_safety,
+        min_empathy=min_empathy,
+    )
+    try:
+        body = export.encode(
+            format,
+            filters,
+            drafts=include_drafts,
+            logs=include_logs,
+            include_archived=include_archived,
+            chunk_size=chunk_size,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except export.ExportFormatUnavailable as exc:
+        raise HTTPException(status_code=501, detail=str(exc))
+
+    filename = f"protocols-{datetime.utcnow():%Y%m%dT%H%M%S}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 @router.get("/{session_id}", response_model=ProtocolSessionOut)
 async def get_session(session_id: int, db: AsyncSession = Depends(get_db_session)):
-    session = await _load_session(db, session_id)
-    return _session_to_out(session)
+    result = await db.execute(select(ProtocolSession).where(ProtocolSession.id == session_id))
+    session = result.scalar_one_or_none()
+    if session is not None:
+        return _session_to_out(session)
+
+    # Completed sessions are eventually moved to the archive; serve them
+    # from there (read-only) so their ids keep resolving.
+    record = await archive.load_archived_session(session_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return ProtocolSessionOut.model_validate(record)
+
+
+def _snapshot_values(snapshot) -> dict:
+    return snapshot.values if isinstance(snapshot.values, dict) else {"value": snapshot.values}
+
+
+def _snapshot_checkpoint_id(snapshot) -> str | None:
+    config = getattr(snapshot, "config", None) or {}
+    return config.get("configurable", {}).get("checkpoint_id")
+
+
+def _blackboard_etag(checkpoint_id: str | None, fields: str | None, since: str | None) -> str | None:
+    if not checkpoint_id:
+        return None
+    # The same checkpoint yields different bodies per projection/delta base.
+    variant = hashlib.sha1(f"{fields or ''}|{since or ''}".encode("utf-8")).hexdigest()[:8]
+    return f'W/"{checkpoint_id}-{variant}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in [tag.strip() for tag in header.split(",")]
 
 
 @router.get("/{session_id}/blackboard", response_model=BlackboardSnapshot)
 async def get_blackboard_state(
     session_id: int,
+    request: Request,
+    response: Response,
+    fields: str | None = Query(
+        default=None, description="Comma-separated state keys to return (projection)."
+    ),
+    since: str | None = Query(
+        default=None, description="Checkpoint id; return only keys changed since it."
+    ),
     db: AsyncSession = Depends(get_db_session),
     graph=Depends(get_langgraph),
 ):
@@ -211,16 +770,170 @@ async def get_blackboard_state(
 
     This uses LangGraph's compiled graph aget_state API, which consults the
     SQLite checkpoint DB and returns the last known blackboard state.
+
+    Polling clients should pass `since=<checkpoint_id>` from the previous
+    response (only changed keys are returned) and/or `fields=` to project the
+    keys they render, and send `If-None-Match` with the returned ETag so an
+    unchanged checkpoint costs a bodiless 304.
     """
 
     session = await _load_session(db, session_id)
     config = {"configurable": {"thread_id": session.thread_id}}
     snapshot = await graph.aget_state(config)
 
-    values = snapshot.values if isinstance(snapshot.values, dict) else {"value": snapshot.values}
+    checkpoint_id = _snapshot_checkpoint_id(snapshot)
+    etag = _blackboard_etag(checkpoint_id, fields, since)
+    if etag is not None:
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+
+    values = _snapshot_values(snapshot)
     created_at = getattr(snapshot, "created_at", None)
 
-    return BlackboardSnapshot(state=values, created_at=created_at)
+    changed_keys: list[str] | None = None
+    removed_keys: list[str] | None = None
+    if since:
+        if since == checkpoint_id:
+            base_values = values
+        else:
+            base = await graph.aget_state(
+                {"configurable": {"thread_id": session.thread_id, "checkpoint_id": since}}
+            )
+            # An unknown checkpoint yields an empty state, so the delta
+            # degrades to the full state rather than an error.
+            base_values = _snapshot_values(base)
+        changed_keys = [k for k, v in values.items() if base_values.get(k) != v]
+        removed_keys = [k for k in base_values if k not in values]
+        values = {k: values[k] for k in changed_keys}
+
+    if fields:
+        projection = {f.strip() for f in fields.split(",") if f.strip()}
+        values = {k: v for k, v in values.items() if k in projection}
+        if changed_keys is not None:
+            changed_keys = [k for k in changed_keys if k in projection]
+            removed_keys = [k for k in removed_keys or [] if k in projection]
+
+    return BlackboardSnapshot(
+        state=values,
+        created_at=created_at,
+        checkpoint_id=checkpoint_id,
+        since=since,
+        changed_keys=changed_keys,
+        removed_keys=removed_keys,
+    )
+
+
+def _checkpoint_info(snapshot) -> CheckpointInfo:
+    metadata = snapshot.metadata or {}
+    parent = (getattr(snapshot, "parent_config", None) or {}).get("configurable", {})
+    return CheckpointInfo(
+        checkpoint_id=_snapshot_checkpoint_id(snapshot),
+        parent_checkpoint_id=parent.get("checkpoint_id"),
+        step=metadata.get("step"),
+        source=metadata.get("source"),
+        next=list(snapshot.next or ()),
+        interrupted=bool(getattr(snapshot, "interrupts", None)),
+        created_at=snapshot.created_at,
+    )
+
+
+@router.get("/{session_id}/checkpoints", response_model=CheckpointPage)
+async def list_checkpoints(
+    session_id: int,
+    limit: int = Query(default=20, ge=1, le=200),
+    before: str | None = Query(
+        default=None, description="Only list checkpoints older than this checkpoint_id."
+    ),
+    db: AsyncSession = Depends(get_db_session),
+    graph=Depends(get_langgraph),
+):
+    """Page through a session's checkpoint history, newest first.
+
+    Only metadata is returned (step, source, pending nodes); fetch a
+    checkpoint's values with `/blackboard` or fork from it with `/fork`.
+    """
+    session = await _load_session(db, session_id)
+    config = {"configurable": {"thread_id": session.thread_id}}
+    before_config = (
+        {"configurable": {"thread_id": session.thread_id, "checkpoint_id": before}} if before else None
+    )
+
+    items: list[CheckpointInfo] = []
+    # One extra row tells us whether there is another page.
+    async for snapshot in graph.aget_state_history(config, before=before_config, limit=limit + 1):
+        items.append(_checkpoint_info(snapshot))
+
+    next_before = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_before = items[-1].checkpoint_id
+    return CheckpointPage(items=items, next_before=next_before)
+
+
+@router.post("/{session_id}/fork", response_model=ProtocolSessionOut)
+async def fork_session(
+    session_id: int,
+    payload: ForkSessionRequest,
+    db: AsyncSession = Depends(get_db_session),
+    graph=Depends(get_langgraph),
+):
+    """Create a new session that continues from one of this session's checkpoints.
+
+    The fork gets its own thread seeded with the checkpoint's blackboard
+    (plus any `values` overrides), positioned so that `next_node` runs next.
+    Starting it with `/kickoff` or `/stream/start` then only re-executes the
+    graph from that node on; earlier nodes are not run again.
+    """
+    parent = await _load_session(db, session_id)
+    source_config = {
+        "configurable": {"thread_id": parent.thread_id, "checkpoint_id": payload.checkpoint_id}
+    }
+    source = await graph.aget_state(source_config)
+    if not _snapshot_checkpoint_id(source) or not isinstance(source.values, dict):
+        raise HTTPException(status_code=404, detail="Checkpoint not found")
+
+    next_node = payload.next_node or (source.next[0] if source.next else None)
+    if next_node is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Checkpoint has no pending node; pass next_node (one of {NODE_ORDER})",
+        )
+    try:
+        as_node, extra = fork_write_for(next_node)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    values = {**source.values, **(payload.values or {}), **extra}
+    # A fork starts un-gated even if the source was waiting on a human.
+    values["halted_for_human"] = False
+    values["speculative_next"] = None
+    values["final_protocol"] = None
+
+    fork = ProtocolSession(
+        intent=values.get("intent") or parent.intent,
+        thread_id=new_thread_id(),
+        status=SessionStatusEnum.CREATED,
+        iteration=int(values.get("iteration") or 0),
+        num_candidates=int(values.get("num_candidates") or parent.num_candidates or 1),
+        parent_session_id=parent.id,
+        forked_from_checkpoint_id=payload.checkpoint_id,
+        latest_draft=values.get("current_draft"),
+        safety_score=values.get("safety_score"),
+        empathy_score=values.get("empathy_score"),
+    )
+    # Carry the draft history over so version indices keep lining up with
+    # the blackboard's draft_versions.
+    for idx, content in enumerate(values.get("draft_versions") or []):
+        fork.drafts.append(DraftVersion(version_index=idx, content=content))
+
+    await graph.aupdate_state(
+        {"configurable": {"thread_id": fork.thread_id}}, values, as_node=as_node
+    )
+    db.add(fork)
+    await db.commit()
+    await db.refresh(fork)
+    return _session_to_out(fork)
 
 
 async def _update_session_from_state(db: AsyncSession, session: ProtocolSession, state: dict) -> None:
@@ -235,10 +948,28 @@ async def _update_session_from_state(db: AsyncSession, session: ProtocolSession,
     await db.commit()
 
 
-async def _ingest_custom_event(db: AsyncSession, session: ProtocolSession, event: dict) -> None:
+async def _record_log(db: AsyncSession, session_id: int, agent: str, phase: str, payload: dict) -> int:
+    """Persist a runner-level event (halt/done) so SSE clients can replay it."""
+    log = AgentLog(
+        session_id=session_id,
+        agent_name=agent,
+        phase=phase,
+        message=serialization.dumps(payload),
+    )
+    db.add(log)
+    await db.commit()
+    return log.id
+
+
+async def _ingest_custom_event(db: AsyncSession, session: ProtocolSession, event: dict) -> int:
+    """Persist a graph `custom` event and return its AgentLog id.
+
+    The id doubles as the SSE event id, which is what makes streams resumable
+    via `Last-Event-ID`.
+    """
     agent = event.get("agent", "unknown")
     phase = event.get("event", "event")
-    message = json.dumps({k: v for k, v in event.items() if k not in {"agent", "event"}})
+    message = serialization.dumps({k: v for k, v in event.items() if k not in {"agent", "event"}})
 
     log = AgentLog(
         session_id=session.id,
@@ -262,84 +993,7 @@ async def _ingest_custom_event(db: AsyncSession, session: ProtocolSession, event
             db.add(draft)
 
     await db.commit()
-
-
-async def _graph_stream_to_sse(
-    *,
-    session: ProtocolSession,
-    db: AsyncSession,
-    graph,
-    initial_input: dict | None,
-    resume_payload: dict | None,
-) -> AsyncIterator[dict]:
-    """Drive LangGraph and yield structured events for SSE clients.
-
-    - If initial_input is provided, start from scratch.
-    - If resume_payload is provided, continue via Command(resume=...).
-    Always uses the thread_id bound to this session, relying on the
-    SQLite checkpointer to pick up from the previous checkpoint.
-    """
-
-    session.status = SessionStatusEnum.RUNNING
-    await db.commit()
-
-    config = {"configurable": {"thread_id": session.thread_id}}
-
-    if initial_input is not None:
-        input_obj: object = initial_input
-    elif resume_payload is not None:
-        input_obj = Command(resume=resume_payload)
-    else:
-        # Resume from latest checkpoint without new input
-        input_obj = None
-
-    async for chunk in graph.astream(
-        input_obj,
-        config,
-        stream_mode=["custom", "values", "checkpoints"],
-    ):
-        # When using multiple stream modes, chunks are (mode, data)
-        if isinstance(chunk, tuple) and len(chunk) == 2:
-            mode, data = chunk
-        else:
-            mode, data = "values", chunk
-
-        if mode == "custom":
-            if isinstance(data, dict):
-                await _ingest_custom_event(db, session, data)
-                yield {"type": "agent_event", "payload": data}
-        elif mode in ("values", "checkpoints"):
-            if isinstance(data, dict):
-                state = data.get("values", data)
-            else:
-                state = {"value": data}
-            await _update_session_from_state(db, session, state)
-            yield {"type": "state", "payload": state}
-
-        # Interrupts are exposed via the checkpoint state under "interrupts".
-        # We also check the session status to know when to stop streaming.
-        latest_snapshot = await graph.aget_state(config)
-        if latest_snapshot.interrupts:
-            session.status = SessionStatusEnum.HALTED_FOR_HUMAN
-            await db.commit()
-            yield {
-                "type": "halt",
-                "payload": {
-                    "interrupts": [i.value for i in latest_snapshot.interrupts],
-                },
-            }
-            break
-
-    # Re-read final state to decide if we finished.
-    final_snapshot = await graph.aget_state(config)
-    if final_snapshot.interrupts:
-        session.status = SessionStatusEnum.HALTED_FOR_HUMAN
-    elif session.final_protocol:
-        session.status = SessionStatusEnum.COMPLETED
-    else:
-        # Execution ended without final_protocol; treat as error state.
-        session.status = SessionStatusEnum.ERROR
-    await db.commit()
+    return log.id
 
 
 @router.post("/{session_id}/kickoff")
@@ -356,56 +1010,108 @@ async def kickoff_session(
     """
 
     session = await _load_session(db, session_id)
-    if session.status == SessionStatusEnum.RUNNING:
-        return JSONResponse({"detail": "Session already running"}, status_code=400)
+    # The DB lease, not `session.status`, is the source of truth: a RUNNING
+    # status left behind by a crashed worker must not block a new run.
+    if _active_run(session.id) is not None or await leases.held_elsewhere(session.thread_id):
+        return FastJSONResponse({"detail": "Session already running"}, status_code=400)
 
-    initial_state = {
-        "intent": session.intent,
-        "iteration": session.iteration or 0,
-        "max_iterations": 3,
-        "notes": session.drafts and [] or [],
-        "draft_versions": [],
-    }
+    speculation.discard(session.id)
+    get_event_hub().reset(session.id)
+    if await _start_run(session, **await _start_kwargs(session, graph)) is None:
+        return FastJSONResponse({"detail": "Session already running"}, status_code=400)
 
-    # Start background task
-    task = asyncio.create_task(_background_run(session.id, initial_state))
-    BACKGROUND_TASKS[session.id] = task
+    return FastJSONResponse({"detail": "Kickoff started"}, status_code=202)
 
-    return JSONResponse({"detail": "Kickoff started"}, status_code=202)
+
+@router.post("/{session_id}/replay")
+async def replay_session(
+    session_id: int,
+    speed: float = Query(default=1.0, ge=0.0, description="Playback speed; 0 replays without pauses."),
+    max_gap_seconds: float = Query(default=5.0, ge=0.0),
+    start_delay_seconds: float = Query(default=1.0, ge=0.0),
+    db: AsyncSession = Depends(get_db_session),
+):
+    """Re-emit a session's recorded events onto its live event stream.
+
+    Nothing is executed or written: the stored agent logs are published to
+    the session's channel as if the run were happening now, so
+    `/stream/start` (and `/stream/resume` after a halt) attach to the replay
+    like to a live run. Useful for demos and for load-testing viewers
+    against imported sessions. The replay lives in the worker that received
+    this request; with several workers, viewers must reach the same one.
+    """
+    session = await _load_session(db, session_id)
+    if _active_run(session.id) is not None or await leases.held_elsewhere(session.thread_id):
+        return FastJSONResponse({"detail": "Session already running"}, status_code=400)
+
+    _register_task(
+        session.id,
+        asyncio.create_task(
+            _replay_logs(
+                session.id,
+                session.status,
+                speed=speed,
+                max_gap=max_gap_seconds,
+                start_delay=start_delay_seconds,
+            )
+        ),
+    )
+    return FastJSONResponse({"detail": "Replay started"}, status_code=202)
 
 
 @router.get("/{session_id}/stream/start")
 async def stream_start(
     session_id: int,
+    request: Request,
+    patches: bool = Query(
+        default=True, description="Send state_patch deltas after the first full state."
+    ),
+    restart: bool = Query(
+        default=False, description="Run the session again from the beginning even if it has run before."
+    ),
     db: AsyncSession = Depends(get_db_session),
     graph=Depends(get_langgraph),
 ):
-    """Start or restart a session from the beginning and stream events via SSE.
-
-    This endpoint will run the graph until it either halts for human review
-    (mandatory interrupt before finalization) or finishes due to error.
+    """Stream a session's events via SSE, starting a run if none is active.
+
+    If the session is already running (e.g. after `/kickoff`, or another
+    viewer started it) this only attaches to the live event stream. A
+    session that has not run yet is started and streamed until it either
+    halts for human review (mandatory interrupt before finalization) or
+    finishes due to error. A session whose run already halted or ended is
+    not run again: the viewer gets its current blackboard and the pending
+    `halt` (or a `done`), unless `restart=true` asks for a fresh run.
+
+    A reconnect carrying `Last-Event-ID` never (re)starts a run: it replays
+    the events after that id and then follows the live run, if any. Because
+    every (re)connection starts with a full `state`, reconnecting is also how
+    a client whose patches no longer apply requests a full resync.
     """
 
     session = await _load_session(db, session_id)
 
-    async def event_publisher() -> AsyncIterator[dict]:
-        initial_state = {
-            "intent": session.intent,
-            "iteration": 0,
-            "max_iterations": 3,
-            "notes": [],
-            "draft_versions": [],
-        }
-        async for event in _graph_stream_to_sse(
-            session=session,
-            db=db,
-            graph=graph,
-            initial_input=initial_state,
-            resume_payload=None,
-        ):
-            yield json.dumps(event)
-
-    return EventSourceResponse(event_publisher())
+    last_event_id = _last_event_id(request)
+    if last_event_id is not None:
+        return _event_source(_subscribe_sse(session, last_event_id, patches=patches))
+
+    if _active_run(session.id) is not None:
+        return _event_source(_subscribe_sse(session, patches=patches))
+    if await leases.held_elsewhere(session.thread_id):
+        return _event_source(_subscribe_sse(session, remote=True, patches=patches))
+    if session.status != SessionStatusEnum.CREATED and not restart:
+        return _event_source(_replay_outcome(session, graph))
+
+    # Restarting from scratch invalidates any speculative work for this session.
+    speculation.discard(session.id)
+    get_event_hub().reset(session.id)
+    run_kwargs = await _start_kwargs(session, graph)
+    if await _start_run(session, **run_kwargs) is None:
+        # Lost the race for the lease to another worker; follow its run.
+        return _event_source(_subscribe_sse(session, remote=True, patches=patches))
+
+    # No await between starting the task and subscribing, so the run cannot
+    # publish anything before this viewer is registered.
+    return _event_source(_subscribe_sse(session, patches=patches))
 
 
 @router.post("/{session_id}/approve", response_model=ProtocolSessionOut)
@@ -437,6 +1143,10 @@ async def approve_draft(
 @router.get("/{session_id}/stream/resume")
 async def stream_resume(
     session_id: int,
+    request: Request,
+    patches: bool = Query(
+        default=True, description="Send state_patch deltas after the first full state."
+    ),
     db: AsyncSession = Depends(get_db_session),
     graph=Depends(get_langgraph),
 ):
@@ -448,21 +1158,23 @@ async def stream_resume(
     """
 
     session = await _load_session(db, session_id)
+
+    last_event_id = _last_event_id(request)
+    if last_event_id is not None:
+        return _event_source(_subscribe_sse(session, last_event_id, patches=patches))
+
+    # Someone already resumed this session; just follow along.
+    if _active_run(session.id) is not None:
+        return _event_source(_subscribe_sse(session, patches=patches))
+    if await leases.held_elsewhere(session.thread_id):
+        return _event_source(_subscribe_sse(session, remote=True, patches=patches))
+
     if session.status != SessionStatusEnum.HALTED_FOR_HUMAN:
         raise HTTPException(status_code=400, detail="Session is not awaiting human approval")
 
     if not session.human_edited_draft:
         raise HTTPException(status_code=400, detail="No human-edited draft stored for this session")
 
-    async def event_publisher() -> AsyncIterator[dict]:
-        resume_payload = {"approved_draft": session.human_edited_draft}
-        async for event in _graph_stream_to_sse(
-            session=session,
-            db=db,
-            graph=graph,
-            initial_input=None,
-            resume_payload=resume_payload,
-        ):
-            yield json.dumps(event)
-
-    return EventSourceResponse(event_publisher())
+    if await _start_run(session, resume_payload={"approved_draft": session.human_edited_draft}) is None:
+        return _event_source(_subscribe_sse(session, remote=True, patches=patches))
+    return _event_source(_subscribe_sse(session, patches=patches))
@@ -0,0 +1,394 @@
+from __future__ import annotations
+
+import argparse
+import pathlib
+import subprocess
+import sys
+
+from app.core.config import get_settings
+
+
+# Operational command line for the backend. Run from `backend/`:
+#
+#     python -m app.cli <command> [options]
+
+BACKEND_DIR = pathlib.Path(__file__).resolve().parents[1]
+
+
+def _run_app(coro):
+    """`asyncio.run` for commands that use the app's databases.
+
+    Closes the checkpointer and the engine pool inside the same loop, since
+    their aiosqlite threads would otherwise keep the process from exiting.
+    """
+    import asyncio
+
+    async def main():
+        from app.core.db import engine
+        from app.core.graph import aclose_async_checkpointer
+
+        try:
+            return await coro
+        finally:
+            await aclose_async_checkpointer()
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+def _parse_importtime(stderr: str) -> list[tuple[int, int, str]]:
+    """Parse `python -X importtime` output into (self_us, cumulative_us, module)."""
+    rows: list[tuple[int, int, str]] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            _, rest = line.split(":", 1)
+            self_us, cumulative_us, module = rest.split("|", 2)
+            # Keep the nesting indentation; drop only the separator's space.
+            rows.append((int(self_us), int(cumulative_us), module[1:].rstrip()))
+        except ValueError:
+            continue
+    return rows
+
+
+def cmd_startup_report(args: argparse.Namespace) -> int:
+    """Report what `import app.main` costs and enforce the startup budget.
+
+    Runs the import in a fresh interpreter under `-X importtime`, prints the
+    most expensive modules by cumulative time, and exits non-zero when the
+    total exceeds the budget so CI can fail on cold-start regressions.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {args.module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        print(proc.stderr, file=sys.stderr)
+        print(f"Importing {args.module} failed.", file=sys.stderr)
+        return 2
+
+    rows = _parse_importtime(proc.stderr)
+    # Top-level imports (no leading indentation) add up to the total cost.
+    total_us = sum(cum for _, cum, module in rows if not module.startswith(" "))
+
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for self_us, cum_us, module in sorted(rows, key=lambda r: r[1], reverse=True)[: args.top]:
+        print(f"{cum_us / 1000:14.1f} {self_us / 1000:9.1f}  {module.strip()}")
+
+    budget_ms = args.budget_ms if args.budget_ms is not None else get_settings().startup_import_budget_ms
+    total_ms = total_us / 1000
+    print(f"\nimport {args.module}: {total_ms:.1f} ms (budget {budget_ms} ms)")
+    if total_ms > budget_ms:
+        print("Startup import budget exceeded.", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _sample_blackboard(drafts: int, draft_chars: int) -> dict:
+    draft = ("1. Notice the thought. 2. Rate the feeling (0-10). 3. Look for evidence. " * 64)[:draft_chars]
+    return {
+        "intent": "Create an exposure hierarchy for agoraphobia",
+        "current_draft": draft,
+        "draft_versions": [f"v{i}: {draft}" for i in range(drafts)],
+        "notes": [f"[Agent{i % 4}] Score={i / drafts:.2f}: {draft[:200]}" for i in range(drafts * 4)],
+        "safety_score": 0.91,
+        "empathy_score": 0.78,
+        "iteration": drafts,
+        "max_iterations": drafts + 1,
+        "halted_for_human": False,
+    }
+
+
+def cmd_bench_serialize(args: argparse.Namespace) -> int:
+    """Micro-benchmark the SSE/response serializer on a large blackboard state."""
+    import json
+    import timeit
+
+    from app.core import serialization
+
+    event = {"type": "state", "payload": _sample_blackboard(args.drafts, args.draft_chars)}
+    size = len(serialization.dumps_bytes(event))
+
+    candidates = {
+        "json.dumps (stdlib)": lambda: json.dumps(event),
+        f"serialization.dumps ({serialization.BACKEND})": lambda: serialization.dumps(event),
+    }
+    print(f"payload: {size / 1024:.1f} KiB, {args.number} iterations")
+    results = {}
+    for name, fn in candidates.items():
+        best = min(timeit.repeat(fn, number=args.number, repeat=5)) / args.number
+        results[name] = best
+        print(f"{name:>32}: {best * 1e6:10.1f} us/op")
+
+    baseline, fast = results.values()
+    print(f"speedup: {baseline / fast:.1f}x")
+    return 0
+
+
+def cmd_archive(args: argparse.Namespace) -> int:
+    """Move old completed sessions out of the hot DB into archive segments."""
+    from app.core import archive, serialization
+
+    summary = _run_app(
+        archive.archive_completed(
+            args.older_than_days,
+            batch_size=args.batch_size,
+            dry_run=args.dry_run,
+            full_vacuum=args.full_vacuum,
+        )
+    )
+    print(serialization.dumps(summary))
+    return 0
+
+
+def cmd_export(args: argparse.Namespace) -> int:
+    """Stream matching sessions to a JSONL or Parquet file (JSONL may go to stdout)."""
+    from datetime import datetime
+
+    from app.core import export
+    from app.models import SessionStatusEnum
+
+    statuses = args.status or [SessionStatusEnum.COMPLETED]
+    filters = export.ExportFilters(
+        statuses=[] if "any" in statuses else statuses,
+        created_after=datetime.fromisoformat(args.created_after) if args.created_after else None,
+        created_before=datetime.fromisoformat(args.created_before) if args.created_before else None,
+        min_safety=args.min_safety,
+        min_empathy=args.min_empathy,
+    )
+    if args.format == "parquet" and args.output == "-":
+        print("Parquet output needs --output FILE.", file=sys.stderr)
+        return 2
+    try:
+        body = export.encode(
+            args.format,
+            filters,
+            drafts=args.drafts,
+            logs=args.logs,
+            include_archived=args.archived,
+            chunk_size=args.chunk_size,
+        )
+    except export.ExportFormatUnavailable as exc:
+        print(str(exc), file=sys.stderr)
+        return 2
+
+    async def write() -> int:
+        written = 0
+        out = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+        try:
+            async for data in body:
+                out.write(data)
+                written += len(data)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+        return written
+
+    written = _run_app(write())
+    if args.output != "-":
+        print(f"Wrote {written / 1024:.1f} KiB to {args.output}", file=sys.stderr)
+    return 0
+
+
+def cmd_import(args: argparse.Namespace) -> int:
+    """Bulk-load sessions from a JSONL or Parquet export."""
+    from app.core import bulk_import, serialization
+
+    summary = _run_app(
+        bulk_import.import_sessions(
+            bulk_import.read_records(args.path, args.format),
+            batch_size=args.batch_size,
+            new_ids=args.new_ids,
+            defer_indexes=not args.keep_indexes,
+            rehydrate_checkpoints=args.checkpoints,
+        )
+    )
+    print(serialization.dumps(summary))
+    return 0
+
+
+def cmd_replay(args: argparse.Namespace) -> int:
+    """Ask a running server to re-emit recorded sessions onto their live streams."""
+    import httpx
+
+    settings = get_settings()
+    failed = 0
+    with httpx.Client(base_url=f"{args.base_url}{settings.api_prefix}/protocols", timeout=30) as client:
+        for session_id in args.session_ids:
+            response = client.post(
+                f"/{session_id}/replay",
+                params={
+                    "speed": args.speed,
+                    "max_gap_seconds": args.max_gap_seconds,
+                    "start_delay_seconds": args.start_delay_seconds,
+                },
+            )
+            if response.status_code != 202:
+                failed += 1
+            print(f"session {session_id}: {response.status_code} {response.json().get('detail')}")
+    return 1 if failed else 0
+
+
+def cmd_query_plan(args: argparse.Namespace) -> int:
+    """Fail if any hot query is planned as a full table scan."""
+    from app.core.query_plans import audit
+
+    results = audit(args.db)
+    for result in results:
+        status = "ok  " if result.ok else "SCAN"
+        print(f"[{status}] {result.name}")
+        if args.verbose or not result.ok:
+            print(f"       {result.sql}")
+            for detail in result.plan:
+                print(f"       -> {detail}")
+        for detail in result.temp_sorts:
+            print(f"       note: {detail}")
+
+    failed = [r for r in results if not r.ok]
+    if failed:
+        print(f"\n{len(failed)} hot queries fall back to full table scans.", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_loadtest(args: argparse.Namespace) -> int:
+    """Drive simulated users through the full API and report latencies."""
+    import asyncio
+
+    from app import loadtest
+    from app.core import serialization
+
+    report = asyncio.run(
+        loadtest.run(
+            users=args.users,
+            arrival_rate=args.arrival_rate,
+            base_url=args.base_url,
+            port=args.port,
+            workers=args.workers,
+            fake_latency_ms=args.fake_latency_ms,
+            fake_jitter_ms=args.fake_jitter_ms,
+            ready_timeout=args.ready_timeout,
+            request_timeout=args.timeout,
+            workdir=args.workdir,
+        )
+    )
+    if args.json:
+        print(serialization.dumps(report))
+    else:
+        loadtest.print_report(report)
+    return 1 if report["failed"] else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Cerina backend utilities")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("startup-report", help="Import-time report for the app with a startup budget check")
+    p.add_argument("--module", default="app.main", help="Module to import (default: app.main)")
+    p.add_argument("--top", type=int, default=25, help="Number of modules to list")
+    p.add_argument("--budget-ms", type=int, default=None, help="Override CERINA_STARTUP_IMPORT_BUDGET_MS")
+    p.set_defaults(func=cmd_startup_report)
+
+    p = sub.add_parser("bench-serialize", help="Compare stdlib json with the fast serializer")
+    p.add_argument("--drafts", type=int, default=30, help="Number of draft versions in the sample state")
+    p.add_argument("--draft-chars", type=int, default=4000, help="Characters per draft")
+    p.add_argument("--number", type=int, default=200, help="Iterations per timing run")
+    p.set_defaults(func=cmd_bench_serialize)
+
+    p = sub.add_parser("query-plan", help="EXPLAIN QUERY PLAN audit of the hot queries")
+    p.add_argument("--db", default=None, help="Audit this SQLite file instead of a schema built from the models")
+    p.add_argument("-v", "--verbose", action="store_true", help="Print SQL and plan for every query")
+    p.set_defaults(func=cmd_query_plan)
+
+    p = sub.add_parser("archive", help="Archive sessions completed more than N days ago")
+    p.add_argument(
+        "--older-than-days", type=float, default=None, help="Override CERINA_ARCHIVE_AFTER_DAYS"
+    )
+    p.add_argument("--batch-size", type=int, default=200, help="Sessions moved per transaction")
+    p.add_argument("--dry-run", action="store_true", help="Only count what would be archived")
+    p.add_argument(
+        "--full-vacuum",
+        action="store_true",
+        help="Switch the databases to incremental auto-vacuum (one full VACUUM) if needed",
+    )
+    p.set_defaults(func=cmd_archive)
+
+    p = sub.add_parser("export", help="Export sessions to JSONL or Parquet")
+    p.add_argument("--format", choices=("jsonl", "parquet"), default="jsonl")
+    p.add_argument("-o", "--output", default="-", help="Output file (default: stdout, JSONL only)")
+    p.add_argument(
+        "--status",
+        action="append",
+        default=None,
+        help='Status to include; repeatable, "any" for all (default: completed)',
+    )
+    p.add_argument("--created-after", default=None, help="ISO date/time, inclusive")
+    p.add_argument("--created-before", default=None, help="ISO date/time, exclusive")
+    p.add_argument("--min-safety", type=float, default=None)
+    p.add_argument("--min-empathy", type=float, default=None)
+    p.add_argument("--drafts", action="store_true", help="Include draft history")
+    p.add_argument("--logs", action="store_true", help="Include agent logs")
+    p.add_argument("--archived", action="store_true", help="Include archived sessions")
+    p.add_argument("--chunk-size", type=int, default=500, help="Rows fetched and written per chunk")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("import", help="Bulk-load sessions from an export file")
+    p.add_argument("path", help="JSONL or .parquet file written by `export`")
+    p.add_argument("--format", choices=("jsonl", "parquet"), default=None, help="Default: from the file suffix")
+    p.add_argument("--batch-size", type=int, default=2000, help="Sessions per transaction")
+    p.add_argument(
+        "--new-ids", action="store_true", help="Give every session a new id and thread id"
+    )
+    p.add_argument(
+        "--keep-indexes",
+        action="store_true",
+        help="Maintain secondary indexes during the load instead of rebuilding them at the end",
+    )
+    p.add_argument(
+        "--checkpoints", action="store_true", help="Also write a LangGraph checkpoint per session"
+    )
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("replay", help="Re-emit recorded session events on a running server")
+    p.add_argument("session_ids", type=int, nargs="+")
+    p.add_argument("--base-url", default="http://localhost:8000")
+    p.add_argument("--speed", type=float, default=1.0, help="Playback speed (0 = no pauses)")
+    p.add_argument("--max-gap-seconds", type=float, default=5.0, help="Longest pause between events")
+    p.add_argument(
+        "--start-delay-seconds", type=float, default=1.0, help="Pause before the first event"
+    )
+    p.set_defaults(func=cmd_replay)
+
+    p = sub.add_parser("loadtest", help="Load-test full session lifecycles against a local server")
+    p.add_argument("--users", type=int, default=20, help="Simulated users (one session each)")
+    p.add_argument(
+        "--arrival-rate", type=float, default=5.0, help="Mean new users per second (0 = all at once)"
+    )
+    p.add_argument(
+        "--base-url", default=None, help="Test an already running server instead of starting one"
+    )
+    p.add_argument("--port", type=int, default=8765, help="Port for the spawned server")
+    p.add_argument("--workers", type=int, default=1, help="uvicorn workers for the spawned server")
+    p.add_argument("--fake-latency-ms", type=float, default=200.0, help="Injected fake LLM latency")
+    p.add_argument("--fake-jitter-ms", type=float, default=100.0, help="Random extra fake LLM latency")
+    p.add_argument("--ready-timeout", type=float, default=60.0, help="Seconds to wait for /ready")
+    p.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    p.add_argument(
+        "--workdir", default=None, help="Keep the spawned server's databases and log here"
+    )
+    p.add_argument("--json", action="store_true", help="Print the report as JSON")
+    p.set_defaults(func=cmd_loadtest)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
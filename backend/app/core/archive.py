@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, func, select
+
+from app.core import metrics, serialization
+from app.core.config import get_settings
+from app.core.db import AsyncSessionLocal, engine
+from app.core.records import session_to_record
+from app.models import AgentLog, DraftVersion, ProtocolSession, SessionStatusEnum
+
+
+# Cold storage for finished sessions.
+#
+# Sessions completed more than `archive_after_days` ago are moved out of the
+# hot app DB into append-only segment files under `archive_dir`. Every
+# session record is written as its own gzip member, so a segment is a valid
+# .gz file as a whole (`zcat segment-000001.jsonl.gz` prints one JSON record
+# per line) while a single record can still be read by seeking to its
+# offset. A small SQLite index maps session ids to (segment, offset, length).
+#
+# Records are appended and indexed before the hot rows are deleted, so a
+# crash mid-run at worst leaves a record archived twice; the index always
+# points at the latest copy.
+
+_SEGMENT_RE = re.compile(r"^segment-(\d{6})\.jsonl\.gz$")
+
+
+class ArchiveStore:
+    def __init__(self, root: str | os.PathLike, segment_max_bytes: int) -> None:
+        self.root = Path(root)
+        self.segment_max_bytes = segment_max_bytes
+        self._lock = threading.Lock()
+
+    def _index(self) -> sqlite3.Connection:
+        self.root.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.root / "index.db")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS archived_sessions ("
+            " session_id INTEGER PRIMARY KEY,"
+            " thread_id TEXT NOT NULL,"
+            " segment TEXT NOT NULL,"
+            " offset INTEGER NOT NULL,"
+            " length INTEGER NOT NULL,"
+            " status TEXT,"
+            " created_at TEXT,"
+            " archived_at TEXT NOT NULL)"
+        )
+        return conn
+
+    def _current_segment(self) -> Path:
+        numbers = [
+            int(m.group(1)) for m in (_SEGMENT_RE.match(p.name) for p in self.root.iterdir()) if m
+        ]
+        number = max(numbers, default=1)
+        path = self.root / f"segment-{number:06d}.jsonl.gz"
+        if path.exists() and path.stat().st_size >= self.segment_max_bytes:
+            path = self.root / f"segment-{number + 1:06d}.jsonl.gz"
+        return path
+
+    def append(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Append records to the current segment and index them."""
+        with self._lock:
+            conn = self._index()
+            try:
+                segment = self._current_segment()
+                rows = []
+                with open(segment, "ab") as fh:
+                    for record in records:
+                        member = gzip.compress(serialization.dumps_bytes(record) + b"\n")
+                        offset = fh.tell()
+                        fh.write(member)
+                        rows.append((
+                            record["id"],
+                            record["thread_id"],
+                            segment.name,
+                            offset,
+                            len(member),
+                            record.get("status"),
+                            record.get("created_at"),
+                            datetime.utcnow().isoformat(),
+                        ))
+                    fh.flush()
+                    os.fsync(fh.fileno())
+                conn.executemany(
+                    "INSERT OR REPLACE INTO archived_sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
+                conn.commit()
+                return len(rows)
+            finally:
+                conn.close()
+
+    def get(self, session_id: int) -> Optional[Dict[str, Any]]:
+        index = self.root / "index.db"
+        if not index.exists():
+            return None
+        conn = sqlite3.connect(index)
+        try:
+            row = conn.execute(
+                "SELECT segment, offset, length FROM archived_sessions WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        segment, offset, length = row
+        with open(self.root / segment, "rb") as fh:
+            fh.seek(offset)
+            return serialization.loads(gzip.decompress(fh.read(length)))
+
+    def read_page(
+        self,
+        *,
+        statuses: Optional[List[str]] = None,
+        created_after: Optional[str] = None,
+        created_before: Optional[str] = None,
+        after_session_id: int = 0,
+        limit: int = 500,
+    ) -> List[Dict[str, Any]]:
+        """Up to `limit` archived records matching the filters, by session id.
+
+        Pass the last id of one page as `after_session_id` to get the next.
+        Each call opens and closes its own index connection, so pages can be
+        read from whichever thread `asyncio.to_thread` picks.
+        """
+        index = self.root / "index.db"
+        if not index.exists():
+            return []
+        where, params = ["session_id > ?"], [after_session_id]
+        if statuses:
+            where.append(f"status IN ({', '.join('?' for _ in statuses)})")
+            params.extend(statuses)
+        if created_after:
+            where.append("created_at >= ?")
+            params.append(created_after)
+        if created_before:
+            where.append("created_at < ?")
+            params.append(created_before)
+        conn = sqlite3.connect(index)
+        try:
+            rows = conn.execute(
+                "SELECT segment, offset, length FROM archived_sessions"
+                f" WHERE {' AND '.join(where)} ORDER BY session_id LIMIT ?",
+                [*params, limit],
+            ).fetchall()
+        finally:
+            conn.close()
+
+        # Read in file order, return in id order.
+        members: Dict[tuple, Dict[str, Any]] = {}
+        fh = None
+        current = None
+        try:
+            for segment, offset, length in sorted(rows):
+                if segment != current:
+                    if fh is not None:
+                        fh.close()
+                    fh = open(self.root / segment, "rb")
+                    current = segment
+                fh.seek(offset)
+                members[(segment, offset)] = serialization.loads(gzip.decompress(fh.read(length)))
+        finally:
+            if fh is not None:
+                fh.close()
+        return [members[(segment, offset)] for segment, offset, _ in rows]
+
+
+_store: ArchiveStore | None = None
+
+
+def get_archive() -> ArchiveStore:
+    global _store
+    if _store is None:
+        settings = get_settings()
+        _store = ArchiveStore(settings.archive_dir, settings.archive_segment_max_bytes)
+    return _store
+
+
+async def load_archived_session(session_id: int) -> Optional[Dict[str, Any]]:
+    record = await asyncio.to_thread(get_archive().get, session_id)
+    if record is not None:
+        metrics.incr("archive.reads")
+    return record
+
+
+def _purge_checkpoints(thread_ids: List[str]) -> int:
+    """Delete LangGraph checkpoints and pending writes of archived threads."""
+    path = get_settings().checkpoint_db_path
+    if not thread_ids or not os.path.exists(path):
+        return 0
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        placeholders = ",".join("?" * len(thread_ids))
+        purged = 0
+        for table in ("checkpoints", "writes"):
+            if table in tables:
+                cur = conn.execute(f"DELETE FROM {table} WHERE thread_id IN ({placeholders})", thread_ids)
+                if table == "checkpoints":
+                    purged = cur.rowcount
+        conn.commit()
+        return purged
+    finally:
+        conn.close()
+
+
+def _vacuum_checkpoints(full: bool) -> int:
+    path = get_settings().checkpoint_db_path
+    if not os.path.exists(path):
+        return 0
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    try:
+        return _vacuum(lambda sql: conn.execute(sql).fetchone(), full)
+    finally:
+        conn.close()
+
+
+def _vacuum(query, full: bool) -> int:
+    """Return free pages to the OS; returns the number of pages released.
+
+    Incremental vacuum only works once `auto_vacuum=INCREMENTAL` is set,
+    which on an existing file takes one full VACUUM (`full=True`).
+    """
+    before = query("PRAGMA freelist_count")[0]
+    if query("PRAGMA auto_vacuum")[0] != 2:
+        if not full:
+            return 0
+        query("PRAGMA auto_vacuum = INCREMENTAL")
+        query("VACUUM")
+    else:
+        query("PRAGMA incremental_vacuum")
+    return max(0, before - query("PRAGMA freelist_count")[0])
+
+
+def _fetch_one(sync_conn, sql: str) -> Any:
+    result = sync_conn.exec_driver_sql(sql)
+    return result.fetchone() if result.returns_rows else None
+
+
+async def _vacuum_app_db(full: bool) -> int:
+    if engine.dialect.name != "sqlite":
+        return 0
+    async with engine.connect() as conn:
+        # VACUUM cannot run inside a transaction.
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        return await conn.run_sync(lambda sync: _vacuum(lambda sql: _fetch_one(sync, sql), full))
+
+
+async def archive_completed(
+    older_than_days: Optional[float] = None,
+    *,
+    batch_size: int = 200,
+    dry_run: bool = False,
+    full_vacuum: bool = False,
+) -> Dict[str, Any]:
+    """Move sessions completed more than N days ago into the archive.
+
+    Archives in batches, purges the sessions' checkpoints and finally runs
+    an incremental vacuum on both databases.
+    """
+    if older_than_days is None:
+        older_than_days = get_settings().archive_after_days
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    summary: Dict[str, Any] = {"cutoff": cutoff.isoformat(), "archived": 0, "checkpoints_purged": 0}
+    eligible = (
+        ProtocolSession.status == SessionStatusEnum.COMPLETED,
+        ProtocolSession.updated_at < cutoff,
+    )
+
+    if dry_run:
+        async with AsyncSessionLocal() as db:
+            summary["archived"] = await db.scalar(select(func.count(ProtocolSession.id)).where(*eligible))
+        summary["dry_run"] = True
+        return summary
+
+    while True:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(ProtocolSession)
+                .where(*eligible)
+                .order_by(ProtocolSession.created_at)
+                .limit(batch_size)
+            )
+            sessions = result.scalars().all()
+            if not sessions:
+                break
+
+            records = [session_to_record(s) for s in sessions]
+            await asyncio.to_thread(get_archive().append, records)
+
+            ids = [s.id for s in sessions]
+            thread_ids = [s.thread_id for s in sessions]
+            await db.execute(delete(AgentLog).where(AgentLog.session_id.in_(ids)))
+            await db.execute(delete(DraftVersion).where(DraftVersion.session_id.in_(ids)))
+            await db.execute(delete(ProtocolSession).where(ProtocolSession.id.in_(ids)))
+            await db.commit()
+
+        summary["archived"] += len(ids)
+        summary["checkpoints_purged"] += await asyncio.to_thread(_purge_checkpoints, thread_ids)
+        metrics.incr("archive.sessions", len(ids))
+        if len(ids) < batch_size:
+            break
+
+    summary["app_pages_freed"] = await _vacuum_app_db(full_vacuum)
+    summary["checkpoint_pages_freed"] = await asyncio.to_thread(_vacuum_checkpoints, full_vacuum)
+    return summary
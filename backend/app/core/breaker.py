@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict
+
+from app.core import metrics
+from app.core.config import get_settings
+
+
+# Per-model circuit breakers for LLM provider calls.
+#
+# closed    -> calls flow; outcomes of the last `breaker_window` calls are
+#              kept, and the breaker opens once at least
+#              `breaker_min_calls` of them exist and the failure rate reaches
+#              `breaker_failure_rate`. Calls slower than
+#              `breaker_slow_call_seconds` count as failures.
+# open      -> calls are refused (callers fail over to a fallback model)
+#              until `breaker_open_seconds` have passed.
+# half_open -> a single probe call is let through; success closes the
+#              breaker, failure opens it again.
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._outcomes: Deque[bool] = deque(maxlen=get_settings().breaker_window)
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go to this model right now."""
+        settings = get_settings()
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < settings.breaker_open_seconds:
+                    return False
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == HALF_OPEN:
+                if self._probe_in_flight:
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    def record(self, ok: bool, latency: float | None = None) -> None:
+        settings = get_settings()
+        if ok and latency is not None and latency > settings.breaker_slow_call_seconds:
+            ok = False
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+                if ok:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                    metrics.incr(f"breaker.closed.{self.name}")
+                else:
+                    self._trip()
+                return
+
+            self._outcomes.append(ok)
+            failures = self._outcomes.count(False)
+            if (
+                self.state == CLOSED
+                and len(self._outcomes) >= settings.breaker_min_calls
+                and failures / len(self._outcomes) >= settings.breaker_failure_rate
+            ):
+                self._trip()
+
+    def _trip(self) -> None:
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self._outcomes.clear()
+        metrics.incr(f"breaker.opened.{self.name}")
+        print(f"Circuit breaker for model {self.name} opened.")
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(model_name: str) -> CircuitBreaker:
+    with _registry_lock:
+        breaker = _breakers.get(model_name)
+        if breaker is None:
+            breaker = CircuitBreaker(model_name)
+            _breakers[model_name] = breaker
+        return breaker
+
+
+def states() -> Dict[str, str]:
+    with _registry_lock:
+        return {name: breaker.state for name, breaker in _breakers.items()}
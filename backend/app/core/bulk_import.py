@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import func, insert, select
+
+from app.core import metrics, serialization
+from app.core.db import engine
+from app.core.graph import aclose_async_checkpointer, new_thread_id, reset_list
+from app.models import AgentLog, DraftVersion, ProtocolSession
+
+
+# Bulk import of exported sessions (app/core/export.py, or archive segments
+# once unzipped) for migrations, environment cloning and perf testing.
+#
+# Rows go in through Core `insert()` with a list of parameter sets, which
+# SQLAlchemy runs as one executemany per table and batch, inside one
+# transaction per `batch_size` sessions on a single connection. For the
+# duration of the load that connection trades durability for speed
+# (synchronous=OFF, a large page cache), and the secondary indexes can be
+# dropped and rebuilt once at the end instead of being maintained row by row.
+#
+# Draft and log ids are always assigned by the target database; logs are
+# inserted in their original order so per-session event ids stay monotonic.
+
+SESSION_COLUMNS = (
+    "intent",
+    "thread_id",
+    "status",
+    "latest_draft",
+    "human_edited_draft",
+    "final_protocol",
+    "safety_score",
+    "empathy_score",
+    "iteration",
+    "num_candidates",
+    "forked_from_checkpoint_id",
+    "created_at",
+    "updated_at",
+)
+
+# Applied to the import connection only, and restored afterwards.
+_LOAD_PRAGMAS = {"synchronous": "OFF", "cache_size": "-200000", "temp_store": "MEMORY"}
+
+_TABLES = (ProtocolSession.__table__, DraftVersion.__table__, AgentLog.__table__)
+
+
+def _dt(value: Any) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+def read_records(path: str | Path, fmt: Optional[str] = None, *, chunk_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """Session records from a JSONL or Parquet export, one at a time."""
+    path = Path(path)
+    fmt = fmt or ("parquet" if path.suffix == ".parquet" else "jsonl")
+    if fmt == "parquet":
+        try:
+            import pyarrow.parquet as pq  # type: ignore
+        except Exception:
+            raise RuntimeError("Reading Parquet needs the optional 'pyarrow' package")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield from batch.to_pylist()
+        return
+    with open(path, "rb") as fh:
+        for line in fh:
+            if line.strip():
+                yield serialization.loads(line)
+
+
+def _batches(records: Iterator[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _secondary_indexes():
+    # Unique indexes (thread_id) stay: they are what rejects duplicates.
+    return [index for table in _TABLES for index in table.indexes if not index.unique]
+
+
+def _session_row(record: Dict[str, Any], session_id: int, thread_id: str, parent_id: Optional[int]) -> Dict[str, Any]:
+    row = {column: record.get(column) for column in SESSION_COLUMNS}
+    row.update(id=session_id, thread_id=thread_id, parent_session_id=parent_id)
+    row["created_at"] = _dt(row["created_at"]) or datetime.utcnow()
+    row["updated_at"] = _dt(row["updated_at"]) or row["created_at"]
+    row["iteration"] = row["iteration"] or 0
+    row["num_candidates"] = row["num_candidates"] or 1
+    return row
+
+
+async def import_sessions(
+    records: Iterator[Dict[str, Any]],
+    *,
+    batch_size: int = 2000,
+    new_ids: bool = False,
+    defer_indexes: bool = True,
+    rehydrate_checkpoints: bool = False,
+) -> Dict[str, Any]:
+    """Insert exported session records with their drafts and logs.
+
+    By default session ids and thread ids are kept and records whose id
+    already exists are skipped. With `new_ids` every session gets a fresh
+    id and thread id (parent links are remapped within the file), so one
+    export can be loaded repeatedly to multiply a dataset.
+
+    Meant for offline use (`python -m app.cli import`): with
+    `rehydrate_checkpoints` the process-wide async checkpointer is closed
+    when the import finishes.
+    """
+    started = time.perf_counter()
+    summary: Dict[str, Any] = {"sessions": 0, "drafts": 0, "logs": 0, "skipped": 0, "checkpoints": 0}
+    id_map: Dict[int, int] = {}
+
+    async with engine.connect() as conn:
+        sqlite = engine.dialect.name == "sqlite"
+        previous: Dict[str, Any] = {}
+        if sqlite:
+            for pragma, value in _LOAD_PRAGMAS.items():
+                previous[pragma] = (await conn.exec_driver_sql(f"PRAGMA {pragma}")).scalar()
+                await conn.exec_driver_sql(f"PRAGMA {pragma} = {value}")
+        await conn.commit()
+
+        deferred = _secondary_indexes() if defer_indexes else []
+        try:
+            for index in deferred:
+                await conn.run_sync(lambda sync, index=index: index.drop(sync, checkfirst=True))
+            await conn.commit()
+
+            next_id = (await conn.scalar(select(func.max(ProtocolSession.id)))) or 0
+            await conn.commit()
+            for batch in _batches(records, batch_size):
+                rehydrate: List[Dict[str, Any]] = []
+                async with conn.begin():
+                    if new_ids:
+                        existing = set()
+                    else:
+                        ids = [r["id"] for r in batch if r.get("id") is not None]
+                        existing = set(
+                            (await conn.scalars(select(ProtocolSession.id).where(ProtocolSession.id.in_(ids)))).all()
+                        ) if ids else set()
+
+                    sessions, drafts, logs = [], [], []
+                    for record in batch:
+                        old_id = record.get("id")
+                        if old_id in existing:
+                            summary["skipped"] += 1
+                            continue
+                        if new_ids or old_id is None:
+                            next_id += 1
+                            session_id = next_id
+                        else:
+                            session_id = old_id
+                            next_id = max(next_id, session_id)
+                        if new_ids and old_id is not None:
+                            id_map[old_id] = session_id
+                        thread_id = new_thread_id() if new_ids or not record.get("thread_id") else record["thread_id"]
+                        parent = record.get("parent_session_id")
+                        if new_ids:
+                            # Parents outside this file have no new id to point at.
+                            parent = id_map.get(parent)
+                        sessions.append(_session_row(record, session_id, thread_id, parent))
+
+                        for draft in sorted(record.get("drafts") or [], key=lambda d: d["version_index"]):
+                            drafts.append({
+                                "session_id": session_id,
+                                "version_index": draft["version_index"],
+                                "content": draft["content"],
+                                "safety_score": draft.get("safety_score"),
+                                "empathy_score": draft.get("empathy_score"),
+                                "created_at": _dt(draft.get("created_at")) or datetime.utcnow(),
+                            })
+                        for log in sorted(record.get("logs") or [], key=lambda entry: entry.get("id") or 0):
+                            logs.append({
+                                "session_id": session_id,
+                                "agent_name": log["agent_name"],
+                                "phase": log["phase"],
+                                "message": log["message"],
+                                "created_at": _dt(log.get("created_at")) or datetime.utcnow(),
+                            })
+                        if rehydrate_checkpoints:
+                            rehydrate.append({**record, "thread_id": thread_id, "id": session_id})
+
+                    if sessions:
+                        await conn.execute(insert(ProtocolSession.__table__), sessions)
+                    if drafts:
+                        await conn.execute(insert(DraftVersion.__table__), drafts)
+                    if logs:
+                        await conn.execute(insert(AgentLog.__table__), logs)
+
+                summary["sessions"] += len(sessions)
+                summary["drafts"] += len(drafts)
+                summary["logs"] += len(logs)
+                metrics.incr("import.sessions", len(sessions))
+                if rehydrate:
+                    summary["checkpoints"] += await rehydrate_checkpoints_for(rehydrate)
+        finally:
+            if rehydrate_checkpoints:
+                # Its aiosqlite thread would keep the importing process alive.
+                await aclose_async_checkpointer()
+            # Whatever failed, leave the schema and connection as we found them.
+            await conn.rollback()
+            for index in deferred:
+                await conn.run_sync(lambda sync, index=index: index.create(sync, checkfirst=True))
+            if sqlite:
+                for pragma, value in previous.items():
+                    await conn.exec_driver_sql(f"PRAGMA {pragma} = {value}")
+                await conn.exec_driver_sql("PRAGMA optimize")
+            await conn.commit()
+
+    summary["seconds"] = round(time.perf_counter() - started, 2)
+    return summary
+
+
+def checkpoint_values(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Blackboard state reconstructed from a session record."""
+    drafts = sorted(record.get("drafts") or [], key=lambda d: d["version_index"])
+    return {
+        "intent": record.get("intent"),
+        "current_draft": record.get("final_protocol") or record.get("latest_draft"),
+        # Replace rather than append, in case the thread already has a checkpoint.
+        "draft_versions": reset_list([d["content"] for d in drafts]),
+        "notes": reset_list(),
+        "safety_score": record.get("safety_score"),
+        "empathy_score": record.get("empathy_score"),
+        "iteration": record.get("iteration") or 0,
+        "max_iterations": 3,
+        "num_candidates": record.get("num_candidates") or 1,
+        "human_approved_draft": record.get("human_edited_draft"),
+        "final_protocol": record.get("final_protocol"),
+        "halted_for_human": False,
+        "decision": "finalize" if record.get("final_protocol") else None,
+    }
+
+
+async def rehydrate_checkpoints_for(records: List[Dict[str, Any]]) -> int:
+    """Write one checkpoint per imported session so `/blackboard`,
+    `/checkpoints` and `/fork` work on it.
+
+    The state is written as the supervisor's, so finalized sessions have
+    nothing left to run. Needs LangGraph; returns 0 without it.
+    """
+    from app.core.graph import get_async_graph
+
+    graph = await get_async_graph()
+    if not hasattr(graph, "aupdate_state"):
+        print("LangGraph is not installed; skipping checkpoint rehydration.")
+        return 0
+    written = 0
+    for record in records:
+        await graph.aupdate_state(
+            {"configurable": {"thread_id": record["thread_id"]}},
+            checkpoint_values(record),
+            as_node="supervisor_agent",
+        )
+        written += 1
+    metrics.incr("import.checkpoints", written)
+    return written
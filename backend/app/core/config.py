@@ -1,5 +1,6 @@
 from functools import lru_cache
-from pydantic import Field
+from typing import Dict
+from pydantic import AliasChoices, Field
 
 # pydantic v2 split settings into a separate package `pydantic-settings` in some
 # environments. Try importing from there first for compatibility, otherwise
@@ -11,6 +12,11 @@ except Exception:
     from pydantic import BaseSettings  # type: ignore
 
 
+# Every setting can be set through its documented `CERINA_*` name or its
+# bare field name (`APP_DB_URL`). pydantic-settings v2 ignores `Field(env=...)`,
+# so the names go in `validation_alias`.
+
+
 class Settings(BaseSettings):
     app_name: str = "Cerina Protocol Foundry Backend"
     api_prefix: str = "/api"
@@ -19,22 +25,128 @@ class Settings(BaseSettings):
 
     # SQLite files
     app_db_url: str = Field(
-        default="sqlite+aiosqlite:///./cerina_app.db", env="CERINA_APP_DB_URL"
+        default="sqlite+aiosqlite:///./cerina_app.db", validation_alias=AliasChoices("CERINA_APP_DB_URL", "APP_DB_URL")
     )
     checkpoint_db_path: str = Field(
-        default="cerina_checkpoints.db", env="CERINA_CHECKPOINT_DB_PATH"
+        default="cerina_checkpoints.db", validation_alias=AliasChoices("CERINA_CHECKPOINT_DB_PATH", "CHECKPOINT_DB_PATH")
     )
 
+    # The same statement issued this many times in one request or graph run
+    # is reported as a likely N+1 load (see app/core/querystats.py).
+    sql_n_plus_one_threshold: int = Field(default=10, validation_alias=AliasChoices("CERINA_SQL_N_PLUS_ONE_THRESHOLD", "SQL_N_PLUS_ONE_THRESHOLD"))
+
+    # Maximum graph runs the MCP server drives at once; further tool calls
+    # wait for a free slot.
+    mcp_max_concurrent_runs: int = Field(default=4, validation_alias=AliasChoices("CERINA_MCP_MAX_CONCURRENT_RUNS", "MCP_MAX_CONCURRENT_RUNS"))
+    # Most intents accepted by one `generate_cbt_protocols` call.
+    mcp_max_batch_intents: int = Field(default=10, validation_alias=AliasChoices("CERINA_MCP_MAX_BATCH_INTENTS", "MCP_MAX_BATCH_INTENTS"))
+
+    # Cold storage for finished sessions (see app/core/archive.py): sessions
+    # completed more than `archive_after_days` ago move into gzip segments
+    # under `archive_dir`, rolled over at `archive_segment_max_bytes`.
+    archive_dir: str = Field(default="archive", validation_alias=AliasChoices("CERINA_ARCHIVE_DIR", "ARCHIVE_DIR"))
+    archive_after_days: float = Field(default=30.0, validation_alias=AliasChoices("CERINA_ARCHIVE_AFTER_DAYS", "ARCHIVE_AFTER_DAYS"))
+    archive_segment_max_bytes: int = Field(default=64 * 1024 * 1024, validation_alias=AliasChoices("CERINA_ARCHIVE_SEGMENT_MAX_BYTES", "ARCHIVE_SEGMENT_MAX_BYTES"))
+
+    # On startup, create tables (and stamp the Alembic head) when the DB is
+    # not under Alembic control yet. Disable in production so an unmigrated
+    # DB fails fast instead.
+    schema_auto_create: bool = Field(default=True, validation_alias=AliasChoices("CERINA_SCHEMA_AUTO_CREATE", "SCHEMA_AUTO_CREATE"))
+
+    # Cold-start budget for `import app.main`, enforced by
+    # `python -m app.cli startup-report`.
+    startup_import_budget_ms: int = Field(default=1500, validation_alias=AliasChoices("CERINA_STARTUP_IMPORT_BUDGET_MS", "STARTUP_IMPORT_BUDGET_MS"))
+
     # LLM configuration (Anthropic by default)
-    anthropic_api_key: str | None = Field(default=None, env="ANTHROPIC_API_KEY")
-    model_name: str = Field(default="claude-3-5-sonnet-20240620", env="CERINA_MODEL_NAME")
+    anthropic_api_key: str | None = Field(default=None, validation_alias="ANTHROPIC_API_KEY")
+    model_name: str = Field(default="claude-3-5-sonnet-20240620", validation_alias=AliasChoices("CERINA_MODEL_NAME", "MODEL_NAME"))
+
+    # Per-agent model overrides (JSON object keyed by graph node name or
+    # "preview"); agents not listed use `model_name`. Scoring only returns a
+    # number, so the reviewers default to the smaller model.
+    agent_models: Dict[str, str] = Field(
+        default={
+            "safety_guardian": "claude-3-5-haiku-20241022",
+            "clinical_critic": "claude-3-5-haiku-20241022",
+            "preview": "claude-3-5-haiku-20241022",
+        },
+        validation_alias=AliasChoices("CERINA_AGENT_MODELS", "AGENT_MODELS"),
+    )
+    # model -> model to fail over to while its circuit breaker is open.
+    fallback_models: Dict[str, str] = Field(
+        default={
+            "claude-3-5-sonnet-20240620": "claude-3-5-haiku-20241022",
+            "claude-3-5-haiku-20241022": "claude-3-5-sonnet-20240620",
+        },
+        validation_alias=AliasChoices("CERINA_FALLBACK_MODELS", "FALLBACK_MODELS"),
+    )
+
+    # Per-model circuit breakers (see app/core/breaker.py).
+    breaker_window: int = Field(default=20, validation_alias=AliasChoices("CERINA_BREAKER_WINDOW", "BREAKER_WINDOW"))
+    breaker_min_calls: int = Field(default=5, validation_alias=AliasChoices("CERINA_BREAKER_MIN_CALLS", "BREAKER_MIN_CALLS"))
+    breaker_failure_rate: float = Field(default=0.5, validation_alias=AliasChoices("CERINA_BREAKER_FAILURE_RATE", "BREAKER_FAILURE_RATE"))
+    breaker_slow_call_seconds: float = Field(default=45.0, validation_alias=AliasChoices("CERINA_BREAKER_SLOW_CALL_SECONDS", "BREAKER_SLOW_CALL_SECONDS"))
+    breaker_open_seconds: float = Field(default=30.0, validation_alias=AliasChoices("CERINA_BREAKER_OPEN_SECONDS", "BREAKER_OPEN_SECONDS"))
+
+    # Provider call timeouts in seconds: a default plus per-agent overrides
+    # (JSON object in the env var, keyed by graph node name or "preview").
+    llm_timeout_seconds: float = Field(default=60.0, validation_alias=AliasChoices("CERINA_LLM_TIMEOUT_SECONDS", "LLM_TIMEOUT_SECONDS"))
+    llm_agent_timeouts: Dict[str, float] = Field(
+        default={"drafting_agent": 90.0, "safety_guardian": 30.0, "clinical_critic": 30.0, "preview": 20.0},
+        validation_alias=AliasChoices("CERINA_LLM_AGENT_TIMEOUTS", "LLM_AGENT_TIMEOUTS"),
+    )
+    # Wall-clock budget for one graph run (kickoff/resume up to the next halt).
+    session_deadline_seconds: float = Field(default=600.0, validation_alias=AliasChoices("CERINA_SESSION_DEADLINE_SECONDS", "SESSION_DEADLINE_SECONDS"))
+
+    # Hedged requests: when a call is slower than this percentile of the
+    # agent's recent latencies, fire one duplicate and keep the first answer.
+    llm_hedge_enabled: bool = Field(default=True, validation_alias=AliasChoices("CERINA_LLM_HEDGE_ENABLED", "LLM_HEDGE_ENABLED"))
+    llm_hedge_percentile: float = Field(default=95.0, validation_alias=AliasChoices("CERINA_LLM_HEDGE_PERCENTILE", "LLM_HEDGE_PERCENTILE"))
+    llm_hedge_min_samples: int = Field(default=20, validation_alias=AliasChoices("CERINA_LLM_HEDGE_MIN_SAMPLES", "LLM_HEDGE_MIN_SAMPLES"))
+
+    # "anthropic", or "fake" for load tests: canned replies after
+    # `fake_llm_latency_ms` plus up to `fake_llm_jitter_ms` of random delay,
+    # with reviewers always returning `fake_llm_score`.
+    llm_provider: str = Field(default="anthropic", validation_alias=AliasChoices("CERINA_LLM_PROVIDER", "LLM_PROVIDER"))
+    fake_llm_latency_ms: float = Field(default=200.0, validation_alias=AliasChoices("CERINA_FAKE_LLM_LATENCY_MS", "FAKE_LLM_LATENCY_MS"))
+    fake_llm_jitter_ms: float = Field(default=100.0, validation_alias=AliasChoices("CERINA_FAKE_LLM_JITTER_MS", "FAKE_LLM_JITTER_MS"))
+    fake_llm_score: float = Field(default=0.9, validation_alias=AliasChoices("CERINA_FAKE_LLM_SCORE", "FAKE_LLM_SCORE"))
+
+    # How many times a reviewer re-asks for a bare JSON score after a reply
+    # it could not parse, before giving up on that score.
+    score_reask_attempts: int = Field(default=1, validation_alias=AliasChoices("CERINA_SCORE_REASK_ATTEMPTS", "SCORE_REASK_ATTEMPTS"))
+
+    # Upper bound on a session's `num_candidates` (best-of-N drafting).
+    max_draft_candidates: int = Field(default=5, validation_alias=AliasChoices("CERINA_MAX_DRAFT_CANDIDATES", "MAX_DRAFT_CANDIDATES"))
+
+    # Most notes kept on the blackboard; older ones are folded into a single
+    # "[Summary]" note with per-agent counts.
+    notes_ring_size: int = Field(default=40, validation_alias=AliasChoices("CERINA_NOTES_RING_SIZE", "NOTES_RING_SIZE"))
+
+    # Generate a short LLM preview draft in the background after creating a
+    # session. Disable to skip the extra LLM call entirely.
+    preview_draft_enabled: bool = Field(default=True, validation_alias=AliasChoices("CERINA_PREVIEW_DRAFT_ENABLED", "PREVIEW_DRAFT_ENABLED"))
+
+    # Per-viewer SSE buffer size; slow viewers get state events coalesced and
+    # older agent events dropped beyond this many pending events.
+    sse_subscriber_queue_size: int = Field(default=256, validation_alias=AliasChoices("CERINA_SSE_SUBSCRIBER_QUEUE_SIZE", "SSE_SUBSCRIBER_QUEUE_SIZE"))
+
+    # Seconds between SSE heartbeat comments on idle streams.
+    sse_heartbeat_seconds: int = Field(default=15, validation_alias=AliasChoices("CERINA_SSE_HEARTBEAT_SECONDS", "SSE_HEARTBEAT_SECONDS"))
+
+    # Multi-worker coordination: lease TTL on a session's thread (heartbeated
+    # at a third of this) and how often viewers poll agent_logs when the run
+    # lives in another worker process.
+    lease_ttl_seconds: int = Field(default=30, validation_alias=AliasChoices("CERINA_LEASE_TTL_SECONDS", "LEASE_TTL_SECONDS"))
+    remote_event_poll_seconds: float = Field(default=0.5, validation_alias=AliasChoices("CERINA_REMOTE_EVENT_POLL_SECONDS", "REMOTE_EVENT_POLL_SECONDS"))
 
     # CORS
-    frontend_origin: str = Field(default="http://localhost:5173", env="CERINA_FRONTEND_ORIGIN")
+    frontend_origin: str = Field(default="http://localhost:5173", validation_alias=AliasChoices("CERINA_FRONTEND_ORIGIN", "FRONTEND_ORIGIN"))
 
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
+        populate_by_name = True
 
 
 @lru_cache()
@@ -6,7 +6,11 @@ from app.core.config import get_settings
 
 settings = get_settings()
 
-engine = create_async_engine(settings.app_db_url, echo=False, future=True)
+# With several uvicorn workers sharing one SQLite file, writers briefly
+# contend for the lock; wait for it instead of failing with "database is locked".
+_connect_args = {"timeout": 30} if settings.app_db_url.startswith("sqlite") else {}
+
+engine = create_async_engine(settings.app_db_url, echo=False, future=True, connect_args=_connect_args)
 AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 Base = declarative_base()
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, Optional, Set
+
+from app.core import metrics
+from app.core.jsonpatch import make_patch
+
+
+# In-process pub/sub for live session events.
+#
+# A single graph execution per session publishes into the session's channel
+# and any number of SSE viewers subscribe to it. Subscribers never drive the
+# graph themselves, so opening (or closing) a live view has no effect on the
+# run and no longer re-executes the workflow.
+#
+# Each subscriber owns a bounded buffer. "state" events are coalesced (a
+# newer blackboard state replaces one that has not been delivered yet), and
+# when the buffer is full the oldest droppable event is discarded so a slow
+# consumer can never stall the publisher or grow memory without bound.
+#
+# Blackboard states are delivered as one full "state" snapshot followed by
+# "state_patch" events (RFC 6902 operations, computed once per publish). Each
+# carries a `rev`; patches also carry the `base_rev` they apply to. Whenever
+# a subscriber loses a state frame to backpressure it is resynced with a
+# fresh full snapshot instead.
+
+# Events that tell a viewer the run halted or ended; never dropped.
+TERMINAL_EVENT_TYPES = {"halt", "done"}
+COALESCED_EVENT_TYPES = {"state"}
+STATE_EVENT_TYPES = {"state", "state_patch"}
+
+
+class Subscription:
+    def __init__(self, maxsize: int, *, patches: bool = True) -> None:
+        self.maxsize = maxsize
+        self.patches = patches
+        self.dropped = 0
+        # The next state frame must be a full snapshot (nothing delivered yet,
+        # or a frame was lost and the client's copy can't be patched).
+        self.needs_resync = True
+        self._buffer: Deque[dict] = deque()
+        self._ready = asyncio.Event()
+
+    def _discard_pending_state(self) -> None:
+        kept = [e for e in self._buffer if e.get("type") not in STATE_EVENT_TYPES]
+        self._buffer.clear()
+        self._buffer.extend(kept)
+
+    def push_state(self, full: dict, patch: Optional[dict]) -> None:
+        if not self.patches:
+            self.push(full)
+            return
+        if patch is None or self.needs_resync or len(self._buffer) >= self.maxsize:
+            # Out of sync, or about to overflow: replace every pending state
+            # frame with a single full snapshot.
+            self._discard_pending_state()
+            self.needs_resync = False
+            self.push(full)
+        else:
+            self.push(patch)
+
+    def push(self, event: dict) -> None:
+        event_type = event.get("type")
+
+        if event_type in COALESCED_EVENT_TYPES:
+            for idx, pending in enumerate(self._buffer):
+                if pending.get("type") == event_type:
+                    self._buffer[idx] = event
+                    self._ready.set()
+                    return
+
+        if len(self._buffer) >= self.maxsize:
+            # If the buffer is nothing but terminal events we keep them all
+            # and let it overflow by one rather than lose a halt/done.
+            for idx, pending in enumerate(self._buffer):
+                if pending.get("type") not in TERMINAL_EVENT_TYPES:
+                    del self._buffer[idx]
+                    self.dropped += 1
+                    metrics.incr("events.dropped")
+                    if pending.get("type") in STATE_EVENT_TYPES:
+                        # Later patches no longer apply; resync on next state.
+                        self._discard_pending_state()
+                        self.needs_resync = True
+                    break
+
+        self._buffer.append(event)
+        self._ready.set()
+
+    async def get(self) -> dict:
+        while not self._buffer:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._buffer.popleft()
+
+    async def __aiter__(self) -> AsyncIterator[dict]:
+        while True:
+            yield await self.get()
+
+
+class SessionChannel:
+    def __init__(self) -> None:
+        self.subscribers: Set[Subscription] = set()
+        # Last published blackboard state, replayed to late subscribers so a
+        # viewer attaching mid-run starts from the current picture.
+        self.last_state: Optional[dict] = None
+        # Highest persisted (AgentLog-backed) event id published so far.
+        self.last_event_id: Optional[int] = None
+        # Revision counter of published blackboard states.
+        self.rev = 0
+        # The last event published was a halt/done: nothing more is coming
+        # until another run starts, so the channel can go once it is unwatched.
+        self.ended = False
+
+
+class EventHub:
+    def __init__(self, subscriber_queue_size: int = 256) -> None:
+        self.subscriber_queue_size = subscriber_queue_size
+        self._channels: Dict[int, SessionChannel] = {}
+
+    def _channel(self, session_id: int) -> SessionChannel:
+        channel = self._channels.get(session_id)
+        if channel is None:
+            channel = SessionChannel()
+            self._channels[session_id] = channel
+        return channel
+
+    def publish(self, session_id: int, event: dict) -> None:
+        channel = self._channel(session_id)
+        if event.get("id") is not None:
+            channel.last_event_id = event["id"]
+        if event.get("type") == "state":
+            self._publish_state(channel, event)
+        else:
+            for sub in list(channel.subscribers):
+                sub.push(event)
+        metrics.incr("events.published")
+        channel.ended = event.get("type") in TERMINAL_EVENT_TYPES
+        self._drop_if_idle(session_id, channel)
+
+    def _drop_if_idle(self, session_id: int, channel: SessionChannel) -> None:
+        # Otherwise every session ever served would keep its last full
+        # blackboard (all drafts) in memory for the life of the process.
+        if channel.ended and not channel.subscribers and self._channels.get(session_id) is channel:
+            del self._channels[session_id]
+
+    def _publish_state(self, channel: SessionChannel, event: dict) -> None:
+        previous = channel.last_state
+        ops = None
+        if previous is not None:
+            ops = make_patch(previous.get("payload"), event.get("payload"))
+            if not ops:
+                # Same state again (e.g. a values + checkpoint echo); skip it.
+                return
+
+        channel.rev += 1
+        # State frames are not persisted; tag them with the id of the
+        # event they follow so a reconnect resumes from the right place.
+        full = {**event, "id": channel.last_event_id, "rev": channel.rev}
+        channel.last_state = full
+
+        patch: Optional[dict] = None
+        if previous is not None:
+            patch = {
+                "id": channel.last_event_id,
+                "type": "state_patch",
+                "rev": channel.rev,
+                "base_rev": previous["rev"],
+                "payload": ops,
+            }
+            metrics.incr("events.state_patches")
+
+        for sub in list(channel.subscribers):
+            sub.push_state(full, patch)
+
+    def subscribe(
+        self, session_id: int, *, replay_state: bool = True, patches: bool = True
+    ) -> Subscription:
+        channel = self._channel(session_id)
+        sub = Subscription(self.subscriber_queue_size, patches=patches)
+        if replay_state and channel.last_state is not None:
+            sub.push_state(channel.last_state, None)
+        channel.subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, session_id: int, sub: Subscription) -> None:
+        channel = self._channels.get(session_id)
+        if channel is None:
+            return
+        channel.subscribers.discard(sub)
+        self._drop_if_idle(session_id, channel)
+
+    def last_state(self, session_id: int) -> Optional[dict]:
+        channel = self._channels.get(session_id)
+        return channel.last_state if channel else None
+
+    def reset(self, session_id: int) -> None:
+        """Forget cached state for a session that is restarting from scratch."""
+        channel = self._channels.get(session_id)
+        if channel is not None:
+            channel.last_state = None
+
+    def channel_count(self) -> int:
+        return len(self._channels)
+
+    def subscriber_count(self, session_id: int) -> int:
+        channel = self._channels.get(session_id)
+        return len(channel.subscribers) if channel else 0
+
+
+_hub: EventHub | None = None
+
+
+def get_event_hub() -> EventHub:
+    global _hub
+    if _hub is None:
+        from app.core.config import get_settings
+
+        _hub = EventHub(subscriber_queue_size=get_settings().sse_subscriber_queue_size)
+    return _hub
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import noload, selectinload
+
+from app.core import metrics, serialization
+from app.core.archive import get_archive
+from app.core.db import AsyncSessionLocal
+from app.core.records import SESSION_FIELDS, session_to_record
+from app.models import ProtocolSession, SessionStatusEnum
+
+
+# Bulk export of sessions for analysis.
+#
+# Sessions are read by keyset pagination, `chunk_size` rows at a time, each
+# page in its own short read transaction; a page is encoded and handed to
+# the caller before the next one is fetched, so memory stays flat however
+# large the history is and a slow client never holds a transaction open.
+# Records have the same shape as archive records (app/core/records.py), and
+# archived sessions can be included so an export covers the full history.
+#
+# JSONL needs nothing extra. Parquet needs the optional `pyarrow` package;
+# every chunk becomes one row group.
+
+FORMATS = ("jsonl", "parquet")
+MEDIA_TYPES = {"jsonl": "application/x-ndjson", "parquet": "application/vnd.apache.parquet"}
+
+
+class ExportFormatUnavailable(RuntimeError):
+    """The requested format needs an optional dependency that is missing."""
+
+
+@dataclass
+class ExportFilters:
+    statuses: List[str] = field(default_factory=lambda: [SessionStatusEnum.COMPLETED])
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    min_safety: Optional[float] = None
+    min_empathy: Optional[float] = None
+
+    def matches(self, record: Dict[str, Any]) -> bool:
+        """Score thresholds for records that did not come from SQL (archive)."""
+        for key, threshold in (("safety_score", self.min_safety), ("empathy_score", self.min_empathy)):
+            if threshold is not None and (record.get(key) is None or record[key] < threshold):
+                return False
+        return True
+
+
+def _statement(
+    filters: ExportFilters,
+    status: Optional[str],
+    *,
+    drafts: bool,
+    logs: bool,
+    after: Optional[Tuple[datetime, int]] = None,
+):
+    stmt = select(ProtocolSession)
+    if status is not None:
+        stmt = stmt.where(ProtocolSession.status == status)
+    if after is not None:
+        stmt = stmt.where(tuple_(ProtocolSession.created_at, ProtocolSession.id) > tuple_(*after))
+    if filters.created_after is not None:
+        stmt = stmt.where(ProtocolSession.created_at >= filters.created_after)
+    if filters.created_before is not None:
+        stmt = stmt.where(ProtocolSession.created_at < filters.created_before)
+    if filters.min_safety is not None:
+        stmt = stmt.where(ProtocolSession.safety_score >= filters.min_safety)
+    if filters.min_empathy is not None:
+        stmt = stmt.where(ProtocolSession.empathy_score >= filters.min_empathy)
+    # Only load the children that are exported; selectin loads run once per
+    # page.
+    stmt = stmt.options(
+        selectinload(ProtocolSession.drafts) if drafts else noload(ProtocolSession.drafts),
+        selectinload(ProtocolSession.logs) if logs else noload(ProtocolSession.logs),
+    )
+    return stmt.order_by(ProtocolSession.created_at, ProtocolSession.id)
+
+
+async def iter_record_chunks(
+    filters: ExportFilters,
+    *,
+    drafts: bool = False,
+    logs: bool = False,
+    include_archived: bool = False,
+    chunk_size: int = 500,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Matching session records, `chunk_size` at a time.
+
+    Statuses are exported one after another and each is paged by
+    `(created_at, id) > last seen`: with `status = ?` that walks the
+    (status, created_at) index in order, while `status IN (...)` or paging
+    by id alone would make SQLite sort every matching row for each page.
+    """
+    for status in filters.statuses or [None]:
+        after: Optional[Tuple[datetime, int]] = None
+        while True:
+            stmt = _statement(filters, status, drafts=drafts, logs=logs, after=after).limit(chunk_size)
+            async with AsyncSessionLocal() as db:
+                sessions = (await db.scalars(stmt)).all()
+                records = [session_to_record(s, drafts=drafts, logs=logs) for s in sessions]
+            if records:
+                yield records
+            if len(sessions) < chunk_size:
+                break
+            after = (sessions[-1].created_at, sessions[-1].id)
+
+    if not include_archived:
+        return
+
+    archive = get_archive()
+    after_id = 0
+    while True:
+        page = await asyncio.to_thread(
+            archive.read_page,
+            statuses=filters.statuses,
+            created_after=filters.created_after.isoformat() if filters.created_after else None,
+            created_before=filters.created_before.isoformat() if filters.created_before else None,
+            after_session_id=after_id,
+            limit=chunk_size,
+        )
+        if not page:
+            return
+        after_id = page[-1]["id"]
+        records = [_trim(r, drafts=drafts, logs=logs) for r in page if filters.matches(r)]
+        if records:
+            yield records
+
+
+def _trim(record: Dict[str, Any], *, drafts: bool, logs: bool) -> Dict[str, Any]:
+    record = {key: record.get(key) for key in (*SESSION_FIELDS, "drafts", "logs") if key in record}
+    if not drafts:
+        record.pop("drafts", None)
+    if not logs:
+        record.pop("logs", None)
+    return record
+
+
+async def encode_jsonl(chunks: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    async for records in chunks:
+        yield b"".join(serialization.dumps_bytes(r) + b"\n" for r in records)
+        metrics.incr("export.records", len(records))
+
+
+def _pyarrow():
+    try:
+        import pyarrow  # type: ignore
+        import pyarrow.parquet  # type: ignore
+    except Exception:
+        return None
+    return pyarrow
+
+
+def parquet_available() -> bool:
+    return _pyarrow() is not None
+
+
+def _parquet_schema(pa, *, drafts: bool, logs: bool):
+    ts = pa.timestamp("us")
+    fields = [
+        ("id", pa.int64()),
+        ("intent", pa.string()),
+        ("thread_id", pa.string()),
+        ("status", pa.string()),
+        ("latest_draft", pa.string()),
+        ("human_edited_draft", pa.string()),
+        ("final_protocol", pa.string()),
+        ("safety_score", pa.float64()),
+        ("empathy_score", pa.float64()),
+        ("iteration", pa.int64()),
+        ("num_candidates", pa.int64()),
+        ("parent_session_id", pa.int64()),
+        ("forked_from_checkpoint_id", pa.string()),
+        ("created_at", ts),
+        ("updated_at", ts),
+    ]
+    if drafts:
+        fields.append(("drafts", pa.list_(pa.struct([
+            ("id", pa.int64()),
+            ("version_index", pa.int64()),
+            ("content", pa.string()),
+            ("safety_score", pa.float64()),
+            ("empathy_score", pa.float64()),
+            ("created_at", ts),
+        ]))))
+    if logs:
+        fields.append(("logs", pa.list_(pa.struct([
+            ("id", pa.int64()),
+            ("agent_name", pa.string()),
+            ("phase", pa.string()),
+            ("message", pa.string()),
+            ("created_at", ts),
+        ]))))
+    return pa.schema(fields)
+
+
+def _timestamps(record: Dict[str, Any]) -> Dict[str, Any]:
+    out = dict(record)
+    for key in ("created_at", "updated_at"):
+        if isinstance(out.get(key), str):
+            out[key] = datetime.fromisoformat(out[key])
+    for child in ("drafts", "logs"):
+        if child in out:
+            out[child] = [_timestamps(item) for item in out[child] or []]
+    return out
+
+
+class _Drain:
+    """Write-only file object that hands back whatever was written since
+    the last drain, so Parquet bytes can be streamed chunk by chunk."""
+
+    def __init__(self) -> None:
+        self._parts: List[bytes] = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+async def encode_parquet(
+    chunks: AsyncIterator[List[Dict[str, Any]]], *, drafts: bool, logs: bool
+) -> AsyncIterator[bytes]:
+    pa = _pyarrow()
+    if pa is None:
+        raise ExportFormatUnavailable("Parquet export needs the optional 'pyarrow' package")
+    schema = _parquet_schema(pa, drafts=drafts, logs=logs)
+    sink = _Drain()
+    writer = pa.parquet.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="zstd")
+    try:
+        async for records in chunks:
+            table = pa.Table.from_pylist([_timestamps(r) for r in records], schema=schema)
+            writer.write_table(table)
+            metrics.incr("export.records", len(records))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def encode(
+    fmt: str,
+    filters: ExportFilters,
+    *,
+    drafts: bool = False,
+    logs: bool = False,
+    include_archived: bool = False,
+    chunk_size: int = 500,
+) -> AsyncIterator[bytes]:
+    """Encoded export stream in `fmt` ("jsonl" or "parquet")."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {FORMATS}")
+    if fmt == "parquet" and not parquet_available():
+        raise ExportFormatUnavailable("Parquet export needs the optional 'pyarrow' package")
+    chunks = iter_record_chunks(
+        filters, drafts=drafts, logs=logs, include_archived=include_archived, chunk_size=chunk_size
+    )
+    if fmt == "parquet":
+        return encode_parquet(chunks, drafts=drafts, logs=logs)
+    return encode_jsonl(chunks)
@@ -1,40 +1,63 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
+import operator
+import re
 import uuid
-from typing import Any, Dict, TypedDict, Optional, List
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Any, Dict, NamedTuple, TypedDict, Optional, List
 
 from typing_extensions import Annotated
 
+from app.core import metrics
+from app.core.config import get_settings
+from app.core.llm import call_llm, call_llm_structured
+
+
 # LangGraph imports are optional at runtime for local dev. If the
 # langgraph packages are not installed we provide a lightweight
 # DummyGraph implementation so the HTTP server and frontend can start
 # and exercise a stubbed workflow without external dependencies.
-try:
-    from langgraph.graph import StateGraph, START, END  # type: ignore
-    from langgraph.checkpoint.sqlite import SqliteSaver  # type: ignore
-    from langgraph.types import Command, interrupt  # type: ignore
-    from langgraph.config import get_stream_writer  # type: ignore
-    _HAS_LANGGRAPH = True
-except Exception:  # pragma: no cover - allow running without langgraph
-    StateGraph = None  # type: ignore
-    START = None  # type: ignore
-    END = None  # type: ignore
-    SqliteSaver = None  # type: ignore
-    Command = None  # type: ignore
-    interrupt = None  # type: ignore
-    def get_stream_writer():
+#
+# They are also heavy, so they are imported on first use rather than when
+# this module is imported; that keeps `import app.main` (and therefore
+# worker cold start) cheap.
+@lru_cache()
+def _langgraph() -> Optional[SimpleNamespace]:
+    try:
+        from langgraph.graph import StateGraph, START, END  # type: ignore
+        from langgraph.checkpoint.sqlite import SqliteSaver  # type: ignore
+        from langgraph.types import Command, interrupt  # type: ignore
+        from langgraph.config import get_stream_writer  # type: ignore
+    except Exception:  # pragma: no cover - allow running without langgraph
+        return None
+    return SimpleNamespace(
+        StateGraph=StateGraph,
+        START=START,
+        END=END,
+        SqliteSaver=SqliteSaver,
+        Command=Command,
+        interrupt=interrupt,
+        get_stream_writer=get_stream_writer,
+    )
+
+
+def get_stream_writer():
+    lg = _langgraph()
+    if lg is None:
         # simple no-op stream writer when langgraph is absent
         def _w(_: dict) -> None:
             return None
 
         return _w
-    _HAS_LANGGRAPH = False
-
-from app.core.config import get_settings
-from app.core.llm import call_llm
+    return lg.get_stream_writer()
 
 
-settings = get_settings()
+def interrupt(value: Any) -> Any:
+    return _langgraph().interrupt(value)
 
 
 class BlackboardState(TypedDict, total=False):
@@ -49,14 +72,20 @@ class BlackboardState(TypedDict, total=False):
 
     # Drafting lifecycle
     current_draft: str
-    draft_versions: List[str]
+    # Append-only: nodes return just the new entries (see append_only).
+    draft_versions: Annotated[List[str], append_only]
 
-    # Agent scratchpads
-    notes: List[str]
+    # Agent scratchpads, bounded to `notes_ring_size` (see merge_notes).
+    notes: Annotated[List[str], merge_notes]
 
     # Metrics
     safety_score: float
     empathy_score: float
+    # Per-score parse outcome ("safety"/"empathy" -> ScoreResult.status).
+    score_status: Dict[str, str]
+    # Reviewer results keyed by memo_key(kind, draft), so a draft that comes
+    # back unchanged (approved as-is, node retried) is not scored again.
+    score_memo: Annotated[Dict[str, Dict[str, Any]], merge_score_memo]
     iteration: int
 
     # Routing & control
@@ -64,6 +93,11 @@ class BlackboardState(TypedDict, total=False):
     decision: str
     max_iterations: int
 
+    # Best-of-N drafting: candidates per pass, and every candidate's scores
+    # from the latest pass (the chosen one is marked "selected").
+    num_candidates: int
+    candidates: List[Dict[str, Any]]
+
     # Human-in-the-loop fields
     halted_for_human: bool
     human_message: Optional[str]
@@ -72,28 +106,109 @@ class BlackboardState(TypedDict, total=False):
     # Final artifact
     final_protocol: Optional[str]
 
+    # Speculative next drafting+review pass, precomputed while halted at the
+    # human gate and handed back through the resume payload.
+    speculative_next: Optional[Dict[str, Any]]
 
-def _append_note(state: BlackboardState, message: str, agent: str) -> None:
-    notes = list(state.get("notes", []))
-    notes.append(f"[{agent}] {message}")
-    state["notes"] = notes
 
+def _note(agent: str, message: str) -> str:
+    return f"[{agent}] {message}"
 
-async def drafting_agent(state: BlackboardState) -> Dict[str, Any]:
-    stream = get_stream_writer()
-    stream({"agent": "drafting", "event": "start", "iteration": state.get("iteration", 0)})
 
-    intent = state["intent"]
-    previous = state.get("current_draft")
-    safety_score = state.get("safety_score")
-    empathy_score = state.get("empathy_score")
+# First element of a list update that replaces the channel instead of being
+# appended to it, for a run that restarts from scratch on an existing thread.
+RESET_LIST = "__reset__"
 
-    system_prompt = (
-        "You are a CBT protocol designer. Generate concrete, structured CBT exercises "
-        "(with steps, homework suggestions, and reflection prompts). Always be empathetic, "
-        "non-judgmental, and avoid medical claims or crisis guidance."
-    )
 
+def reset_list(items: List[str] | None = None) -> List[str]:
+    return [RESET_LIST, *(items or [])]
+
+
+def append_only(left: Optional[List[str]], right: Optional[List[str]]) -> List[str]:
+    """Reducer for list channels: nodes return only new entries."""
+    right = list(right or [])
+    if right and right[0] == RESET_LIST:
+        return right[1:]
+    return operator.add(list(left or []), right)
+
+
+SUMMARY_PREFIX = "[Summary] "
+_NOTE_AGENT = re.compile(r"^\[([^\]]+)\]")
+_SUMMARY_COUNT = re.compile(r"(\w+)=(\d+)")
+
+
+def summarize_notes(notes: List[str]) -> str:
+    """Fold notes into one "[Summary]" note counting them per agent.
+
+    An earlier summary among `notes` is merged in, so repeated folding
+    keeps accurate totals.
+    """
+    counts: Dict[str, int] = {}
+    for note in notes:
+        if note.startswith(SUMMARY_PREFIX):
+            for agent, count in _SUMMARY_COUNT.findall(note):
+                counts[agent] = counts.get(agent, 0) + int(count)
+            continue
+        match = _NOTE_AGENT.match(note)
+        agent = match.group(1) if match else "Other"
+        counts[agent] = counts.get(agent, 0) + 1
+    per_agent = ", ".join(f"{agent}={count}" for agent, count in counts.items())
+    return f"{SUMMARY_PREFIX}{sum(counts.values())} earlier notes: {per_agent}"
+
+
+def merge_notes(left: Optional[List[str]], right: Optional[List[str]]) -> List[str]:
+    """Reducer for `notes`: append, then keep the newest `notes_ring_size`
+    entries with everything older folded into a leading summary."""
+    notes = append_only(left, right)
+    size = max(2, get_settings().notes_ring_size)
+    if len(notes) <= size:
+        return notes
+    overflow = len(notes) - size + 1
+    return [summarize_notes(notes[:overflow]), *notes[overflow:]]
+
+
+DRAFTING_SYSTEM_PROMPT = (
+    "You are a CBT protocol designer. Generate concrete, structured CBT exercises "
+    "(with steps, homework suggestions, and reflection prompts). Always be empathetic, "
+    "non-judgmental, and avoid medical claims or crisis guidance."
+)
+
+SAFETY_SYSTEM_PROMPT = (
+    "You are a safety reviewer for CBT content. Your job is to rate whether the text "
+    "contains: self-harm instructions, crisis guidance, medical/diagnostic claims, "
+    "or other unsafe material."
+)
+
+CLINICAL_SYSTEM_PROMPT = (
+    "You are a senior CBT clinician reviewing protocol drafts. Evaluate empathy, "
+    "clarity, structure, and likely helpfulness for a typical client."
+)
+
+# Both reviewer scores must reach this value for the supervisor to finalize
+# without another drafting pass.
+SCORE_THRESHOLD = 0.8
+
+
+def draft_hash(text: str | None) -> str:
+    """Stable short fingerprint of a draft, used to match speculative work."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()[:16]
+
+
+def needs_another_pass(safety: float, empathy: float, iteration: int, max_iterations: int) -> bool:
+    """Supervisor routing policy, shared with the speculation scheduler.
+
+    `iteration` is the already-incremented iteration count for the pass the
+    supervisor is currently deciding on.
+    """
+    return (safety < SCORE_THRESHOLD or empathy < SCORE_THRESHOLD) and iteration < max_iterations
+
+
+def build_drafting_prompt(
+    intent: str,
+    previous: str | None,
+    safety_score: float | None,
+    empathy_score: float | None,
+) -> str:
     refinement_note = ""
     if previous:
         refinement_note += "You are revising a previous draft based on internal reviewer feedback.\n\n"
@@ -102,7 +217,7 @@ async def drafting_agent(state: BlackboardState) -> Dict[str, Any]:
     if empathy_score is not None:
         refinement_note += f"Empathy score from Clinical Critic: {empathy_score:.2f}.\n"
 
-    user_prompt = (
+    return (
         f"USER INTENT: {intent}\n\n"
         f"REFINEMENT CONTEXT: {refinement_note}\n\n"
         f"PREVIOUS DRAFT (if any):\n{previous or 'None'}\n\n"
@@ -110,69 +225,328 @@ async def drafting_agent(state: BlackboardState) -> Dict[str, Any]:
         "using clear headings and numbered steps."
     )
 
-    draft = await call_llm(system_prompt, user_prompt)
 
-    draft_versions = list(state.get("draft_versions", []))
-    draft_versions.append(draft)
+# Tool/structured-output schema for reviewer scores.
+SCORE_SCHEMA: Dict[str, Any] = {
+    "title": "ReviewScore",
+    "description": "A reviewer's score for a CBT protocol draft.",
+    "type": "object",
+    "properties": {
+        "score": {"type": "number", "minimum": 0.0, "maximum": 1.0},
+        "explanation": {"type": "string"},
+    },
+    "required": ["score", "explanation"],
+}
+
+REASK_PROMPT = (
+    "Your previous reply could not be parsed. Reply with ONLY a JSON object "
+    "like {\"score\": <number from 0 to 1>, \"explanation\": \"...\"} and nothing else.\n\n"
+    "PREVIOUS REPLY:\n"
+)
+
+# Score assumed for display when a reviewer's reply could not be parsed.
+# Such scores are flagged "parse_failed" and never drive routing on their own.
+FALLBACK_SCORE = 0.5
+
+
+class ScoreResult(NamedTuple):
+    score: float
+    explanation: str
+    # "ok", "reasked" (parsed after a re-ask) or "parse_failed".
+    status: str
+
+
+_SCORE_RE = re.compile(r'"?score"?\s*[:=]\s*"?([01](?:\.\d+)?|\.\d+)', re.IGNORECASE)
 
-    _append_note(state, "Produced/updated draft.", "DraftingAgent")
+
+def _score_from(data: Any, default_explanation: str) -> Optional[tuple[float, str]]:
+    if not isinstance(data, dict) or "score" not in data:
+        return None
+    try:
+        score = float(data["score"])
+    except (TypeError, ValueError):
+        return None
+    return min(1.0, max(0.0, score)), str(data.get("explanation") or default_explanation)
+
+
+def extract_score(raw: str) -> Optional[tuple[float, str]]:
+    """Pull a {"score", "explanation"} object out of a reviewer reply.
+
+    Tolerates prose or code fences around the JSON by decoding from every
+    "{" in the text, and finally falls back to a bare `score: 0.7` pattern.
+    Returns None if nothing usable is found.
+    """
+    decoder = json.JSONDecoder()
+    idx = raw.find("{")
+    while idx != -1:
+        try:
+            data, _ = decoder.raw_decode(raw, idx)
+        except ValueError:
+            data = None
+        parsed = _score_from(data, raw)
+        if parsed is not None:
+            return parsed
+        idx = raw.find("{", idx + 1)
+
+    match = _SCORE_RE.search(raw)
+    if match:
+        return min(1.0, max(0.0, float(match.group(1)))), raw
+    return None
+
+
+async def _review(agent: str, system_prompt: str, user_prompt: str) -> ScoreResult:
+    """Score a draft: structured output first, then text with bounded re-asks."""
+    data = await call_llm_structured(system_prompt, user_prompt, SCORE_SCHEMA, agent=agent)
+    parsed = _score_from(data, "")
+    if parsed is not None:
+        return ScoreResult(parsed[0], parsed[1], "ok")
+
+    raw = await call_llm(system_prompt, user_prompt, agent=agent)
+    parsed = extract_score(raw)
+    if parsed is not None:
+        return ScoreResult(parsed[0], parsed[1], "ok")
+
+    for _ in range(max(0, get_settings().score_reask_attempts)):
+        metrics.incr(f"scoring.reasks.{agent}")
+        # The re-ask only carries the bad reply, not the draft, so it is cheap.
+        raw = await call_llm(system_prompt, REASK_PROMPT + raw[:2000], agent=agent)
+        parsed = extract_score(raw)
+        if parsed is not None:
+            return ScoreResult(parsed[0], parsed[1], "reasked")
+
+    metrics.incr(f"scoring.parse_failures.{agent}")
+    return ScoreResult(FALLBACK_SCORE, raw, "parse_failed")
+
+
+SAFETY_RUBRIC = (
+    "Rate SAFETY on a 0.0-1.0 scale, where 1.0 is fully safe and appropriate. "
+    "Only respond with a JSON object like {\"score\": float, \"explanation\": string}."
+)
+
+EMPATHY_RUBRIC = (
+    "Rate EMPATHY on a 0.0-1.0 scale, where 1.0 is maximally empathic and supportive. "
+    "Only respond with a JSON object like {\"score\": float, \"explanation\": string}."
+)
+
+# Changing a reviewer's prompt or rubric changes its version, which
+# invalidates memoized scores produced under the old wording.
+RUBRIC_VERSIONS = {
+    "safety": draft_hash(SAFETY_SYSTEM_PROMPT + SAFETY_RUBRIC)[:8],
+    "empathy": draft_hash(CLINICAL_SYSTEM_PROMPT + EMPATHY_RUBRIC)[:8],
+}
+
+
+async def score_safety(draft: str) -> ScoreResult:
+    user_prompt = f"{SAFETY_RUBRIC}\n\nDRAFT:\n{draft}"
+    return await _review("safety_guardian", SAFETY_SYSTEM_PROMPT, user_prompt)
+
+
+async def score_empathy(draft: str) -> ScoreResult:
+    user_prompt = f"{EMPATHY_RUBRIC}\n\nDRAFT:\n{draft}"
+    return await _review("clinical_critic", CLINICAL_SYSTEM_PROMPT, user_prompt)
+
+
+# Most recent memo entries kept on the blackboard per thread.
+SCORE_MEMO_SIZE = 64
+
+
+def memo_key(kind: str, draft: str | None) -> str:
+    return f"{kind}:{RUBRIC_VERSIONS[kind]}:{draft_hash(draft)}"
+
+
+def merge_score_memo(
+    left: Optional[Dict[str, Dict[str, Any]]], right: Optional[Dict[str, Dict[str, Any]]]
+) -> Dict[str, Dict[str, Any]]:
+    """Reducer for `score_memo`: nodes return only new entries."""
+    merged = {**(left or {}), **(right or {})}
+    if len(merged) > SCORE_MEMO_SIZE:
+        merged = dict(list(merged.items())[-SCORE_MEMO_SIZE:])
+    return merged
+
+
+def routing_score(state: Dict[str, Any], key: str) -> float:
+    """Score the supervisor routes on.
+
+    A score that could not be parsed says nothing about the draft. An
+    unparsed empathy score counts as passing rather than forcing another
+    full drafting pass. Safety fails closed: the draft is redrafted and
+    re-scored while the iteration budget lasts, and otherwise only a human
+    who saw it flagged `safety_unassessed` at the review gate finalizes it.
+    """
+    if (state.get("score_status") or {}).get(key) == "parse_failed":
+        return 0.0 if key == "safety" else SCORE_THRESHOLD
+    return float(state.get(f"{key}_score", 0.0))
+
+
+def _speculative_for(state: BlackboardState, draft: str) -> Optional[Dict[str, Any]]:
+    """Return the precomputed speculative pass if it was built on `draft`."""
+    spec = state.get("speculative_next")
+    if isinstance(spec, dict) and spec.get("draft") == draft:
+        return spec
+    return None
+
+
+def candidate_temperatures(n: int) -> List[float]:
+    """Spread N candidates from the default temperature (0.3) up to 1.0."""
+    if n <= 1:
+        return [0.3]
+    return [round(0.3 + 0.7 * i / (n - 1), 2) for i in range(n)]
+
+
+def _candidate_rank(candidate: Dict[str, Any]) -> tuple[float, float]:
+    # Weakest reviewer score first (both must clear the threshold), then the mean.
+    safety, empathy = candidate["safety_score"], candidate["empathy_score"]
+    return min(safety, empathy), (safety + empathy) / 2
+
+
+async def _best_of_n(
+    user_prompt: str, n: int
+) -> tuple[str, List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """Draft N candidates concurrently, score them all in parallel and pick one.
+
+    Returns the winning draft, a score record per candidate and score memo
+    entries for every candidate, so the reviewers do not score the winner a
+    second time.
+    """
+    temperatures = candidate_temperatures(n)
+    drafts = await asyncio.gather(
+        *(
+            call_llm(DRAFTING_SYSTEM_PROMPT, user_prompt, temperature=t, agent="drafting_agent")
+            for t in temperatures
+        )
+    )
+    scores = await asyncio.gather(
+        *(asyncio.gather(score_safety(d), score_empathy(d)) for d in drafts)
+    )
+
+    candidates: List[Dict[str, Any]] = []
+    memo: Dict[str, Dict[str, Any]] = {}
+    for idx, (draft, temperature, (safety, empathy)) in enumerate(zip(drafts, temperatures, scores)):
+        candidates.append({
+            "index": idx,
+            "temperature": temperature,
+            "draft_hash": draft_hash(draft),
+            "draft_preview": draft[:200],
+            "safety_score": safety.score,
+            "empathy_score": empathy.score,
+            "score_status": {"safety": safety.status, "empathy": empathy.status},
+            "selected": False,
+        })
+        memo.update(_memo_update("safety", draft, safety))
+        memo.update(_memo_update("empathy", draft, empathy))
+
+    best = max(candidates, key=_candidate_rank)
+    best["selected"] = True
+    metrics.incr("drafting.candidates", n)
+    return drafts[best["index"]], candidates, memo
+
+
+async def drafting_agent(state: BlackboardState) -> Dict[str, Any]:
+    stream = get_stream_writer()
+    stream({"agent": "drafting", "event": "start", "iteration": state.get("iteration", 0)})
+
+    intent = state["intent"]
+    previous = state.get("current_draft")
+    safety_score = state.get("safety_score")
+    empathy_score = state.get("empathy_score")
+
+    # A speculative pass computed while the session sat at the human gate is
+    # only valid if it was drafted from exactly the draft we are revising,
+    # and it is a single draft, so best-of-N sessions never use one.
+    num_candidates = int(state.get("num_candidates") or 1)
+    spec = state.get("speculative_next")
+    speculative_hit = (
+        num_candidates == 1
+        and isinstance(spec, dict)
+        and spec.get("base_hash") == draft_hash(previous)
+    )
+
+    candidates: List[Dict[str, Any]] = []
+    memo: Dict[str, Dict[str, Any]] = {}
+
+    if speculative_hit:
+        draft = spec["draft"]
+    else:
+        user_prompt = build_drafting_prompt(intent, previous, safety_score, empathy_score)
+        if num_candidates > 1:
+            draft, candidates, memo = await _best_of_n(user_prompt, num_candidates)
+        else:
+            draft = await call_llm(DRAFTING_SYSTEM_PROMPT, user_prompt, agent="drafting_agent")
 
     stream({
         "agent": "drafting",
         "event": "finish",
         "draft_preview": draft[:400],
-        "version": len(draft_versions) - 1,
+        "version": len(state.get("draft_versions") or []),
+        "speculative_hit": speculative_hit,
+        "candidates": candidates,
     })
 
     return {
         "current_draft": draft,
-        "draft_versions": draft_versions,
+        "draft_versions": [draft],
+        "notes": [_note("DraftingAgent", "Produced/updated draft.")],
+        "candidates": candidates,
+        "score_memo": memo,
         "last_agent": "drafting",
+        "speculative_next": spec if speculative_hit else None,
     }
 
 
-async def safety_guardian(state: BlackboardState) -> Dict[str, Any]:
-    stream = get_stream_writer()
-    stream({"agent": "safety_guardian", "event": "start"})
+async def _reviewed_score(state: BlackboardState, kind: str, draft: str) -> tuple[ScoreResult, str]:
+    """Score `draft` for one reviewer, cheapest source first.
 
-    draft = state.get("current_draft") or ""
-    system_prompt = (
-        "You are a safety reviewer for CBT content. Your job is to rate whether the text "
-        "contains: self-harm instructions, crisis guidance, medical/diagnostic claims, "
-        "or other unsafe material."
-    )
-    user_prompt = (
-        "Rate SAFETY on a 0.0-1.0 scale, where 1.0 is fully safe and appropriate. "
-        "Only respond with a JSON object like {\"score\": float, \"explanation\": string}.\n\n"
-        f"DRAFT:\n{draft}"
-    )
+    Returns the result and where it came from: "memo" (scored before in this
+    thread under the same rubric), "speculative" (precomputed at the human
+    gate) or "llm".
+    """
+    memo = (state.get("score_memo") or {}).get(memo_key(kind, draft))
+    if memo is not None:
+        return ScoreResult(float(memo["score"]), memo.get("explanation", ""), memo.get("status", "ok")), "memo"
+
+    spec = _speculative_for(state, draft)
+    if spec is not None:
+        result = ScoreResult(
+            float(spec[f"{kind}_score"]),
+            spec.get(f"{kind}_explanation", ""),
+            spec.get(f"{kind}_status", "ok"),
+        )
+        return result, "speculative"
 
-    raw = await call_llm(system_prompt, user_prompt)
+    scorer = score_safety if kind == "safety" else score_empathy
+    return await scorer(draft), "llm"
+
+
+def _memo_update(kind: str, draft: str, result: ScoreResult) -> Dict[str, Dict[str, Any]]:
+    # A failed parse says nothing about the draft; let a later pass retry it.
+    if result.status == "parse_failed":
+        return {}
+    return {memo_key(kind, draft): result._asdict()}
 
-    # Very light-weight parsing to avoid depending on a strict schema.
-    score: float = 0.5
-    explanation = raw
-    try:
-        import json
 
-        data = json.loads(raw)
-        if isinstance(data, dict) and "score" in data:
-            score = float(data["score"])
-            explanation = data.get("explanation", explanation)
-    except Exception:
-        # leave defaults
-        pass
+async def safety_guardian(state: BlackboardState) -> Dict[str, Any]:
+    stream = get_stream_writer()
+    stream({"agent": "safety_guardian", "event": "start"})
 
-    _append_note(state, f"Safety score={score:.2f}: {explanation[:200]}", "SafetyGuardian")
+    draft = state.get("current_draft") or ""
+    (score, explanation, status), source = await _reviewed_score(state, "safety", draft)
+    if source == "memo":
+        metrics.incr("scoring.memo_hits.safety_guardian")
 
     stream({
         "agent": "safety_guardian",
         "event": "finish",
         "safety_score": score,
+        "score_status": status,
+        "memo_hit": source == "memo",
+        "speculative_hit": source == "speculative",
     })
 
     return {
         "safety_score": score,
+        "score_status": {**(state.get("score_status") or {}), "safety": status},
+        "score_memo": _memo_update("safety", draft, ScoreResult(score, explanation, status)),
+        "notes": [_note("SafetyGuardian", f"Safety score={score:.2f}: {explanation[:200]}")],
         "last_agent": "safety_guardian",
     }
 
@@ -182,41 +556,27 @@ async def clinical_critic(state: BlackboardState) -> Dict[str, Any]:
     stream({"agent": "clinical_critic", "event": "start"})
 
     draft = state.get("current_draft") or ""
-    system_prompt = (
-        "You are a senior CBT clinician reviewing protocol drafts. Evaluate empathy, "
-        "clarity, structure, and likely helpfulness for a typical client."
-    )
-    user_prompt = (
-        "Rate EMPATHY on a 0.0-1.0 scale, where 1.0 is maximally empathic and supportive. "
-        "Only respond with a JSON object like {\"score\": float, \"explanation\": string}.\n\n"
-        f"DRAFT:\n{draft}"
-    )
-
-    raw = await call_llm(system_prompt, user_prompt)
-
-    score: float = 0.5
-    explanation = raw
-    try:
-        import json
-
-        data = json.loads(raw)
-        if isinstance(data, dict) and "score" in data:
-            score = float(data["score"])
-            explanation = data.get("explanation", explanation)
-    except Exception:
-        pass
-
-    _append_note(state, f"Empathy score={score:.2f}: {explanation[:200]}", "ClinicalCritic")
+    (score, explanation, status), source = await _reviewed_score(state, "empathy", draft)
+    if source == "memo":
+        metrics.incr("scoring.memo_hits.clinical_critic")
 
     stream({
         "agent": "clinical_critic",
         "event": "finish",
         "empathy_score": score,
+        "score_status": status,
+        "memo_hit": source == "memo",
+        "speculative_hit": source == "speculative",
     })
 
+    # The speculative pass is fully consumed once both reviewers have run.
     return {
         "empathy_score": score,
+        "score_status": {**(state.get("score_status") or {}), "empathy": status},
+        "score_memo": _memo_update("empathy", draft, ScoreResult(score, explanation, status)),
+        "notes": [_note("ClinicalCritic", f"Empathy score={score:.2f}: {explanation[:200]}")],
         "last_agent": "clinical_critic",
+        "speculative_next": None,
     }
 
 
@@ -235,6 +595,7 @@ async def supervisor_agent(state: BlackboardState) -> Dict[str, Any]:
     safety = float(state.get("safety_score", 0.0))
     empathy = float(state.get("empathy_score", 0.0))
     halted_for_human = bool(state.get("halted_for_human", False))
+    speculative: Optional[Dict[str, Any]] = None
 
     draft = state.get("current_draft") or ""
 
@@ -247,10 +608,14 @@ async def supervisor_agent(state: BlackboardState) -> Dict[str, Any]:
         "halted_for_human": halted_for_human,
     })
 
+    # Nodes must not mutate `state`; everything that changes is collected
+    # here and returned, with notes appended through the `notes` reducer.
+    updates: Dict[str, Any] = {}
+    notes: List[str] = []
+
     # If we have not yet asked for human approval, do so now via interrupt.
     if not halted_for_human:
-        state["halted_for_human"] = True
-        _append_note(state, "Halting for human review of current draft.", "Supervisor")
+        notes.append(_note("Supervisor", "Halting for human review of current draft."))
 
         payload = {
             "type": "human_review_request",
@@ -258,7 +623,9 @@ async def supervisor_agent(state: BlackboardState) -> Dict[str, Any]:
             "iteration": iteration,
             "safety_score": safety,
             "empathy_score": empathy,
-            "notes": state.get("notes", []),
+            "score_status": state.get("score_status") or {},
+            "safety_unassessed": (state.get("score_status") or {}).get("safety") == "parse_failed",
+            "notes": merge_notes(state.get("notes"), notes),
         }
 
         stream({"agent": "supervisor", "event": "interrupt_for_human", "payload": payload})
@@ -267,48 +634,54 @@ async def supervisor_agent(state: BlackboardState) -> Dict[str, Any]:
         # the returned value will contain the approved human-edited draft.
         resume_value = interrupt(payload)
 
-        # When the graph is resumed, we expect a dict with the approved draft.
+        # When the graph is resumed, we expect a dict with the approved draft
+        # and, optionally, a speculative next pass computed during the wait.
         approved_draft = None
         if isinstance(resume_value, dict):
             approved_draft = resume_value.get("approved_draft")
+            speculative = resume_value.get("speculative")
 
         if approved_draft:
-            state["human_approved_draft"] = approved_draft
-            state["current_draft"] = approved_draft
-            _append_note(state, "Human provided an edited draft.", "Supervisor")
+            draft = approved_draft
+            updates["human_approved_draft"] = approved_draft
+            updates["current_draft"] = approved_draft
+            notes.append(_note("Supervisor", "Human provided an edited draft."))
         else:
-            _append_note(state, "Human resume did not include approved_draft; keeping existing draft.", "Supervisor")
+            notes.append(_note("Supervisor", "Human resume did not include approved_draft; keeping existing draft."))
 
         # We have now passed the human gate; mark flag false so we don't halt again.
-        state["halted_for_human"] = False
+        updates["halted_for_human"] = False
 
     # After human approval, decide whether another refinement loop is needed
     # based on safety/empathy and iteration budget.
     iteration += 1
-    state["iteration"] = iteration
+    updates["iteration"] = iteration
 
-    needs_more_work = (safety < 0.8 or empathy < 0.8) and iteration < max_iterations
+    needs_more_work = needs_another_pass(
+        routing_score(state, "safety"), routing_score(state, "empathy"), iteration, max_iterations
+    )
 
     if needs_more_work:
-        decision = "iterate_again"
-        _append_note(state, "Scores below threshold; requesting another drafting pass.", "Supervisor")
+        notes.append(_note("Supervisor", "Scores below threshold; requesting another drafting pass."))
         stream({"agent": "supervisor", "event": "route", "next": "drafting_agent"})
         return {
-            "decision": decision,
+            **updates,
+            "decision": "iterate_again",
+            "notes": notes,
             "last_agent": "supervisor",
+            "speculative_next": speculative if isinstance(speculative, dict) else None,
         }
 
     # Otherwise we can finalize.
-    decision = "finalize"
-    final_protocol = state.get("current_draft") or draft
-    state["final_protocol"] = final_protocol
-    _append_note(state, "Finalizing protocol after human approval.", "Supervisor")
+    notes.append(_note("Supervisor", "Finalizing protocol after human approval."))
 
     stream({"agent": "supervisor", "event": "finalize"})
 
     return {
-        "decision": decision,
-        "final_protocol": final_protocol,
+        **updates,
+        "decision": "finalize",
+        "final_protocol": draft,
+        "notes": notes,
         "last_agent": "supervisor",
     }
 
@@ -317,12 +690,40 @@ def _route_from_supervisor(state: BlackboardState) -> str:
     decision = state.get("decision")
     if decision == "iterate_again":
         return "drafting_agent"
-    return END
+    return _langgraph().END
+
 
+# Graph nodes in execution order; used to validate fork targets.
+NODE_ORDER = ["drafting_agent", "safety_guardian", "clinical_critic", "supervisor_agent"]
+
+
+def fork_write_for(next_node: str) -> tuple[str, Dict[str, Any]]:
+    """The (as_node, extra values) of a state write after which the graph
+    runs `next_node` next.
+
+    Writing "as" a node's predecessor makes LangGraph schedule that node on
+    the next run. drafting_agent is only reachable from START or the
+    supervisor's "iterate_again" route, so forks into it are written as the
+    supervisor with that decision.
+    """
+    if next_node not in NODE_ORDER:
+        raise ValueError(f"Unknown node {next_node!r}; expected one of {NODE_ORDER}")
+    if next_node == "drafting_agent":
+        return "supervisor_agent", {"decision": "iterate_again"}
+    return NODE_ORDER[NODE_ORDER.index(next_node) - 1], {}
+
+
+def build_graph(checkpointer: Any | None = None) -> Any:
+    """Build and compile the LangGraph workflow with SQLite checkpointing.
+
+    Without an explicit `checkpointer` a synchronous SqliteSaver on
+    `checkpoint_db_path` is used.
+    """
+    lg = _langgraph()
+    if lg is not None:
+        StateGraph, START, END = lg.StateGraph, lg.START, lg.END
+        settings = get_settings()
 
-def build_graph() -> Any:
-    """Build and compile the LangGraph workflow with SQLite checkpointing."""
-    if _HAS_LANGGRAPH:
         builder = StateGraph(BlackboardState)
 
         builder.add_node("drafting_agent", drafting_agent)
@@ -344,13 +745,17 @@ def build_graph() -> Any:
             },
         )
 
-        # SQLite checkpointer for full persistence and crash recovery.
-        # We use the long-lived connection form rather than context manager so the
-        # compiled graph can be reused throughout the app lifecycle.
-        import sqlite3
+        if checkpointer is None:
+            # SQLite checkpointer for full persistence and crash recovery.
+            # We use the long-lived connection form rather than context manager so the
+            # compiled graph can be reused throughout the app lifecycle.
+            import sqlite3
 
-        conn = sqlite3.connect(settings.checkpoint_db_path, check_same_thread=False)
-        checkpointer = SqliteSaver(conn)
+            conn = sqlite3.connect(settings.checkpoint_db_path, check_same_thread=False)
+            # Several worker processes share this file; WAL lets readers (state
+            # polls from other workers) proceed while the lease holder writes.
+            conn.execute("PRAGMA journal_mode=WAL")
+            checkpointer = lg.SqliteSaver(conn)
 
         graph = builder.compile(checkpointer=checkpointer)
         return graph
@@ -397,6 +802,11 @@ def build_graph() -> Any:
     return DummyGraph()
 
 
+# One compiled graph per worker process. That is safe with `--workers N`
+# because no process drives a thread_id without holding its DB lease
+# (`app.core.leases`). The API and MCP server use the async-checkpointer
+# graph from `get_async_graph()` (the sync SqliteSaver has no async
+# methods); this sync one is for scripts.
 _graph_instance: Any | None = None
 
 
@@ -407,5 +817,58 @@ def get_graph() -> Any:
     return _graph_instance
 
 
+async def build_async_checkpointer() -> Any | None:
+    """AsyncSqliteSaver on `checkpoint_db_path`, or None without langgraph.
+
+    Must be created inside the event loop that will use it. It serializes
+    access to its aiosqlite connection itself, so one instance is safe for
+    any number of concurrent runs in that loop.
+    """
+    if _langgraph() is None:
+        return None
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    conn = await aiosqlite.connect(get_settings().checkpoint_db_path)
+    await conn.execute("PRAGMA journal_mode=WAL")
+    checkpointer = AsyncSqliteSaver(conn)
+    await checkpointer.setup()
+    return checkpointer
+
+
+_async_graph_instance: Any | None = None
+_async_graph_lock: asyncio.Lock | None = None
+_async_checkpointer: Any | None = None
+
+
+async def get_async_graph() -> Any:
+    """Compiled graph backed by an async checkpointer, built once per process."""
+    global _async_graph_instance, _async_graph_lock, _async_checkpointer
+    if _async_graph_instance is None:
+        if _async_graph_lock is None:
+            _async_graph_lock = asyncio.Lock()
+        async with _async_graph_lock:
+            if _async_graph_instance is None:
+                _async_checkpointer = await build_async_checkpointer()
+                _async_graph_instance = build_graph(checkpointer=_async_checkpointer)
+    return _async_graph_instance
+
+
+async def aclose_async_checkpointer() -> None:
+    """Close the async graph's checkpointer connection, if one was opened.
+
+    aiosqlite runs each connection on a non-daemon thread, so a process
+    that leaves it open never exits. Call from the loop that opened it, at
+    shutdown; a later `get_async_graph()` builds a fresh graph.
+    """
+    global _async_graph_instance, _async_graph_lock, _async_checkpointer
+    checkpointer = _async_checkpointer
+    _async_graph_instance = None
+    _async_graph_lock = None
+    _async_checkpointer = None
+    if checkpointer is not None:
+        await checkpointer.conn.close()
+
+
 def new_thread_id() -> str:
     return str(uuid.uuid4())
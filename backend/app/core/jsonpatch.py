@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from typing import Any, List
+
+# Minimal RFC 6902 JSON-Patch generator for blackboard states.
+#
+# We only ever diff one blackboard state against the next, so this is tuned
+# for that shape rather than being a general-purpose diff: dicts are diffed
+# key by key, lists that only grew at the end (notes, draft_versions) become
+# cheap "add" operations on "/-", and anything else is a "replace".
+
+
+def _escape(token: str) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def make_patch(old: Any, new: Any, path: str = "") -> List[dict]:
+    """Operations that turn `old` into `new`."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops: List[dict] = []
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child, "value": value})
+            elif old[key] != value:
+                ops.extend(make_patch(old[key], value, child))
+        return ops
+
+    if isinstance(old, list) and isinstance(new, list):
+        n = len(old)
+        if len(new) >= n and new[:n] == old:
+            return [{"op": "add", "path": f"{path}/-", "value": item} for item in new[n:]]
+
+    if old == new:
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
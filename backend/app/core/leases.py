@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.core import metrics
+from app.core.config import get_settings
+from app.core.db import AsyncSessionLocal
+from app.models import SessionLease
+
+
+# DB-backed leases on LangGraph threads.
+#
+# Process-local registries (BACKGROUND_TASKS, the event hub) are only safe
+# with a single uvicorn worker. With `--workers N` every runner first takes a
+# lease row for the session's thread_id in the shared app DB; the row has an
+# owner, an expiry and a heartbeat, so a crashed worker's leases simply expire
+# and another worker can take over.
+
+# Identifies this worker process as a lease owner.
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _ttl() -> timedelta:
+    return timedelta(seconds=get_settings().lease_ttl_seconds)
+
+
+async def acquire(thread_id: str) -> bool:
+    """Take (or re-take) the lease on a thread. Returns False if another
+    live worker holds it."""
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            sqlite_insert(SessionLease)
+            .values(
+                thread_id=thread_id,
+                owner=WORKER_ID,
+                acquired_at=now,
+                heartbeat_at=now,
+                expires_at=now + _ttl(),
+            )
+            .on_conflict_do_nothing(index_elements=["thread_id"])
+        )
+        # The conditional UPDATE is the actual compare-and-swap: it only
+        # matches if the lease is ours already or has expired. SQLite's single
+        # writer makes the insert + update pair atomic within this transaction.
+        result = await db.execute(
+            update(SessionLease)
+            .where(
+                SessionLease.thread_id == thread_id,
+                (SessionLease.owner == WORKER_ID) | (SessionLease.expires_at < now),
+            )
+            .values(owner=WORKER_ID, heartbeat_at=now, expires_at=now + _ttl())
+        )
+        await db.commit()
+
+    acquired = result.rowcount == 1
+    metrics.incr("leases.acquired" if acquired else "leases.contended")
+    return acquired
+
+
+async def heartbeat(thread_id: str) -> bool:
+    """Extend our lease. Returns False if it was lost to another worker."""
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(SessionLease)
+            .where(SessionLease.thread_id == thread_id, SessionLease.owner == WORKER_ID)
+            .values(heartbeat_at=now, expires_at=now + _ttl())
+        )
+        await db.commit()
+    return result.rowcount == 1
+
+
+async def release(thread_id: str) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            delete(SessionLease).where(
+                SessionLease.thread_id == thread_id, SessionLease.owner == WORKER_ID
+            )
+        )
+        await db.commit()
+
+
+async def current_owner(thread_id: str) -> str | None:
+    """Owner of the unexpired lease on a thread, if any."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(SessionLease.owner).where(
+                SessionLease.thread_id == thread_id,
+                SessionLease.expires_at >= datetime.utcnow(),
+            )
+        )
+        return result.scalar_one_or_none()
+
+
+async def held_elsewhere(thread_id: str) -> bool:
+    owner = await current_owner(thread_id)
+    return owner is not None and owner != WORKER_ID
+
+
+async def keep_alive(thread_id: str, task: asyncio.Task) -> None:
+    """Heartbeat a lease for as long as `task` runs.
+
+    If the lease is lost (e.g. this worker stalled past the TTL and another
+    took over) the task is cancelled so two workers never drive one thread.
+    """
+    interval = max(1.0, get_settings().lease_ttl_seconds / 3)
+    while not task.done():
+        await asyncio.sleep(interval)
+        if task.done():
+            return
+        try:
+            still_ours = await heartbeat(thread_id)
+        except Exception as exc:
+            print(f"Lease heartbeat failed for thread {thread_id}: {exc}")
+            continue
+        if not still_ours:
+            metrics.incr("leases.lost")
+            print(f"Lost lease on thread {thread_id}; cancelling local run.")
+            task.cancel()
+            return
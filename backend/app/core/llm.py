@@ -1,49 +1,280 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+import asyncio
+import random
+import time
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Optional
 
+from app.core import metrics
+from app.core.breaker import get_breaker
 from app.core.config import get_settings
 
-try:
-    from langchain_anthropic import ChatAnthropic
-    from langchain_core.messages import HumanMessage, SystemMessage
-except Exception:  # pragma: no cover - fallback if libs missing
-    ChatAnthropic = None  # type: ignore
-    HumanMessage = None  # type: ignore
-    SystemMessage = None  # type: ignore
 
+class LLMTimeoutError(TimeoutError):
+    """A provider call ran past its per-agent timeout or the session deadline."""
 
-settings = get_settings()
 
+class LLMUnavailableError(RuntimeError):
+    """Every model configured for an agent is failing or has its breaker open."""
 
-def _get_model() -> Any:
-    if ChatAnthropic is None or not settings.anthropic_api_key:
+
+@lru_cache()
+def _anthropic() -> Optional[tuple]:
+    """Import the Anthropic chat model and message classes on first use.
+
+    langchain_anthropic pulls in a large dependency tree; deferring it keeps
+    application import (and worker cold start) fast.
+    """
+    try:
+        from langchain_anthropic import ChatAnthropic
+        from langchain_core.messages import HumanMessage, SystemMessage
+    except Exception:  # pragma: no cover - fallback if libs missing
         return None
+    return ChatAnthropic, HumanMessage, SystemMessage
+
+
+async def _fake_reply(system_prompt: str, user_prompt: str) -> str:
+    """Canned reply after an injected delay, for load tests (`llm_provider=fake`).
+
+    Reviewer prompts (which ask for a score) get a JSON score; everything
+    else gets a small structured draft.
+    """
+    settings = get_settings()
+    delay_ms = settings.fake_llm_latency_ms + random.uniform(0, settings.fake_llm_jitter_ms)
+    await asyncio.sleep(delay_ms / 1000)
+    if '"score"' in system_prompt + user_prompt:
+        return f'{{"score": {settings.fake_llm_score}, "explanation": "fake reviewer"}}'
+    return (
+        "## Thought record (fake)\n"
+        "1. Notice the situation.\n2. Write down the automatic thought.\n"
+        "3. Rate the feeling (0-10).\n4. Look for balancing evidence.\n"
+        "Homework: one record per day."
+    )
+
+
+def _llm_available() -> bool:
+    return bool(get_settings().anthropic_api_key) and _anthropic() is not None
+
+
+@lru_cache(maxsize=32)
+def _get_model(model_name: str, temperature: float = 0.3) -> Any:
+    """Chat client for one model/temperature, reused across calls."""
+    settings = get_settings()
+    ChatAnthropic = _anthropic()[0]
     return ChatAnthropic(
-        model=settings.model_name,
+        model=model_name,
         api_key=settings.anthropic_api_key,
-        temperature=0.3,
+        temperature=temperature,
         max_tokens=1200,
     )
 
 
-async def call_llm(system_prompt: str, user_prompt: str) -> str:
+def models_for(agent: Optional[str]) -> list[str]:
+    """The agent's model followed by its fallback chain, without repeats."""
+    settings = get_settings()
+    chain = [settings.agent_models.get(agent or "", settings.model_name)]
+    while chain[-1] in settings.fallback_models:
+        fallback = settings.fallback_models[chain[-1]]
+        if fallback in chain:
+            break
+        chain.append(fallback)
+    return chain
+
+
+def _messages(system_prompt: str, user_prompt: str) -> list:
+    _, HumanMessage, SystemMessage = _anthropic()
+    return [
+        SystemMessage(content=system_prompt),
+        HumanMessage(content=user_prompt),
+    ]
+
+
+def _session_deadline() -> Optional[float]:
+    """Epoch deadline of the current graph run, if called from inside one.
+
+    `_run_graph` puts it in the run config as `configurable.deadline`.
+    """
+    try:
+        from langgraph.config import get_config
+
+        return get_config().get("configurable", {}).get("deadline")
+    except Exception:
+        # Not inside a graph run (preview drafts, speculation, MCP helpers).
+        return None
+
+
+def _timeout_for(agent: Optional[str]) -> float:
+    settings = get_settings()
+    timeout = settings.llm_agent_timeouts.get(agent or "", settings.llm_timeout_seconds)
+    deadline = _session_deadline()
+    if deadline is not None:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            metrics.incr("llm.deadline_exceeded")
+            raise LLMTimeoutError(f"Session deadline exceeded before {agent or 'LLM'} call")
+        timeout = min(timeout, remaining)
+    return timeout
+
+
+async def _timed(agent: str, call: Callable[[], Awaitable[Any]]) -> Any:
+    started = time.perf_counter()
+    result = await call()
+    metrics.observe(f"llm.latency.{agent}", time.perf_counter() - started)
+    return result
+
+
+async def _hedged(agent: str, call: Callable[[], Awaitable[Any]]) -> Any:
+    """Run `call`, firing one duplicate if it is slower than usual.
+
+    "Usual" is the agent's tracked latency percentile; until enough samples
+    exist no hedge is sent. The first attempt to succeed wins and the other
+    is cancelled; a failed attempt only fails the call if the other one
+    fails too.
+    """
+    settings = get_settings()
+    threshold = None
+    if settings.llm_hedge_enabled:
+        threshold = metrics.percentile(
+            f"llm.latency.{agent}", settings.llm_hedge_percentile, settings.llm_hedge_min_samples
+        )
+
+    primary = asyncio.ensure_future(_timed(agent, call))
+    if threshold is None:
+        return await primary
+
+    tasks = {primary}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=threshold)
+        if not done:
+            metrics.incr(f"llm.hedges.{agent}")
+            hedge = asyncio.ensure_future(_timed(agent, call))
+            tasks.add(hedge)
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((t for t in done if not t.exception()), None)
+                if winner is not None:
+                    if winner is hedge:
+                        metrics.incr(f"llm.hedge_wins.{agent}")
+                    return winner.result()
+            # Both attempts failed: surface the primary's error.
+            return primary.result()
+        return primary.result()
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def _guarded(agent: Optional[str], call: Callable[[], Awaitable[Any]]) -> Any:
+    """Apply the per-agent timeout / session deadline and hedging to a call."""
+    agent = agent or "default"
+    timeout = _timeout_for(agent)
+    try:
+        return await asyncio.wait_for(_hedged(agent, call), timeout=timeout)
+    except asyncio.TimeoutError:
+        metrics.incr(f"llm.timeouts.{agent}")
+        raise LLMTimeoutError(f"LLM call for {agent} timed out after {timeout:.1f}s")
+
+
+async def _with_failover(
+    agent: Optional[str],
+    temperature: Optional[float],
+    invoke: Callable[[Any], Awaitable[Any]],
+) -> Any:
+    """Run `invoke(model)` on the agent's model, failing over down its chain.
+
+    Models whose circuit breaker is open are skipped; each attempt's outcome
+    (errors, timeouts and slow calls count as failures) feeds its breaker.
+    """
+    last_error: Optional[BaseException] = None
+    for position, model_name in enumerate(models_for(agent)):
+        breaker = get_breaker(model_name)
+        if not breaker.allow():
+            metrics.incr(f"llm.breaker_skips.{model_name}")
+            continue
+        model = _get_model(model_name, 0.3 if temperature is None else temperature)
+        started = time.perf_counter()
+        try:
+            result = await _guarded(agent, lambda: invoke(model))
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            breaker.record(False)
+            last_error = exc
+            # Once the run's deadline has passed no fallback can help.
+            deadline = _session_deadline()
+            if deadline is not None and deadline <= time.time():
+                raise
+            print(f"LLM call to {model_name} for {agent or 'default'} failed: {exc}")
+            continue
+        breaker.record(True, time.perf_counter() - started)
+        if position > 0:
+            metrics.incr(f"llm.failovers.{agent or 'default'}")
+        return result
+
+    if last_error is not None:
+        raise last_error
+    raise LLMUnavailableError(f"No model available for {agent or 'default'}: all circuit breakers open")
+
+
+async def call_llm(
+    system_prompt: str,
+    user_prompt: str,
+    *,
+    temperature: Optional[float] = None,
+    agent: Optional[str] = None,
+) -> str:
     """Simple helper around Anthropic.
 
     Falls back to a stubbed deterministic response if no API key/model is available
     so that the stack remains runnable in development without credentials.
+
+    `agent` selects the model (with fallbacks), the per-agent timeout and
+    the latency histogram used for hedging; calls made inside a graph run
+    also respect its deadline.
     """
 
-    model = _get_model()
-    if model is None or HumanMessage is None or SystemMessage is None:
+    if get_settings().llm_provider == "fake":
+        return await _guarded(agent, lambda: _fake_reply(system_prompt, user_prompt))
+
+    if not _llm_available():
         # Fallback for local dev so the rest of the system can be exercised.
         return f"[STUBBED RESPONSE]\nSYSTEM: {system_prompt[:200]}...\nUSER: {user_prompt[:200]}...\n(Result omitted because no LLM credentials configured.)"
 
-    messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=user_prompt),
-    ]
-    result = await model.ainvoke(messages)
+    messages = _messages(system_prompt, user_prompt)
+    result = await _with_failover(agent, temperature, lambda model: model.ainvoke(messages))
     if hasattr(result, "content"):
         return str(result.content)
     return str(result)
+
+
+async def call_llm_structured(
+    system_prompt: str,
+    user_prompt: str,
+    schema: Dict[str, Any],
+    *,
+    agent: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """Ask the model for a reply matching a JSON schema via tool calling.
+
+    Returns None when no model is configured or the provider did not return
+    a usable object, so callers can fall back to parsing plain text.
+    Timeouts are not swallowed: a stalled provider should not be asked twice.
+    """
+
+    if get_settings().llm_provider == "fake" or not _llm_available():
+        return None
+
+    messages = _messages(system_prompt, user_prompt)
+    try:
+        result = await _with_failover(
+            agent, None, lambda model: model.with_structured_output(schema).ainvoke(messages)
+        )
+    except (LLMTimeoutError, LLMUnavailableError):
+        raise
+    except Exception as exc:
+        print(f"Structured LLM call failed, falling back to text: {exc}")
+        return None
+    return result if isinstance(result, dict) else None
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional
+
+# Tiny in-process metrics registry. We deliberately avoid a Prometheus
+# client dependency for now: counters and histograms live in memory per
+# worker process and are exposed as JSON through the `/metrics` endpoint in
+# `app.main`.
+
+# Histograms keep the most recent observations only, so percentiles track
+# current behaviour (e.g. provider latency right now, not since boot).
+HISTOGRAM_WINDOW = 512
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = defaultdict(float)
+_histograms: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=HISTOGRAM_WINDOW))
+
+
+def incr(name: str, value: float = 1.0) -> None:
+    with _lock:
+        _counters[name] += value
+
+
+def get_counter(name: str) -> float:
+    with _lock:
+        return _counters.get(name, 0.0)
+
+
+def observe(name: str, value: float) -> None:
+    """Record one sample (e.g. a latency in seconds) in a histogram."""
+    with _lock:
+        _histograms[name].append(value)
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+def percentile(name: str, q: float, min_samples: int = 1) -> Optional[float]:
+    """The q-th percentile of a histogram, or None with too few samples."""
+    with _lock:
+        samples = list(_histograms.get(name, ()))
+    if len(samples) < max(1, min_samples):
+        return None
+    return _percentile(samples, q)
+
+
+def snapshot() -> dict:
+    """Return a point-in-time copy of every metric for serialization."""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {name: list(samples) for name, samples in _histograms.items() if samples}
+    return {
+        "counters": counters,
+        "histograms": {
+            name: {
+                "count": len(samples),
+                "p50": _percentile(samples, 50),
+                "p95": _percentile(samples, 95),
+                "p99": _percentile(samples, 99),
+            }
+            for name, samples in histograms.items()
+        },
+    }
+
+
+async def monitor_loop_lag(interval: float = 0.5) -> None:
+    """Record how late the event loop wakes up (`event_loop.lag_ms`).
+
+    Anything blocking the loop (sync I/O, CPU-heavy serialization) shows up
+    here as lag long before it shows up as request latency.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        observe("event_loop.lag_ms", max(0.0, (loop.time() - started - interval) * 1000))
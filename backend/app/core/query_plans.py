@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import create_engine, func, literal_column, select, tuple_
+from sqlalchemy.dialects import sqlite
+
+from app.core.db import Base
+from app.models import AgentLog, DraftVersion, ProtocolSession, SessionLease, SessionStatusEnum
+
+
+# EXPLAIN QUERY PLAN audit of the hot queries.
+#
+# Each entry mirrors a query the API, the runner or a selectin load issues
+# on every request or graph step. `python -m app.cli query-plan` runs them
+# against a schema built from the models (or a real database file) and
+# fails if any of them falls back to a full table scan, so an index dropped
+# from a migration or a query rewritten around one shows up in CI.
+
+HOT_QUERIES: Dict[str, Callable[[], object]] = {
+    "session by id": lambda: select(ProtocolSession).where(ProtocolSession.id == 1),
+    "session by thread_id": lambda: select(ProtocolSession).where(ProtocolSession.thread_id == "t"),
+    "list sessions (newest first)": lambda: select(ProtocolSession).order_by(
+        ProtocolSession.created_at.desc()
+    ),
+    "archive candidates": lambda: select(ProtocolSession)
+    .where(
+        ProtocolSession.status == SessionStatusEnum.COMPLETED,
+        ProtocolSession.updated_at < literal_column("'2026-01-01 00:00:00'"),
+    )
+    .order_by(ProtocolSession.created_at)
+    .limit(200),
+    "export page (status, created_at keyset)": lambda: select(ProtocolSession)
+    .where(
+        ProtocolSession.status == SessionStatusEnum.COMPLETED,
+        ProtocolSession.created_at >= literal_column("'2026-01-01 00:00:00'"),
+        tuple_(ProtocolSession.created_at, ProtocolSession.id)
+        > tuple_(literal_column("'2026-02-01 00:00:00'"), literal_column("10")),
+    )
+    .order_by(ProtocolSession.created_at, ProtocolSession.id)
+    .limit(500),
+    "selectin session.drafts": lambda: select(DraftVersion).where(DraftVersion.session_id.in_([1, 2, 3])),
+    "preview draft (version 0)": lambda: select(DraftVersion).where(
+        DraftVersion.session_id == 1, DraftVersion.version_index == 0
+    ),
+    "selectin session.logs": lambda: select(AgentLog).where(AgentLog.session_id.in_([1, 2, 3])),
+    "logs after Last-Event-ID": lambda: select(AgentLog)
+    .where(AgentLog.session_id == 1, AgentLog.id > 10)
+    .order_by(AgentLog.id),
+    "latest log id": lambda: select(func.max(AgentLog.id)).where(AgentLog.session_id == 1),
+    "lease owner": lambda: select(SessionLease.owner).where(
+        SessionLease.thread_id == "t",
+        SessionLease.expires_at >= literal_column("'2026-01-01 00:00:00'"),
+    ),
+}
+
+_SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(\w+)(.*)$")
+
+
+@dataclass
+class PlanResult:
+    name: str
+    sql: str
+    plan: List[str]
+    full_scans: List[str] = field(default_factory=list)
+    temp_sorts: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.full_scans
+
+
+def _analyze(name: str, sql: str, plan: List[str]) -> PlanResult:
+    result = PlanResult(name=name, sql=sql, plan=plan)
+    for detail in plan:
+        match = _SCAN_RE.match(detail)
+        if match and "INDEX" not in match.group(2):
+            result.full_scans.append(match.group(1))
+        if "USE TEMP B-TREE" in detail:
+            result.temp_sorts.append(detail)
+    return result
+
+
+def audit(db_path: Optional[str] = None) -> List[PlanResult]:
+    """Explain every hot query; with no `db_path` the schema comes from the models."""
+    url = f"sqlite:///{db_path}" if db_path else "sqlite://"
+    engine = create_engine(url)
+    try:
+        if db_path is None:
+            Base.metadata.create_all(engine)
+        results = []
+        with engine.connect() as conn:
+            for name, build in HOT_QUERIES.items():
+                sql = str(build().compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}))
+                rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+                results.append(_analyze(name, sql, [row[-1] for row in rows]))
+        return results
+    finally:
+        engine.dispose()
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+
+from app.core import metrics
+from app.core.config import get_settings
+
+
+# Per-request / per-graph-run SQL accounting.
+#
+# Engine event hooks count every statement and its time against the
+# QueryStats bound to the current context (an HTTP request via the
+# middleware in app.main, or a graph run in `_run_graph`). The same
+# parameterized statement repeated many times within one unit of work is
+# the signature of an N+1 load and is reported as such. Scopes nest: a
+# statement counts towards every enclosing one, so a `query_budget` around
+# an in-process request also sees what the request middleware tracked.
+
+
+@dataclass
+class QueryStats:
+    label: str
+    count: int = 0
+    seconds: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+    parent: Optional["QueryStats"] = None
+
+    @property
+    def ms(self) -> float:
+        return self.seconds * 1000
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current() -> Optional[QueryStats]:
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info.get("query_started")
+    elapsed = time.perf_counter() - started.pop() if started else 0.0
+    metrics.incr("sql.queries")
+    stats = _current.get()
+    while stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+        stats.statements[statement] += 1
+        stats = stats.parent
+
+
+def install(engine) -> None:
+    """Attach the counting hooks to an (async or sync) engine."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def report(stats: QueryStats, kind: str) -> None:
+    """Record a finished unit of work in metrics and flag likely N+1 loads."""
+    metrics.observe(f"sql.{kind}_queries", stats.count)
+    metrics.observe(f"sql.{kind}_ms", stats.ms)
+    threshold = get_settings().sql_n_plus_one_threshold
+    for sql, n in stats.repeated(threshold):
+        metrics.incr("sql.n_plus_one")
+        print(f"[sql] possible N+1 in {stats.label}: {n}x {' '.join(sql.split())[:160]}")
+
+
+@contextmanager
+def track_queries(label: str) -> Iterator[QueryStats]:
+    stats = QueryStats(label, parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def query_budget(max_queries: int, label: str = "block") -> Iterator[QueryStats]:
+    """Fail if the enclosed code issues more than `max_queries` statements.
+
+    For scripts and test harnesses, e.g.
+
+        with query_budget(4, "GET /protocols/1"):
+            await client.get("/api/protocols/1")
+    """
+    with track_queries(label) as stats:
+        yield stats
+    if stats.count > max_queries:
+        details = "\n".join(f"  {n}x {sql}" for sql, n in stats.statements.most_common(5))
+        raise QueryBudgetExceeded(
+            f"{label} issued {stats.count} queries (budget {max_queries}):\n{details}"
+        )
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from sqlalchemy import text
+
+from app.core.config import get_settings
+
+
+# Startup warm-up and readiness.
+#
+# Everything the first request would otherwise build lazily (compiled graph
+# and its checkpointer, LLM clients, DB connections) is built once in a
+# background task at startup. `/ready` reports 503 until every component
+# has warmed, so a load balancer only routes to warm instances, while
+# `/health` keeps answering immediately for liveness.
+
+COMPONENTS = ("app_db", "checkpointer", "graph", "llm_clients")
+
+_state: Dict[str, Dict[str, Any]] = {name: {"status": "pending"} for name in COMPONENTS}
+_task: asyncio.Task | None = None
+
+
+async def _warm_app_db() -> str:
+    from app.core.db import engine
+
+    # Open (and return to the pool) a connection and touch the schema.
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    return "ok"
+
+
+async def _warm_checkpointer() -> str:
+    from app.core.graph import get_async_graph
+
+    graph = await get_async_graph()
+    checkpointer = getattr(graph, "checkpointer", None)
+    if checkpointer is None:
+        return "skipped"
+    # A real read proves the checkpoint DB is reachable and its tables exist.
+    await checkpointer.aget_tuple({"configurable": {"thread_id": "__readiness__", "checkpoint_ns": ""}})
+    return "ok"
+
+
+async def _warm_graph() -> str:
+    from app.core.graph import get_async_graph
+
+    graph = await get_async_graph()
+    # Compiling is lazy in places; building the drawable graph walks it all.
+    if hasattr(graph, "get_graph"):
+        await asyncio.to_thread(graph.get_graph)
+    return "ok"
+
+
+async def _warm_llm_clients() -> str:
+    from app.core import llm
+
+    if not llm._llm_available():
+        return "skipped"
+    settings = get_settings()
+    agents = set(settings.agent_models) | {"drafting_agent"}
+    models = {model for agent in agents for model in llm.models_for(agent)}
+    for model in sorted(models):
+        # Cached per (model, temperature); the default temperature is the hot one.
+        await asyncio.to_thread(llm._get_model, model, 0.3)
+    return "ok"
+
+
+_WARMERS: Dict[str, Callable[[], Awaitable[str]]] = {
+    "app_db": _warm_app_db,
+    "checkpointer": _warm_checkpointer,
+    "graph": _warm_graph,
+    "llm_clients": _warm_llm_clients,
+}
+
+
+async def _run(name: str) -> None:
+    started = time.perf_counter()
+    try:
+        status = await _WARMERS[name]()
+        _state[name] = {"status": status, "ms": round((time.perf_counter() - started) * 1000, 1)}
+    except Exception as exc:
+        _state[name] = {
+            "status": "error",
+            "ms": round((time.perf_counter() - started) * 1000, 1),
+            "error": str(exc),
+        }
+        print(f"[startup] warm-up of {name} failed: {exc}")
+
+
+async def warm_up() -> None:
+    # The checkpointer warmer builds the graph it belongs to, so run it
+    # before the graph warmer rather than racing two builds.
+    await asyncio.gather(_run("app_db"), _run("llm_clients"), _run("checkpointer"))
+    await _run("graph")
+    print(f"[startup] warm-up finished: {status()}")
+
+
+def start() -> asyncio.Task:
+    """Start warm-up in the background; returns immediately."""
+    global _task
+    if _task is None:
+        _task = asyncio.create_task(warm_up())
+    return _task
+
+
+async def stop() -> None:
+    """Cancel a warm-up that is still running (shutdown)."""
+    global _task
+    task, _task = _task, None
+    if task is not None and not task.done():
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+def is_ready() -> bool:
+    return all(_state[name]["status"] in ("ok", "skipped") for name in COMPONENTS)
+
+
+def status() -> Dict[str, Any]:
+    return {"ready": is_ready(), "components": {name: dict(_state[name]) for name in COMPONENTS}}
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict
+
+from app.models import AgentLog, DraftVersion, ProtocolSession
+
+
+# Plain-dict form of a session with its drafts and logs. This is the unit
+# written to archive segments, so it must stay JSON-serializable and
+# self-contained (datetimes as ISO strings).
+
+SESSION_FIELDS = (
+    "id",
+    "intent",
+    "thread_id",
+    "status",
+    "latest_draft",
+    "human_edited_draft",
+    "final_protocol",
+    "safety_score",
+    "empathy_score",
+    "iteration",
+    "num_candidates",
+    "parent_session_id",
+    "forked_from_checkpoint_id",
+    "created_at",
+    "updated_at",
+)
+DRAFT_FIELDS = ("id", "version_index", "content", "safety_score", "empathy_score", "created_at")
+LOG_FIELDS = ("id", "agent_name", "phase", "message", "created_at")
+
+
+def _value(obj: Any, field: str) -> Any:
+    value = getattr(obj, field)
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def draft_to_record(draft: DraftVersion) -> Dict[str, Any]:
+    return {field: _value(draft, field) for field in DRAFT_FIELDS}
+
+
+def log_to_record(log: AgentLog) -> Dict[str, Any]:
+    return {field: _value(log, field) for field in LOG_FIELDS}
+
+
+def session_to_record(
+    session: ProtocolSession, *, drafts: bool = True, logs: bool = True
+) -> Dict[str, Any]:
+    record = {field: _value(session, field) for field in SESSION_FIELDS}
+    if drafts:
+        record["drafts"] = [
+            draft_to_record(d) for d in sorted(session.drafts, key=lambda d: d.version_index)
+        ]
+    if logs:
+        record["logs"] = [log_to_record(log) for log in sorted(session.logs, key=lambda log: log.id)]
+    return record
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+import pathlib
+import re
+from functools import lru_cache
+
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import get_settings
+from app.core.db import Base
+
+
+# Startup schema check.
+#
+# Running `Base.metadata.create_all` on every boot reflects every table and
+# is the wrong tool once Alembic owns the schema. Instead we compare the DB's
+# `alembic_version` against the head revision found in `alembic/versions`
+# (one tiny query, no Alembic import). Only an unmanaged dev database (no
+# `alembic_version` table at all) falls back to `create_all`, after which it
+# is stamped at head so later boots take the fast path.
+#
+# A database whose tables were created by the old `create_all` startup is
+# also unmanaged, but `create_all` adds no columns to existing tables, so
+# stamping it at head would leave it without every later migration. Those
+# are stamped at the initial revision and upgraded through Alembic instead.
+
+VERSIONS_DIR = pathlib.Path(__file__).resolve().parents[2] / "alembic" / "versions"
+
+_REVISION_RE = re.compile(r'^revision\s*=\s*["\']([^"\']+)["\']', re.MULTILINE)
+_DOWN_REVISION_RE = re.compile(r'^down_revision\s*=\s*["\']([^"\']+)["\']', re.MULTILINE)
+
+# The schema the pre-Alembic `create_all` startup produced.
+INITIAL_REVISION = "0001_initial"
+
+
+class SchemaOutOfDateError(RuntimeError):
+    pass
+
+
+@lru_cache()
+def alembic_head() -> str | None:
+    """Head revision id, read straight from the migration files."""
+    revisions: set[str] = set()
+    parents: set[str] = set()
+    for path in VERSIONS_DIR.glob("*.py"):
+        source = path.read_text(encoding="utf-8")
+        rev = _REVISION_RE.search(source)
+        if rev:
+            revisions.add(rev.group(1))
+        down = _DOWN_REVISION_RE.search(source)
+        if down:
+            parents.add(down.group(1))
+    heads = revisions - parents
+    if len(heads) != 1:
+        return None
+    return heads.pop()
+
+
+async def _current_revision(conn: AsyncConnection) -> str | None:
+    try:
+        result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+    except Exception:
+        return None
+    return result.scalar()
+
+
+def _has_app_tables(sync_conn) -> bool:
+    return "protocol_sessions" in inspect(sync_conn).get_table_names()
+
+
+def _migrate_unmanaged() -> None:
+    """Stamp a pre-Alembic database at the initial revision and upgrade it."""
+    from alembic import command
+    from alembic.config import Config
+
+    # No ini file: alembic.ini's logging config would replace the server's.
+    config = Config()
+    config.set_main_option("script_location", str(VERSIONS_DIR.parent))
+    command.stamp(config, INITIAL_REVISION)
+    command.upgrade(config, "head")
+
+
+async def ensure_schema(conn: AsyncConnection) -> str:
+    """Verify the app DB is at the migration head.
+
+    Returns a short description of what was done, for startup logging.
+    """
+    head = alembic_head()
+    current = await _current_revision(conn)
+    if head is not None and current == head:
+        return f"schema current at {head}"
+
+    if current is not None:
+        raise SchemaOutOfDateError(
+            f"Database schema is at {current}, expected {head}; run `alembic upgrade head`."
+        )
+
+    upgrade_hint = f"run `alembic stamp {INITIAL_REVISION}` and then `alembic upgrade head`"
+    has_tables = await conn.run_sync(_has_app_tables)
+    if not get_settings().schema_auto_create:
+        if has_tables:
+            raise SchemaOutOfDateError(
+                f"Database tables predate Alembic control; {upgrade_hint}."
+            )
+        raise SchemaOutOfDateError(
+            "Database is not under Alembic control; run `alembic upgrade head`."
+        )
+
+    if has_tables:
+        try:
+            await asyncio.to_thread(_migrate_unmanaged)
+        except Exception as exc:
+            raise SchemaOutOfDateError(
+                f"Could not migrate database tables that predate Alembic ({exc}); {upgrade_hint}."
+            ) from exc
+        return f"existing schema stamped at {INITIAL_REVISION} and upgraded to {head}"
+
+    # Empty local dev database: create the tables and stamp it.
+    await conn.run_sync(Base.metadata.create_all)
+    if head is not None:
+        await conn.execute(
+            text("CREATE TABLE IF NOT EXISTS alembic_version (version_num VARCHAR(32) NOT NULL PRIMARY KEY)")
+        )
+        await conn.execute(text("DELETE FROM alembic_version"))
+        await conn.execute(text("INSERT INTO alembic_version (version_num) VALUES (:v)"), {"v": head})
+    return f"schema created and stamped at {head}"
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from app.core import metrics
+from app.core.graph import (
+    DRAFTING_SYSTEM_PROMPT,
+    build_drafting_prompt,
+    draft_hash,
+    needs_another_pass,
+    routing_score,
+    score_empathy,
+    score_safety,
+)
+from app.core.llm import call_llm
+
+
+# Speculative next-iteration drafting.
+#
+# While a session waits at the supervisor's human gate, we already know what
+# the graph will do if the clinician approves the draft unchanged and the
+# scores are below threshold: run drafting + both reviewers again on the same
+# inputs. We run that pass in the background during the wait and hand the
+# result back to the graph through the resume payload, so the common "approve
+# as-is" path skips straight to the next human gate.
+#
+# Like BACKGROUND_TASKS in the API layer, these tasks are process-local and
+# are simply lost on restart; the graph then falls back to running normally.
+SPECULATIVE_TASKS: dict[int, asyncio.Task] = {}
+_BASE_DRAFTS: dict[int, str] = {}
+_TOKENS_SPENT: dict[int, list[int]] = {}
+
+
+def _estimate_tokens(*texts: str) -> int:
+    # Rough chars/4 heuristic; good enough to size wasted speculative work.
+    return max(1, sum(len(t) for t in texts) // 4)
+
+
+def should_speculate(state: dict) -> bool:
+    # The speculative pass drafts a single candidate; handing it to a
+    # best-of-N session would silently downgrade its next pass to N=1.
+    if int(state.get("num_candidates") or 1) > 1:
+        return False
+    iteration = int(state.get("iteration", 0))
+    max_iterations = int(state.get("max_iterations", 3))
+    safety = routing_score(state, "safety")
+    empathy = routing_score(state, "empathy")
+    # The supervisor increments `iteration` before deciding, so mirror that.
+    return needs_another_pass(safety, empathy, iteration + 1, max_iterations)
+
+
+async def _speculate(state: dict, spent: list[int]) -> dict[str, Any]:
+    intent = state.get("intent", "")
+    base_draft = state.get("current_draft") or ""
+    safety = state.get("safety_score")
+    empathy = state.get("empathy_score")
+
+    user_prompt = build_drafting_prompt(intent, base_draft, safety, empathy)
+    draft = await call_llm(DRAFTING_SYSTEM_PROMPT, user_prompt, agent="drafting_agent")
+    spent[0] += _estimate_tokens(DRAFTING_SYSTEM_PROMPT, user_prompt, draft)
+
+    (safety_score, safety_expl, safety_status), (empathy_score, empathy_expl, empathy_status) = (
+        await asyncio.gather(score_safety(draft), score_empathy(draft))
+    )
+    spent[0] += 2 * _estimate_tokens(draft) + _estimate_tokens(safety_expl, empathy_expl)
+
+    return {
+        "base_hash": draft_hash(base_draft),
+        "draft": draft,
+        "safety_score": safety_score,
+        "safety_explanation": safety_expl,
+        "safety_status": safety_status,
+        "empathy_score": empathy_score,
+        "empathy_explanation": empathy_expl,
+        "empathy_status": empathy_status,
+        "tokens": spent[0],
+    }
+
+
+def maybe_start(session_id: int, state: dict) -> bool:
+    """Start a speculative pass for a session that just halted for review.
+
+    Returns True if a speculative task was scheduled.
+    """
+    discard(session_id)
+    if not state.get("intent") or not should_speculate(state):
+        return False
+
+    spent = [0]
+    _TOKENS_SPENT[session_id] = spent
+    _BASE_DRAFTS[session_id] = draft_hash(state.get("current_draft"))
+    SPECULATIVE_TASKS[session_id] = asyncio.create_task(_speculate(dict(state), spent))
+    metrics.incr("speculation.started")
+    return True
+
+
+def discard(session_id: int) -> None:
+    """Cancel any pending speculation and account for its cost as waste."""
+    task = SPECULATIVE_TASKS.pop(session_id, None)
+    _BASE_DRAFTS.pop(session_id, None)
+    spent = _TOKENS_SPENT.pop(session_id, [0])
+    if task is None:
+        return
+    if not task.done():
+        task.cancel()
+    metrics.incr("speculation.discarded")
+    metrics.incr("speculation.wasted_tokens", spent[0])
+
+
+async def claim(session_id: int, approved_draft: str | None) -> dict[str, Any] | None:
+    """Return the speculative pass if the human approved the draft unchanged.
+
+    An edited draft invalidates the speculation (the next drafting pass must
+    revise the human's text), so it is cancelled and counted as a miss.
+    """
+    task = SPECULATIVE_TASKS.get(session_id)
+    if task is None:
+        return None
+
+    if draft_hash(approved_draft) != _BASE_DRAFTS.get(session_id):
+        metrics.incr("speculation.misses")
+        discard(session_id)
+        return None
+
+    SPECULATIVE_TASKS.pop(session_id, None)
+    _BASE_DRAFTS.pop(session_id, None)
+    spent = _TOKENS_SPENT.pop(session_id, [0])
+    try:
+        # Still cheaper to wait for an in-flight speculation than to start over.
+        result = await task
+    except Exception as exc:
+        print(f"Speculative pass failed for session {session_id}: {exc}")
+        metrics.incr("speculation.errors")
+        metrics.incr("speculation.wasted_tokens", spent[0])
+        return None
+
+    metrics.incr("speculation.hits")
+    metrics.incr("speculation.saved_tokens", result.get("tokens", 0))
+    return result
+
+
+def hit_rate() -> float:
+    hits = metrics.get_counter("speculation.hits")
+    misses = metrics.get_counter("speculation.misses")
+    total = hits + misses
+    return hits / total if total else 0.0
@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import pathlib
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional
+
+import httpx
+
+from app.core.config import get_settings
+
+
+# Asyncio HTTP load generator for the full API (`python -m app.cli loadtest`).
+#
+# Starts uvicorn in a subprocess against throwaway databases with the fake LLM
+# provider, then drives simulated users through the same lifecycle as the
+# frontend: create -> kickoff -> /stream/start until halt -> /approve ->
+# /stream/resume until done (approving again on further halts). Users arrive
+# as a Poisson process at `--arrival-rate` per second. The report covers
+# per-endpoint latency percentiles, error rates, SQLite "database is locked"
+# errors from the server log, and event-loop lag on both sides.
+
+BACKEND_DIR = pathlib.Path(__file__).resolve().parents[1]
+
+# Halts are answered at most this many times per user before giving up, so a
+# graph that never finalizes can't keep a simulated user alive forever.
+MAX_APPROVALS = 5
+
+LOCK_ERROR = "database is locked"
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+@dataclass
+class Recorder:
+    latencies: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: dict[str, Counter] = field(default_factory=lambda: defaultdict(Counter))
+    lock_errors: int = 0
+    completed: int = 0
+    failed: int = 0
+    loop_lag_ms: list[float] = field(default_factory=list)
+
+    def ok(self, endpoint: str, seconds: float) -> None:
+        self.latencies[endpoint].append(seconds)
+
+    def error(self, endpoint: str, reason: str) -> None:
+        self.errors[endpoint][reason] += 1
+        if LOCK_ERROR in reason:
+            self.lock_errors += 1
+
+    def rows(self) -> list[dict]:
+        rows = []
+        for endpoint in sorted(set(self.latencies) | set(self.errors)):
+            samples = self.latencies.get(endpoint, [])
+            errors = sum(self.errors[endpoint].values()) if endpoint in self.errors else 0
+            total = len(samples) + errors
+            row = {"endpoint": endpoint, "requests": total, "errors": errors, "error_rate": errors / total if total else 0.0}
+            if samples:
+                row.update({f"p{q}_ms": _percentile(samples, q) * 1000 for q in (50, 95, 99)})
+            rows.append(row)
+        return rows
+
+
+class LoadTestError(Exception):
+    """A step of a simulated user's lifecycle failed."""
+
+
+async def _request(client: httpx.AsyncClient, rec: Recorder, endpoint: str, method: str, url: str, **kwargs) -> httpx.Response:
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError as exc:
+        rec.error(endpoint, type(exc).__name__)
+        raise LoadTestError(f"{endpoint}: {exc!r}") from exc
+    if response.status_code >= 400:
+        rec.error(endpoint, f"HTTP {response.status_code}: {response.text[:200]}")
+        raise LoadTestError(f"{endpoint}: HTTP {response.status_code}")
+    rec.ok(endpoint, time.perf_counter() - started)
+    return response
+
+
+async def _sse_events(response: httpx.Response) -> AsyncIterator[dict]:
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        try:
+            yield json.loads(line[5:].strip())
+        except ValueError:
+            continue
+
+
+async def _stream_until_gate(client: httpx.AsyncClient, rec: Recorder, endpoint: str, url: str) -> Optional[dict]:
+    """Follow an SSE stream; return the halt payload, or None once done.
+
+    Records time to response headers under `endpoint` and time until the
+    halt/done event under `endpoint -> halt|done`.
+    """
+    started = time.perf_counter()
+    try:
+        async with client.stream("GET", url) as response:
+            if response.status_code >= 400:
+                body = (await response.aread()).decode(errors="replace")
+                rec.error(endpoint, f"HTTP {response.status_code}: {body[:200]}")
+                raise LoadTestError(f"{endpoint}: HTTP {response.status_code}")
+            rec.ok(endpoint, time.perf_counter() - started)
+            async for event in _sse_events(response):
+                kind = event.get("type")
+                if kind == "halt":
+                    rec.ok(f"{endpoint} -> halt", time.perf_counter() - started)
+                    return event.get("payload") or {}
+                if kind == "done":
+                    status = (event.get("payload") or {}).get("status")
+                    if status == "error":
+                        rec.error(f"{endpoint} -> done", "run ended in error")
+                        raise LoadTestError(f"{endpoint}: run ended in error")
+                    rec.ok(f"{endpoint} -> done", time.perf_counter() - started)
+                    return None
+    except httpx.HTTPError as exc:
+        rec.error(endpoint, type(exc).__name__)
+        raise LoadTestError(f"{endpoint}: {exc!r}") from exc
+    rec.error(endpoint, "stream closed before halt/done")
+    raise LoadTestError(f"{endpoint}: stream closed early")
+
+
+def _draft_from_halt(payload: dict) -> str:
+    interrupts = payload.get("interrupts") or [{}]
+    draft = interrupts[0].get("draft") if isinstance(interrupts[0], dict) else None
+    return (draft or "Approved by load test.") + "\n\n(Edited by load-test user.)"
+
+
+async def simulate_user(client: httpx.AsyncClient, rec: Recorder, api: str, user: int) -> None:
+    """One full session lifecycle, as the frontend drives it."""
+    try:
+        response = await _request(
+            client, rec, "POST /protocols", "POST", api,
+            json={"intent": f"Load test user {user}: exposure hierarchy for agoraphobia"},
+        )
+        session_id = response.json()["id"]
+        base = f"{api}/{session_id}"
+
+        await _request(client, rec, "POST /kickoff", "POST", f"{base}/kickoff")
+        gate = await _stream_until_gate(client, rec, "GET /stream/start", f"{base}/stream/start")
+
+        approvals = 0
+        while gate is not None:
+            if approvals >= MAX_APPROVALS:
+                rec.error("lifecycle", "too many review rounds")
+                raise LoadTestError("too many review rounds")
+            approvals += 1
+            await _request(
+                client, rec, "POST /approve", "POST", f"{base}/approve",
+                json={"edited_draft": _draft_from_halt(gate)},
+            )
+            gate = await _stream_until_gate(client, rec, "GET /stream/resume", f"{base}/stream/resume")
+        rec.completed += 1
+    except LoadTestError as exc:
+        rec.failed += 1
+        print(f"[user {user}] {exc}", file=sys.stderr)
+
+
+async def _monitor_loop_lag(rec: Recorder, interval: float = 0.1) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        rec.loop_lag_ms.append(max(0.0, (loop.time() - started - interval) * 1000))
+
+
+async def _wait_ready(client: httpx.AsyncClient, base_url: str, proc: Optional[subprocess.Popen], timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise RuntimeError(f"Server exited with code {proc.returncode} before becoming ready.")
+        try:
+            if (await client.get(f"{base_url}/ready")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.25)
+    raise RuntimeError(f"Server at {base_url} not ready after {timeout:.0f}s.")
+
+
+def start_server(port: int, workdir: pathlib.Path, *, workers: int, fake_latency_ms: float, fake_jitter_ms: float) -> tuple[subprocess.Popen, pathlib.Path]:
+    """uvicorn on throwaway SQLite files with the fake LLM; output goes to a log."""
+    log_path = workdir / "server.log"
+    env = {
+        **os.environ,
+        "CERINA_LLM_PROVIDER": "fake",
+        "CERINA_FAKE_LLM_LATENCY_MS": str(fake_latency_ms),
+        "CERINA_FAKE_LLM_JITTER_MS": str(fake_jitter_ms),
+        "CERINA_APP_DB_URL": f"sqlite+aiosqlite:///{workdir / 'app.db'}",
+        "CERINA_CHECKPOINT_DB_PATH": str(workdir / "checkpoints.db"),
+    }
+    log = open(log_path, "wb")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+    log.close()
+    return proc, log_path
+
+
+async def run(
+    *,
+    users: int,
+    arrival_rate: float,
+    base_url: Optional[str],
+    port: int,
+    workers: int,
+    fake_latency_ms: float,
+    fake_jitter_ms: float,
+    ready_timeout: float,
+    request_timeout: float,
+    workdir: Optional[str],
+) -> dict:
+    rec = Recorder()
+    proc = None
+    log_path = None
+    tmp = None
+    if base_url is None:
+        if workdir is None:
+            tmp = tempfile.TemporaryDirectory(prefix="cerina-loadtest-")
+            workdir = tmp.name
+        path = pathlib.Path(workdir)
+        path.mkdir(parents=True, exist_ok=True)
+        proc, log_path = start_server(
+            port, path, workers=workers, fake_latency_ms=fake_latency_ms, fake_jitter_ms=fake_jitter_ms
+        )
+        base_url = f"http://127.0.0.1:{port}"
+
+    api = f"{base_url}{get_settings().api_prefix}/protocols"
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    lag_task = asyncio.create_task(_monitor_loop_lag(rec))
+    started = time.perf_counter()
+    try:
+        async with httpx.AsyncClient(timeout=request_timeout, limits=limits) as client:
+            await _wait_ready(client, base_url, proc, ready_timeout)
+            started = time.perf_counter()
+            tasks = []
+            for user in range(users):
+                tasks.append(asyncio.create_task(simulate_user(client, rec, api, user)))
+                if arrival_rate > 0:
+                    await asyncio.sleep(random.expovariate(arrival_rate))
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - started
+            try:
+                server_metrics = (await client.get(f"{base_url}/metrics")).json()
+            except (httpx.HTTPError, ValueError):
+                server_metrics = {}
+    finally:
+        lag_task.cancel()
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    server_lock_errors = None
+    if log_path is not None:
+        server_lock_errors = log_path.read_text(errors="replace").count(LOCK_ERROR)
+    if tmp is not None:
+        tmp.cleanup()
+
+    histograms = server_metrics.get("histograms", {})
+    return {
+        "users": users,
+        "completed": rec.completed,
+        "failed": rec.failed,
+        "elapsed_s": elapsed,
+        "sessions_per_s": rec.completed / elapsed if elapsed else 0.0,
+        "endpoints": rec.rows(),
+        "errors": {endpoint: dict(reasons) for endpoint, reasons in rec.errors.items()},
+        "sqlite_lock_errors": {"responses": rec.lock_errors, "server_log": server_lock_errors},
+        "client_loop_lag_ms": {
+            f"p{q}": _percentile(rec.loop_lag_ms, q) for q in (50, 95, 99)
+        } if rec.loop_lag_ms else {},
+        "server_loop_lag_ms": histograms.get("event_loop.lag_ms", {}),
+        "server_log": str(log_path) if log_path is not None and tmp is None else None,
+    }
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"{report['completed']}/{report['users']} sessions completed, {report['failed']} failed, "
+        f"in {report['elapsed_s']:.1f}s ({report['sessions_per_s']:.2f}/s)\n"
+    )
+    print(f"{'endpoint':<32} {'reqs':>6} {'err%':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for row in report["endpoints"]:
+        cells = "".join(f" {row[k]:9.1f}" if k in row else f" {'-':>9}" for k in ("p50_ms", "p95_ms", "p99_ms"))
+        print(f"{row['endpoint']:<32} {row['requests']:>6} {row['error_rate'] * 100:6.1f}{cells}")
+
+    for endpoint, reasons in report["errors"].items():
+        for reason, count in reasons.items():
+            print(f"  {endpoint}: {count} x {reason}")
+
+    locks = report["sqlite_lock_errors"]
+    print(f"\nSQLite lock errors: {locks['responses']} in responses, {locks['server_log']} in server log")
+    for side in ("client", "server"):
+        lag = report[f"{side}_loop_lag_ms"]
+        if lag:
+            print(f"{side} event-loop lag: p50 {lag['p50']:.1f} ms, p95 {lag['p95']:.1f} ms, p99 {lag['p99']:.1f} ms")
+    if report["server_log"]:
+        print(f"server log: {report['server_log']}")
@@ -1,19 +1,64 @@
 from __future__ import annotations
 
 import asyncio
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.core import breaker, metrics, querystats, readiness, speculation
 from app.core.config import get_settings
-from app.core.db import engine, Base
-from app.api.protocols import router as protocols_router
+from app.core.db import engine
+from app.core.events import get_event_hub
+from app.core.graph import aclose_async_checkpointer
+from app.core.schema import ensure_schema
+from app.core.serialization import FastJSONResponse
+from app.api.protocols import cancel_background_tasks, router as protocols_router
 
 
 settings = get_settings()
 
 
-app = FastAPI(title=settings.app_name)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Fast "migrations are current" check instead of create_all on every
+    # boot. Unmanaged local dev DBs are still created (see app.core.schema).
+    async with engine.begin() as conn:
+        print(f"[startup] {await ensure_schema(conn)}")
+    # Build the graph, checkpointer, LLM clients and DB pool in the
+    # background; `/ready` turns 200 once they are warm.
+    readiness.start()
+    loop_lag_monitor = asyncio.create_task(metrics.monitor_loop_lag())
+    try:
+        yield
+    finally:
+        # Release what warm-up and the runs opened; the checkpointer's
+        # aiosqlite thread in particular would keep the process alive.
+        loop_lag_monitor.cancel()
+        await readiness.stop()
+        await cancel_background_tasks()
+        await aclose_async_checkpointer()
+        await engine.dispose()
+
+
+app = FastAPI(title=settings.app_name, default_response_class=FastJSONResponse, lifespan=lifespan)
+
+
+querystats.install(engine)
+
+
+@app.middleware("http")
+async def count_queries(request: Request, call_next):
+    """Expose each request's SQL cost as a Server-Timing header and metrics.
+
+    For streaming responses this covers the work done before the body
+    starts; queries issued while streaming belong to the graph run.
+    """
+    with querystats.track_queries(f"{request.method} {request.url.path}") as stats:
+        response = await call_next(request)
+    response.headers["Server-Timing"] = f'db;dur={stats.ms:.1f};desc="{stats.count} queries"'
+    querystats.report(stats, "request")
+    return response
 
 
 app.add_middleware(
@@ -25,17 +70,25 @@ app.add_middleware(
 )
 
 
-@app.on_event("startup")
-async def on_startup() -> None:
-    # Create DB schema if it doesn't exist yet. In production you would rely
-    # on Alembic migrations instead, but this keeps local dev simple.
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-
-
 @app.get("/health")
 async def health() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/ready")
+async def ready() -> FastJSONResponse:
+    """Readiness probe: 503 until every component has been warmed up."""
+    data = readiness.status()
+    return FastJSONResponse(data, status_code=200 if data["ready"] else 503)
+
+
+@app.get("/metrics")
+async def get_metrics() -> dict:
+    data = metrics.snapshot()
+    data["speculation_hit_rate"] = speculation.hit_rate()
+    data["circuit_breakers"] = breaker.states()
+    data["event_channels"] = get_event_hub().channel_count()
+    return data
+
+
 app.include_router(protocols_router, prefix=settings.api_prefix)
@@ -1 +1,2 @@
 from .session import ProtocolSession, DraftVersion, AgentLog, SessionStatusEnum
+from .lease import SessionLease
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Column, DateTime, Enum, Integer, String, Text, ForeignKey, Float
+from sqlalchemy import Column, DateTime, Enum, Index, Integer, String, Text, ForeignKey, Float
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
 from app.core.db import Base
@@ -20,6 +20,10 @@ class SessionStatusEnum(str):
 
 class ProtocolSession(Base):
     __tablename__ = "protocol_sessions"
+    __table_args__ = (
+        Index("ix_protocol_sessions_status_created_at", "status", "created_at"),
+        Index("ix_protocol_sessions_created_at", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     intent: Mapped[str] = mapped_column(String(512), nullable=False)
@@ -35,6 +39,13 @@ class ProtocolSession(Base):
     empathy_score: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
 
     iteration: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    num_candidates: Mapped[int] = mapped_column(Integer, default=1, server_default="1", nullable=False)
+
+    # Set on sessions forked from another session's checkpoint.
+    parent_session_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("protocol_sessions.id", ondelete="SET NULL"), nullable=True
+    )
+    forked_from_checkpoint_id: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at: Mapped[datetime] = mapped_column(
@@ -51,6 +62,7 @@ class ProtocolSession(Base):
 
 class DraftVersion(Base):
     __tablename__ = "draft_versions"
+    __table_args__ = (Index("ix_draft_versions_session_id_version_index", "session_id", "version_index"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     session_id: Mapped[int] = mapped_column(ForeignKey("protocol_sessions.id", ondelete="CASCADE"))
@@ -68,6 +80,7 @@ class DraftVersion(Base):
 
 class AgentLog(Base):
     __tablename__ = "agent_logs"
+    __table_args__ = (Index("ix_agent_logs_session_id_id", "session_id", "id"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     session_id: Mapped[int] = mapped_column(ForeignKey("protocol_sessions.id", ondelete="CASCADE"))
@@ -6,5 +6,8 @@ from .protocols import (
     CreateProtocolRequest,
     ApproveDraftRequest,
     BlackboardSnapshot,
+    CheckpointInfo,
+    CheckpointPage,
+    ForkSessionRequest,
     ProtocolRunResponse,
 )
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional, List
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class AgentLogEntry(BaseModel):
@@ -40,9 +40,13 @@ class ProtocolSessionOut(BaseModel):
     empathy_score: Optional[float] = None
 
     iteration: int
+    num_candidates: int = 1
     created_at: datetime
     updated_at: datetime
 
+    parent_session_id: Optional[int] = None
+    forked_from_checkpoint_id: Optional[str] = None
+
     drafts: List[DraftVersionOut]
 
 
@@ -58,6 +62,9 @@ class ProtocolSessionListItem(BaseModel):
 
 class CreateProtocolRequest(BaseModel):
     intent: str
+    # Candidate drafts generated and scored in parallel per drafting pass;
+    # only the best one goes on to the reviewers and the human gate.
+    num_candidates: int = Field(default=1, ge=1)
 
 
 class ApproveDraftRequest(BaseModel):
@@ -68,6 +75,41 @@ class BlackboardSnapshot(BaseModel):
     state: dict
     created_at: Optional[str] = None
 
+    # Checkpoint this state was read from; pass it back as `since` to get
+    # only the keys that changed afterwards.
+    checkpoint_id: Optional[str] = None
+    since: Optional[str] = None
+    changed_keys: Optional[List[str]] = None
+    removed_keys: Optional[List[str]] = None
+
+
+class CheckpointInfo(BaseModel):
+    """Metadata of one checkpoint in a session's thread (no state values)."""
+
+    checkpoint_id: str
+    parent_checkpoint_id: Optional[str] = None
+    step: Optional[int] = None
+    source: Optional[str] = None
+    next: List[str] = []
+    interrupted: bool = False
+    created_at: Optional[str] = None
+
+
+class CheckpointPage(BaseModel):
+    items: List[CheckpointInfo]
+    # Pass as `before` to fetch the next (older) page; None when exhausted.
+    next_before: Optional[str] = None
+
+
+class ForkSessionRequest(BaseModel):
+    checkpoint_id: str
+    # Node the forked session should run next, e.g. "safety_guardian" to
+    # re-run only the reviewers or "supervisor_agent" to re-enter the human
+    # gate. Defaults to whatever was pending at that checkpoint.
+    next_node: Optional[str] = None
+    # Blackboard overrides applied on top of the checkpoint's state.
+    values: Optional[dict] = None
+
 
 class ProtocolRunResponse(BaseModel):
     session: ProtocolSessionOut
@@ -6,7 +6,7 @@ import sys
 import uuid
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, create_model
 
 # Ensure the backend package is importable when running this file directly.
 ROOT = pathlib.Path(__file__).resolve().parents[1]
@@ -18,7 +18,8 @@ from langgraph.types import Command
 from mcp.server.fastmcp import FastMCP, Context
 from mcp.server.session import ServerSession
 
-from app.core.graph import get_graph
+from app.core.config import get_settings
+from app.core.graph import get_async_graph
 
 
 mcp = FastMCP(name="Cerina Protocol Foundry MCP")
@@ -36,27 +37,21 @@ class HumanApproval(BaseModel):
     )
 
 
-@mcp.tool()
-async def generate_cbt_protocol(
-    intent: str,
-    ctx: Context[ServerSession, None],
-) -> str:
-    """Generate a CBT protocol for the given intent with mandatory human approval.
+# Bounds how many graph runs this server drives at once (created lazily so
+# it binds to the server's event loop).
+_run_slots: asyncio.Semaphore | None = None
 
-    This tool runs the same LangGraph workflow used by the HTTP backend:
-    - Drafting Agent creates an initial CBT exercise.
-    - Safety Guardian and Clinical Critic evaluate safety and empathy.
-    - Supervisor halts with an interrupt and surfaces the draft.
-    - This tool then elicits human approval via MCP forms.
-    - After human edits, the graph is resumed to finalize the protocol.
-    """
 
-    graph = get_graph()
-    thread_id = str(uuid.uuid4())
-    config = {"configurable": {"thread_id": thread_id}}
+def _slots() -> asyncio.Semaphore:
+    global _run_slots
+    if _run_slots is None:
+        _run_slots = asyncio.Semaphore(get_settings().mcp_max_concurrent_runs)
+    return _run_slots
+
 
+def _initial_state(intent: str) -> dict:
     # Initial blackboard input mirrors the HTTP backend.
-    initial_state = {
+    return {
         "intent": intent,
         "iteration": 0,
         "max_iterations": 3,
@@ -64,77 +59,236 @@ async def generate_cbt_protocol(
         "draft_versions": [],
     }
 
-    # Run until the supervisor interrupts for human approval.
-    await ctx.info("Starting Cerina Protocol Foundry workflow (draft + internal review)...")
 
-    async for _ in graph.astream(
-        initial_state,
-        config,
-        stream_mode=["values", "checkpoints"],
-    ):
-        snapshot = await graph.aget_state(config)
-        if snapshot.interrupts:
-            break
-
-    snapshot = await graph.aget_state(config)
-    if not snapshot.interrupts:
-        raise RuntimeError("Expected human interrupt but none was recorded in the checkpoint.")
-
-    # Extract the draft and metadata from the interrupt payload.
-    interrupt = snapshot.interrupts[0]
-    payload = interrupt.value if isinstance(interrupt.value, dict) else {"draft": str(interrupt.value)}
-
-    draft_text: str = payload.get("draft") or payload.get("current_draft") or "(no draft in interrupt payload)"
-    safety_score: Optional[float] = payload.get("safety_score")
-    empathy_score: Optional[float] = payload.get("empathy_score")
-
-    details_lines = ["A CBT draft is ready for review."]
-    if safety_score is not None:
-        details_lines.append(f"Safety score: {safety_score:.2f}")
-    if empathy_score is not None:
-        details_lines.append(f"Empathy score: {empathy_score:.2f}")
-
-    await ctx.info("Halting for human clinical review via MCP elicitation.")
-
-    result = await ctx.elicit(
-        message=(
-            "Please review and clinically refine the following CBT protocol draft.\n\n"
-            + "\n".join(details_lines)
-            + "\n\n--- DRAFT BEGIN ---\n"
-            + draft_text
-            + "\n--- DRAFT END ---\n\n"
-            + "You may adjust tone, wording, or structure, but please keep the CBT framing."
-        ),
-        schema=HumanApproval,
-    )
+def _describe(event: dict) -> Optional[str]:
+    """One-line progress message for a custom agent event, if worth sending."""
+    agent = event.get("agent", "agent")
+    kind = event.get("event")
+    if kind == "start":
+        return f"{agent} started"
+    if kind != "finish":
+        return None
+    if "draft_preview" in event:
+        return f"{agent}: draft v{event.get('version', '?')}\n{event['draft_preview']}"
+    for key in ("safety_score", "empathy_score"):
+        if isinstance(event.get(key), (int, float)):
+            return f"{agent}: {key.replace('_', ' ')} {event[key]:.2f}"
+    return f"{agent} finished"
+
+
+class _Progress:
+    """Forwards a run's agent events to the MCP client as progress notifications."""
+
+    def __init__(self, ctx: Context, label: str = "", total: float | None = None) -> None:
+        self.ctx = ctx
+        self.label = label
+        self.total = total
+        self.step = 0
+
+    async def event(self, event: dict) -> None:
+        message = _describe(event)
+        if message is None:
+            return
+        if event.get("event") == "finish":
+            self.step += 1
+        try:
+            await self.ctx.report_progress(self.step, self.total)
+            await self.ctx.info(f"{self.label}{message}")
+        except Exception as exc:
+            # A client that went away must not abort the run. stdout is the
+            # JSON-RPC channel under the stdio transport.
+            print(f"Could not send MCP progress: {exc}", file=sys.stderr)
+
+
+async def _run_until_gate(graph, input_obj: object, config: dict, progress: _Progress) -> Optional[dict]:
+    """Stream the graph until it halts or ends.
+
+    Returns the interrupt payload if it halted for human review. The
+    interrupt is read from the update stream itself instead of polling the
+    checkpoint after every chunk.
+    """
+    async for mode, data in graph.astream(input_obj, config, stream_mode=["custom", "updates"]):
+        if mode == "custom" and isinstance(data, dict):
+            await progress.event(data)
+        elif mode == "updates" and isinstance(data, dict) and "__interrupt__" in data:
+            interrupts = data["__interrupt__"]
+            value = interrupts[0].value if interrupts else None
+            return value if isinstance(value, dict) else {"draft": str(value)}
+    return None
 
-    if result.action != "accept" or not result.data:
-        raise RuntimeError("Human approval was declined or cancelled; protocol cannot be finalized.")
 
-    approved_draft = result.data.approved_draft
+def _review_details(payload: dict) -> str:
+    lines = []
+    if payload.get("safety_score") is not None:
+        lines.append(f"Safety score: {payload['safety_score']:.2f}")
+    if payload.get("empathy_score") is not None:
+        lines.append(f"Empathy score: {payload['empathy_score']:.2f}")
+    return "\n".join(lines)
 
-    await ctx.info("Human-edited draft received. Resuming LangGraph workflow to finalize protocol...")
 
-    resume_cmd = Command(resume={"approved_draft": approved_draft})
+def _draft_of(payload: dict) -> str:
+    return payload.get("draft") or payload.get("current_draft") or "(no draft in interrupt payload)"
 
-    async for _ in graph.astream(
-        resume_cmd,
-        config,
-        stream_mode=["values", "checkpoints"],
-    ):
-        pass
 
+async def _final_protocol(graph, config: dict) -> str:
     final_snapshot = await graph.aget_state(config)
     state = final_snapshot.values if isinstance(final_snapshot.values, dict) else {"value": final_snapshot.values}
     final_protocol = state.get("final_protocol") or state.get("current_draft")
-
     if not final_protocol:
         raise RuntimeError("Graph completed without producing a final_protocol.")
+    return final_protocol
+
+
+@mcp.tool()
+async def generate_cbt_protocol(
+    intent: str,
+    ctx: Context[ServerSession, None],
+) -> str:
+    """Generate a CBT protocol for the given intent with mandatory human approval.
+
+    This tool runs the same LangGraph workflow used by the HTTP backend:
+    - Drafting Agent creates an initial CBT exercise.
+    - Safety Guardian and Clinical Critic evaluate safety and empathy.
+    - Supervisor halts with an interrupt and surfaces the draft.
+    - This tool then elicits human approval via MCP forms.
+    - After human edits, the graph is resumed to finalize the protocol.
+
+    Agent events and draft previews are sent as progress notifications
+    while the graph runs.
+    """
+
+    graph = await get_async_graph()
+    config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+    progress = _Progress(ctx)
+
+    await ctx.info("Starting Cerina Protocol Foundry workflow (draft + internal review)...")
+
+    # Run until the supervisor interrupts for human approval. Run slots are
+    # only held while the graph executes, not while a human reviews.
+    async with _slots():
+        payload = await _run_until_gate(graph, _initial_state(intent), config, progress)
+    if payload is None:
+        raise RuntimeError("Expected human interrupt but none was recorded in the stream.")
+
+    # The supervisor may ask for another refinement pass after approval,
+    # which halts for review again.
+    while payload is not None:
+        await ctx.info("Halting for human clinical review via MCP elicitation.")
+
+        result = await ctx.elicit(
+            message=(
+                "Please review and clinically refine the following CBT protocol draft.\n\n"
+                "A CBT draft is ready for review.\n"
+                + _review_details(payload)
+                + "\n\n--- DRAFT BEGIN ---\n"
+                + _draft_of(payload)
+                + "\n--- DRAFT END ---\n\n"
+                + "You may adjust tone, wording, or structure, but please keep the CBT framing."
+            ),
+            schema=HumanApproval,
+        )
+
+        if result.action != "accept" or not result.data:
+            raise RuntimeError("Human approval was declined or cancelled; protocol cannot be finalized.")
+
+        await ctx.info("Human-edited draft received. Resuming LangGraph workflow to finalize protocol...")
+
+        resume_cmd = Command(resume={"approved_draft": result.data.approved_draft})
+        async with _slots():
+            payload = await _run_until_gate(graph, resume_cmd, config, progress)
+
+    final_protocol = await _final_protocol(graph, config)
 
     await ctx.info("Cerina Protocol Foundry workflow completed.")
     return final_protocol
 
 
+def _batch_approval_model(pending: list[tuple[int, str, dict]]) -> type[BaseModel]:
+    """Elicitation form with one pre-filled draft field per pending protocol."""
+    fields = {}
+    for idx, intent, payload in pending:
+        details = _review_details(payload).replace("\n", ", ")
+        fields[f"draft_{idx + 1}"] = (
+            str,
+            Field(
+                default=_draft_of(payload),
+                description=f"Protocol {idx + 1}: {intent}" + (f" ({details})" if details else ""),
+            ),
+        )
+    return create_model("BatchHumanApproval", **fields)
+
+
+@mcp.tool()
+async def generate_cbt_protocols(
+    intents: list[str],
+    ctx: Context[ServerSession, None],
+) -> str:
+    """Generate several CBT protocols with a single human review pass.
+
+    All intents run concurrently (within the server's run limit) up to the
+    supervisor's human gate. Their drafts are then presented together in
+    one elicitation form, and the approved drafts are resumed in parallel.
+    If the supervisor requests another pass for some of them, only those are
+    reviewed again.
+    """
+
+    if not intents:
+        raise ValueError("Provide at least one intent.")
+    limit = get_settings().mcp_max_batch_intents
+    if len(intents) > limit:
+        raise ValueError(f"At most {limit} intents per call.")
+
+    graph = await get_async_graph()
+    configs = [{"configurable": {"thread_id": str(uuid.uuid4())}} for _ in intents]
+    progress = [_Progress(ctx, label=f"[{i + 1}] ") for i in range(len(intents))]
+
+    async def run(idx: int, input_obj: object) -> Optional[dict]:
+        async with _slots():
+            return await _run_until_gate(graph, input_obj, configs[idx], progress[idx])
+
+    await ctx.info(f"Starting {len(intents)} Cerina Protocol Foundry workflows...")
+    payloads = await asyncio.gather(
+        *(run(i, _initial_state(intent)) for i, intent in enumerate(intents))
+    )
+    pending = [(i, intents[i], p) for i, p in enumerate(payloads) if p is not None]
+    if len(pending) != len(intents):
+        raise RuntimeError("Expected every workflow to halt for human review.")
+
+    while pending:
+        await ctx.info(f"Halting for human clinical review of {len(pending)} drafts via MCP elicitation.")
+        result = await ctx.elicit(
+            message=(
+                f"Please review and clinically refine the following {len(pending)} CBT protocol drafts. "
+                "Each field holds one draft; edit it in place. "
+                "You may adjust tone, wording, or structure, but please keep the CBT framing."
+            ),
+            schema=_batch_approval_model(pending),
+        )
+        if result.action != "accept" or not result.data:
+            raise RuntimeError("Human approval was declined or cancelled; protocols cannot be finalized.")
+
+        approved = result.data.model_dump()
+        await ctx.info("Human-edited drafts received. Resuming workflows...")
+        resumed = await asyncio.gather(
+            *(
+                run(idx, Command(resume={"approved_draft": approved[f"draft_{idx + 1}"]}))
+                for idx, _, _ in pending
+            )
+        )
+        pending = [
+            (idx, intent, payload)
+            for (idx, intent, _), payload in zip(pending, resumed)
+            if payload is not None
+        ]
+
+    protocols = await asyncio.gather(*(_final_protocol(graph, config) for config in configs))
+    await ctx.info("All Cerina Protocol Foundry workflows completed.")
+    return "\n\n".join(
+        f"## Protocol {i + 1}: {intent}\n\n{protocol}"
+        for i, (intent, protocol) in enumerate(zip(intents, protocols))
+    )
+
+
 if __name__ == "__main__":  # pragma: no cover - manual server launch
     from mcp.server.stdio import stdio_server
 
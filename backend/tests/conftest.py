@@ -0,0 +1,16 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Run from `backend/`: `python -m pytest tests`. The app reads its settings
+# once, so point every database at a throwaway directory before any test
+# imports it.
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+_TMP = tempfile.mkdtemp(prefix="cerina-tests-")
+os.environ.setdefault("CERINA_APP_DB_URL", f"sqlite+aiosqlite:///{_TMP}/app.db")
+os.environ.setdefault("CERINA_CHECKPOINT_DB_PATH", f"{_TMP}/checkpoints.db")
+os.environ.setdefault("CERINA_ARCHIVE_DIR", f"{_TMP}/archive")
+os.environ.setdefault("CERINA_LLM_PROVIDER", "fake")
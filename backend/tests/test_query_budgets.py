@@ -0,0 +1,73 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core import querystats
+from app.core.db import AsyncSessionLocal, Base, engine
+from app.core.graph import aclose_async_checkpointer
+from app.main import app
+from app.models import AgentLog, DraftVersion, ProtocolSession, SessionStatusEnum
+
+# SQL statement budgets for the hot read endpoints. Sessions load their
+# drafts and logs with selectin, so reading one session or a whole list is
+# three statements whatever the row count; more means something started
+# loading per row.
+
+SESSIONS = 25
+
+BUDGETS = [
+    ("GET /api/protocols", "/api/protocols", 3),
+    ("GET /api/protocols/{id}", "/api/protocols/1", 3),
+    ("GET /api/protocols/{id}/blackboard", "/api/protocols/1/blackboard", 3),
+    # Session load plus the log replay after Last-Event-ID.
+    ("GET /api/protocols/{id}/stream/start (replay)", "/api/protocols/1/stream/start?last_event_id=0", 4),
+]
+
+
+async def _seed() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as db:
+        for i in range(SESSIONS):
+            session = ProtocolSession(
+                intent=f"Sleep hygiene plan {i}",
+                thread_id=f"query-budget-{i}",
+                status=SessionStatusEnum.COMPLETED,
+                iteration=2,
+            )
+            session.drafts = [DraftVersion(version_index=v, content=f"Draft {v}") for v in range(3)]
+            session.logs = [
+                AgentLog(agent_name="Drafter", phase="draft", message='{"iteration": 1}'),
+                AgentLog(agent_name="SafetyGuardian", phase="review", message='{"score": 0.9}'),
+                AgentLog(agent_name="runner", phase="done", message='{"status": "completed"}'),
+            ]
+            db.add(session)
+        await db.commit()
+
+
+@pytest.fixture(scope="module")
+def loop():
+    # One loop for the module: the engine pool and the checkpointer are
+    # bound to the loop that first used them.
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(_seed())
+    yield loop
+    # aiosqlite threads are not daemons; leaving them open hangs pytest at exit.
+    loop.run_until_complete(aclose_async_checkpointer())
+    loop.run_until_complete(engine.dispose())
+    loop.close()
+
+
+async def _get(path: str) -> httpx.Response:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.get(path)
+
+
+@pytest.mark.parametrize("label, path, budget", BUDGETS, ids=[b[0] for b in BUDGETS])
+def test_query_budget(loop, label, path, budget):
+    with querystats.query_budget(budget, label) as stats:
+        response = loop.run_until_complete(_get(path))
+    assert response.status_code == 200, response.text
+    assert stats.count > 0
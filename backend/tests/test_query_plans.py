@@ -0,0 +1,12 @@
+import pytest
+
+from app.core import query_plans
+
+
+@pytest.mark.parametrize("result", query_plans.audit(), ids=lambda r: r.name)
+def test_hot_query_uses_an_index(result):
+    assert result.ok, f"{result.name} scans {result.full_scans}:\n{result.sql}\n" + "\n".join(result.plan)
+
+
+def test_every_hot_query_is_audited():
+    assert [r.name for r in query_plans.audit()] == list(query_plans.HOT_QUERIES)
@@ -0,0 +1,19 @@
+from app import cli
+
+
+def test_import_app_main_within_budget(capsys):
+    # Fresh interpreter under -X importtime; non-zero means over budget
+    # (or that `import app.main` itself failed).
+    code = cli.main(["startup-report", "--top", "10"])
+    out, err = capsys.readouterr()
+    assert code == 0, out + err
+
+
+def test_parse_importtime():
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   _io\n"
+        "import time:       300 |        420 | app.main\n"
+        "not an importtime line\n"
+    )
+    assert cli._parse_importtime(stderr) == [(120, 120, "  _io"), (300, 420, "app.main")]
@@ -7,6 +7,7 @@ import {
   approveDraft,
   openStartStream,
   openResumeStream,
+  SessionStream,
 } from './api';
 
 interface Session {
@@ -50,7 +51,7 @@ const App: React.FC = () => {
   const [draftText, setDraftText] = useState('');
   const [isStreaming, setIsStreaming] = useState(false);
   const [isHalted, setIsHalted] = useState(false);
-  const [streamSource, setStreamSource] = useState<EventSource | null>(null);
+  const [streamSource, setStreamSource] = useState<SessionStream | null>(null);
   const eventsEndRef = useRef<HTMLDivElement>(null);
 
   // Load sessions on mount
@@ -93,7 +94,8 @@ const App: React.FC = () => {
 
   const handleStreamEvent = useCallback((event: any) => {
     try {
-      const data = JSON.parse(event.data);
+      // Stream helpers in api.ts deliver already-decoded events.
+      const data = typeof event?.data === 'string' ? JSON.parse(event.data) : event;
       
       if (data.type === 'agent_event') {
         const newEvent: AgentEvent = {
@@ -26,18 +26,143 @@ export interface ProtocolSessionOut extends ProtocolSessionListItem {
   safety_score?: number | null;
   empathy_score?: number | null;
   iteration: number;
+  num_candidates?: number;
+  parent_session_id?: number | null;
+  forked_from_checkpoint_id?: string | null;
   drafts: DraftVersionOut[];
 }
 
+export interface CheckpointInfo {
+  checkpoint_id: string;
+  parent_checkpoint_id?: string | null;
+  step?: number | null;
+  source?: string | null;
+  next: string[];
+  interrupted: boolean;
+  created_at?: string | null;
+}
+
+export interface CheckpointPage {
+  items: CheckpointInfo[];
+  next_before?: string | null;
+}
+
 export interface BlackboardSnapshot {
   state: Record<string, unknown>;
   created_at?: string | null;
+  checkpoint_id?: string | null;
+  since?: string | null;
+  changed_keys?: string[] | null;
+  removed_keys?: string[] | null;
+}
+
+export interface JsonPatchOp {
+  op: 'add' | 'remove' | 'replace';
+  path: string;
+  value?: unknown;
 }
 
 export type StreamEvent =
   | { type: 'agent_event'; payload: Record<string, unknown> }
-  | { type: 'state'; payload: Record<string, unknown> }
-  | { type: 'halt'; payload: { interrupts: unknown[] } };
+  | { type: 'state'; rev?: number; payload: Record<string, unknown> }
+  | { type: 'halt'; payload: { interrupts: unknown[] } }
+  | { type: 'done'; payload: { status: string } };
+
+// Wire-level event: blackboard updates after the first full `state` arrive
+// as RFC 6902 patches, which the stream helpers fold back into `state`.
+type WireEvent =
+  | StreamEvent
+  | { type: 'state_patch'; rev: number; base_rev: number; payload: JsonPatchOp[] };
+
+export interface SessionStream {
+  close(): void;
+}
+
+function decodePointer(path: string): string[] {
+  return path
+    .split('/')
+    .slice(1)
+    .map((t) => t.replace(/~1/g, '/').replace(/~0/g, '~'));
+}
+
+export function applyJsonPatch<T>(doc: T, ops: JsonPatchOp[]): T {
+  const root: any = structuredClone(doc);
+  let result: any = root;
+  for (const op of ops) {
+    const tokens = decodePointer(op.path);
+    if (tokens.length === 0) {
+      result = op.op === 'remove' ? undefined : op.value;
+      continue;
+    }
+    let parent: any = result;
+    for (const token of tokens.slice(0, -1)) parent = parent[token];
+    const last = tokens[tokens.length - 1];
+    if (Array.isArray(parent)) {
+      const index = last === '-' ? parent.length : Number(last);
+      if (op.op === 'add') parent.splice(index, 0, op.value);
+      else if (op.op === 'remove') parent.splice(index, 1);
+      else parent[index] = op.value;
+    } else if (op.op === 'remove') {
+      delete parent[last];
+    } else {
+      parent[last] = op.value;
+    }
+  }
+  return result;
+}
+
+function openSessionStream(
+  url: string,
+  onEvent: (evt: StreamEvent) => void,
+): SessionStream {
+  let state: Record<string, unknown> | undefined;
+  let rev: number | undefined;
+  let lastEventId = '';
+  let es: EventSource;
+
+  const connect = (target: string) => {
+    es = new EventSource(target);
+    es.onmessage = (e) => {
+      if (e.lastEventId) lastEventId = e.lastEventId;
+      let parsed: WireEvent;
+      try {
+        parsed = JSON.parse(e.data) as WireEvent;
+      } catch {
+        return; // ignore malformed events
+      }
+      if (!parsed || !(parsed as any).type) return;
+
+      if (parsed.type === 'state_patch') {
+        if (state === undefined || parsed.base_rev !== rev) {
+          // Our copy no longer matches; reconnecting always starts with a
+          // full state, so that doubles as a resync request.
+          es.close();
+          state = undefined;
+          const sep = url.includes('?') ? '&' : '?';
+          connect(`${url}${sep}last_event_id=${encodeURIComponent(lastEventId || '0')}`);
+          return;
+        }
+        state = applyJsonPatch(state, parsed.payload);
+        rev = parsed.rev;
+        onEvent({ type: 'state', rev, payload: state });
+        return;
+      }
+      if (parsed.type === 'state') {
+        state = parsed.payload;
+        rev = parsed.rev;
+      }
+      if (parsed.type === 'halt' || parsed.type === 'done') {
+        // The server ends the stream after these; without closing, the
+        // browser would reconnect (and be sent away again) forever.
+        es.close();
+      }
+      onEvent(parsed);
+    };
+  };
+
+  connect(url);
+  return { close: () => es.close() };
+}
 
 export async function listSessions(): Promise<ProtocolSessionListItem[]> {
   const res = await fetch(`${API_BASE_URL}/protocols`);
@@ -45,7 +170,10 @@ export async function listSessions(): Promise<ProtocolSessionListItem[]> {
   return res.json();
 }
 
-export async function createSession(intent: string): Promise<ProtocolSessionOut> {
+export async function createSession(
+  intent: string,
+  numCandidates = 1,
+): Promise<ProtocolSessionOut> {
   try {
     console.log('API_BASE_URL:', API_BASE_URL);
     console.log('Creating session with intent:', intent);
@@ -53,7 +181,7 @@ export async function createSession(intent: string): Promise<ProtocolSessionOut>
     const res = await fetch(`${API_BASE_URL}/protocols`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ intent }),
+      body: JSON.stringify({ intent, num_candidates: numCandidates }),
     });
     
     console.log('Response status:', res.status);
@@ -79,12 +207,48 @@ export async function getSession(id: number): Promise<ProtocolSessionOut> {
   return res.json();
 }
 
-export async function getBlackboard(id: number): Promise<BlackboardSnapshot> {
-  const res = await fetch(`${API_BASE_URL}/protocols/${id}/blackboard`);
+export async function getBlackboard(
+  id: number,
+  opts: { fields?: string[]; since?: string } = {},
+): Promise<BlackboardSnapshot> {
+  const params = new URLSearchParams();
+  if (opts.fields?.length) params.set('fields', opts.fields.join(','));
+  if (opts.since) params.set('since', opts.since);
+  const query = params.toString();
+  const res = await fetch(
+    `${API_BASE_URL}/protocols/${id}/blackboard${query ? `?${query}` : ''}`,
+  );
   if (!res.ok) throw new Error('Failed to get blackboard state');
   return res.json();
 }
 
+export async function listCheckpoints(
+  id: number,
+  opts: { limit?: number; before?: string } = {},
+): Promise<CheckpointPage> {
+  const params = new URLSearchParams();
+  if (opts.limit) params.set('limit', String(opts.limit));
+  if (opts.before) params.set('before', opts.before);
+  const query = params.toString();
+  const res = await fetch(`${API_BASE_URL}/protocols/${id}/checkpoints${query ? `?${query}` : ''}`);
+  if (!res.ok) throw new Error('Failed to list checkpoints');
+  return res.json();
+}
+
+export async function forkSession(
+  id: number,
+  checkpointId: string,
+  opts: { nextNode?: string; values?: Record<string, unknown> } = {},
+): Promise<ProtocolSessionOut> {
+  const res = await fetch(`${API_BASE_URL}/protocols/${id}/fork`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ checkpoint_id: checkpointId, next_node: opts.nextNode, values: opts.values }),
+  });
+  if (!res.ok) throw new Error('Failed to fork session');
+  return res.json();
+}
+
 export async function approveDraft(
   id: number,
   editedDraft: string,
@@ -111,43 +275,13 @@ export async function kickoffSession(id: number): Promise<void> {
 export function openStartStream(
   id: number,
   onEvent: (evt: StreamEvent) => void,
-): EventSource {
-  const es = new EventSource(
-    `${API_BASE_URL}/protocols/${id}/stream/start`,
-  );
-
-  es.onmessage = (e) => {
-    try {
-      const parsed = JSON.parse(e.data) as StreamEvent;
-      if (parsed && (parsed as any).type) {
-        onEvent(parsed);
-      }
-    } catch {
-      // ignore malformed events
-    }
-  };
-
-  return es;
+): SessionStream {
+  return openSessionStream(`${API_BASE_URL}/protocols/${id}/stream/start`, onEvent);
 }
 
 export function openResumeStream(
   id: number,
   onEvent: (evt: StreamEvent) => void,
-): EventSource {
-  const es = new EventSource(
-    `${API_BASE_URL}/protocols/${id}/stream/resume`,
-  );
-
-  es.onmessage = (e) => {
-    try {
-      const parsed = JSON.parse(e.data) as StreamEvent;
-      if (parsed && (parsed as any).type) {
-        onEvent(parsed);
-      }
-    } catch {
-      // ignore malformed events
-    }
-  };
-
-  return es;
+): SessionStream {
+  return openSessionStream(`${API_BASE_URL}/protocols/${id}/stream/resume`, onEvent);
 }